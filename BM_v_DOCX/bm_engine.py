@@ -0,0 +1,579 @@
+# -*- coding: utf-8 -*-
+"""
+Серверна обробка архівів з БМ: ZIP/RAR -> DOCX без браузера.
+
+Повторює логіку BM_v_DOCX/index.html (пошук таблиці та колонок, фото з
+архіву, карта для кожної точки та оглядова карта, таблиця DOCX з тими самими
+ширинами колонок), але:
+
+- архів читається потоково: таблиця і кожне фото розпаковуються на вимогу,
+  у пам'яті одночасно лише поточна порція рядків;
+- карти складаються з тайлів OpenStreetMap через Pillow; тайли кешуються у
+  пам'яті та на диску (.cache/tiles), сервер тайлів - змінна BM_TILE_URL;
+- пакетний режим обробляє багато архівів у пулі процесів.
+
+RAR читається лише за наявності пакета rarfile (і утиліти unrar).
+"""
+
+import io
+import math
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import requests
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Emu, Twips
+from PIL import Image, ImageDraw
+
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
+
+try:
+    from shared_resources import POOL_WORKERS, pool_map
+except ImportError:
+    # Запуск напряму з підпапки - додаємо корінь репозиторію
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from shared_resources import POOL_WORKERS, pool_map
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TILE_URL = os.environ.get("BM_TILE_URL", "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png")
+TILE_SUBDOMAINS = "abc"
+TILE_SIZE = 256
+TILE_MAX_ZOOM = 19
+TILE_TIMEOUT = 10
+TILE_CACHE_DIR = os.environ.get("BM_TILE_CACHE", os.path.join(ROOT_DIR, ".cache", "tiles"))
+TILE_MEMORY_LIMIT = 512  # тайлів у пам'яті процесу
+
+POINT_MAP_SIZE = (640, 400)
+POINT_MAP_ZOOM = 18
+OVERVIEW_MAP_SIZE = (960, 540)
+# Фото зменшуються до цього розміру (у DOCX вони показуються як 180x120 px)
+PHOTO_MAX_SIZE = (720, 480)
+# Скільки рядків обробляється за раз (карти для порції будуються паралельно)
+ROW_CHUNK_SIZE = 32
+MAP_WORKERS = 8
+
+# Кандидати назв колонок - як у index.html
+CANDS = {
+    "plate": ["plate", "license", "license_plate", "regnum", "car_number", "number", "номер", "госномер",
+              "держномер", "номер авто", "номер_авто", "реєстраційний номер"],
+    "time": ["time", "datetime", "timestamp", "date_time", "pass_time", "время", "дата", "дата/время",
+             "дата и время", "час", "дата час", "час проходу", "час отримання", "дата_час"],
+    "lat": ["lat", "latitude", "широта", "координата широта", "latitud"],
+    "lon": ["lon", "lng", "longitude", "долгота", "довгота", "координата долгота", "longitud"],
+    "loc": ["location", "address", "адрес", "локация", "место", "адреса", "локація", "місцезнаходження"],
+    "photo": ["photo", "image", "img", "photo_name", "image_name", "filename", "file_name", "picture", "фото",
+              "зображення", "имя изображения", "ім'я зображення", "название файла", "ім'я файлу",
+              "імені зображення"],
+}
+
+# Ширини колонок таблиці DOCX (DXA, як у index.html)
+COL_WIDTH_TIME = 1600
+COL_WIDTH_LOC = 5200
+COL_WIDTH_PHOTO = 3200
+COL_WIDTH_MAP = 3200
+# Розміри зображень у пікселях docx.js (1 px = 9525 EMU)
+CELL_IMAGE_PX = (180, 120)
+OVERVIEW_IMAGE_PX = (500, 300)
+EMU_PER_PX = 9525
+
+DATE_RE = re.compile(r"(\d{1,2})[.\-/](\d{1,2})[.\-/](\d{2,4})(?:\s+|T)?(\d{1,2}:\d{2}(?::\d{2})?)?")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Архів
+# ══════════════════════════════════════════════════════════════════════════════
+
+class ArchiveReader:
+    """Потоковий доступ до файлів ZIP/RAR: члени розпаковуються лише на вимогу."""
+
+    def __init__(self, source, name: str = None):
+        self.name = name or getattr(source, "name", None) or str(source)
+        lower = self.name.lower()
+        if lower.endswith(".rar"):
+            if rarfile is None:
+                raise ValueError("Для RAR-архівів потрібен пакет rarfile (pip install rarfile) та unrar")
+            self._archive = rarfile.RarFile(source)
+        elif lower.endswith(".zip") or zipfile.is_zipfile(source):
+            self._archive = zipfile.ZipFile(source)
+        else:
+            raise ValueError("Підтримуються лише .zip та .rar файли")
+        self.names = [info.filename for info in self._archive.infolist() if not info.is_dir()]
+        # Пошук фото за ім'ям файлу без урахування регістру - O(1) замість перебору
+        self._by_basename = {}
+        for entry in self.names:
+            self._by_basename.setdefault(entry.replace("\\", "/").rsplit("/", 1)[-1].lower(), entry)
+
+    def read(self, entry: str) -> bytes:
+        return self._archive.read(entry)
+
+    def open(self, entry: str):
+        return self._archive.open(entry)
+
+    def resolve_photo(self, value):
+        """Шлях до фото в архіві за значенням колонки (достатньо імені файлу)."""
+        if value is None or value == "":
+            return None
+        base_name = re.split(r"[\\/]", str(value))[-1].lower()
+        return self._by_basename.get(base_name)
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Таблиця
+# ══════════════════════════════════════════════════════════════════════════════
+
+def find_column(cols, candidates):
+    """Колонка за кандидатами: точний збіг (без регістру), інакше входження підрядка."""
+    lower = {str(c).lower(): c for c in cols}
+    for cand in candidates:
+        cand = cand.lower()
+        if cand in lower:
+            return lower[cand]
+        for low, orig in lower.items():
+            if cand in low:
+                return orig
+    return None
+
+
+def format_datetime_for_word(value) -> str:
+    """Дата/час у форматі dd.mm.yyyy HH:MM:SS; нерозпізнане значення повертається як є."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime("%d.%m.%Y %H:%M:%S")
+    text = str(value).strip()
+    if not text:
+        return ""
+    match = DATE_RE.search(text)
+    if match:
+        day, month, year, clock = match.groups()
+        if len(year) == 2:
+            year = "20" + year
+        clock = clock or "00:00:00"
+        if clock.count(":") == 1:
+            clock += ":00"
+        try:
+            parsed = datetime.strptime(f"{year}-{month}-{day} {clock}", "%Y-%m-%d %H:%M:%S")
+            return parsed.strftime("%d.%m.%Y %H:%M:%S")
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).strftime("%d.%m.%Y %H:%M:%S")
+    except ValueError:
+        return text
+
+
+def load_table(reader: ArchiveReader):
+    """Перша таблиця (.xlsx/.xls/.csv) з архіву: (ім'я, DataFrame)."""
+    table_name = next((n for n in reader.names if re.search(r"\.(xlsx|xls|csv)$", n, re.IGNORECASE)), None)
+    if not table_name:
+        raise ValueError("У архіві не знайдено таблицю (.xlsx/.xls/.csv)")
+    if table_name.lower().endswith(".csv"):
+        with reader.open(table_name) as fh:
+            df = pd.read_csv(fh, sep=None, engine="python", dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(io.BytesIO(reader.read(table_name)), sheet_name=0, dtype=object)
+        df = df.dropna(how="all").fillna("")
+    return table_name, df
+
+
+def parse_coordinate(value):
+    try:
+        number = float(str(value).replace(",", ".").strip())
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Карти
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _world_px(lat: float, lon: float, zoom: int):
+    scale = TILE_SIZE * 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = (lon + 180.0) / 360.0 * scale
+    y = (1 - math.log(math.tan(math.radians(lat)) + 1 / math.cos(math.radians(lat))) / math.pi) / 2 * scale
+    return x, y
+
+
+class TileMapRenderer:
+    """Статичні карти з тайлів OSM (кеш у пам'яті та на диску, спільна сесія)."""
+
+    def __init__(self, tile_url: str = TILE_URL, cache_dir: str = TILE_CACHE_DIR):
+        self.tile_url = tile_url
+        self.cache_dir = cache_dir
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "BM-DOCX-report/1.0"
+        self.tiles_downloaded = 0
+        self.offline = False
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tile(self, z: int, x: int, y: int):
+        key = (z, x, y)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = os.path.join(self.cache_dir, str(z), str(x), f"{y}.png") if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as fh:
+                data = fh.read()
+        else:
+            if self.offline:
+                raise ConnectionError("сервер тайлів недоступний")
+            url = self.tile_url.format(s=TILE_SUBDOMAINS[(x + y) % len(TILE_SUBDOMAINS)], z=z, x=x, y=y)
+            try:
+                resp = self.session.get(url, timeout=TILE_TIMEOUT)
+                resp.raise_for_status()
+            except requests.RequestException:
+                # Решта карт не чекатиме таймаутів
+                self.offline = True
+                raise
+            data = resp.content
+            self.tiles_downloaded += 1
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as fh:
+                    fh.write(data)
+
+        tile = Image.open(io.BytesIO(data)).convert("RGB")
+        with self._lock:
+            self._memory[key] = tile
+            while len(self._memory) > TILE_MEMORY_LIMIT:
+                self._memory.popitem(last=False)
+        return tile
+
+    def _compose(self, center_px, zoom: int, size):
+        width, height = size
+        left = center_px[0] - width / 2
+        top = center_px[1] - height / 2
+        image = Image.new("RGB", size, (221, 221, 221))
+        tiles_per_axis = 2 ** zoom
+        for ty in range(int(math.floor(top / TILE_SIZE)), int(math.floor((top + height - 1) / TILE_SIZE)) + 1):
+            if ty < 0 or ty >= tiles_per_axis:
+                continue
+            for tx in range(int(math.floor(left / TILE_SIZE)), int(math.floor((left + width - 1) / TILE_SIZE)) + 1):
+                tile = self._tile(zoom, tx % tiles_per_axis, ty)
+                image.paste(tile, (int(round(tx * TILE_SIZE - left)), int(round(ty * TILE_SIZE - top))))
+        return image, left, top
+
+    @staticmethod
+    def _draw_marker(draw, x: float, y: float):
+        # Спрощений маркер Leaflet: вістря у точці, голова над нею
+        draw.polygon([(x, y), (x - 9, y - 22), (x + 9, y - 22)], fill=(42, 129, 203), outline=(22, 80, 140))
+        draw.ellipse([x - 11, y - 38, x + 11, y - 16], fill=(42, 129, 203), outline=(22, 80, 140))
+        draw.ellipse([x - 4, y - 31, x + 4, y - 23], fill=(255, 255, 255))
+
+    @staticmethod
+    def _png(image) -> bytes:
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", optimize=True)
+        return buf.getvalue()
+
+    def render_point_map(self, lat: float, lon: float, zoom: int = POINT_MAP_ZOOM, size=POINT_MAP_SIZE) -> bytes:
+        center = _world_px(lat, lon, zoom)
+        image, left, top = self._compose(center, zoom, size)
+        self._draw_marker(ImageDraw.Draw(image), center[0] - left, center[1] - top)
+        return self._png(image)
+
+    def render_overview(self, points: list, size=OVERVIEW_MAP_SIZE, pad: float = 0.25):
+        """Карта з усіма точками; межі розширюються на pad, як bounds.pad() у Leaflet."""
+        if not points:
+            return None
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+        d_lat = (max(lats) - min(lats)) * pad
+        d_lon = (max(lons) - min(lons)) * pad
+        south, north = min(lats) - d_lat, max(lats) + d_lat
+        west, east = min(lons) - d_lon, max(lons) + d_lon
+
+        zoom = POINT_MAP_ZOOM
+        while zoom > 0:
+            x1, y1 = _world_px(north, west, zoom)
+            x2, y2 = _world_px(south, east, zoom)
+            if x2 - x1 <= size[0] and y2 - y1 <= size[1]:
+                break
+            zoom -= 1
+        x1, y1 = _world_px(north, west, zoom)
+        x2, y2 = _world_px(south, east, zoom)
+        image, left, top = self._compose(((x1 + x2) / 2, (y1 + y2) / 2), zoom, size)
+        draw = ImageDraw.Draw(image)
+        for lat, lon in points:
+            x, y = _world_px(lat, lon, zoom)
+            self._draw_marker(draw, x - left, y - top)
+        return self._png(image)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> TileMapRenderer:
+    """Рендерер карт, один на процес (спільні кеш тайлів і сесія)."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = TileMapRenderer()
+        return _renderer
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DOCX
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _set_table_width_pct(table, pct: int = 100):
+    tbl_pr = table._tbl.tblPr
+    tbl_w = tbl_pr.find(qn("w:tblW"))
+    if tbl_w is None:
+        tbl_w = OxmlElement("w:tblW")
+        tbl_pr.append(tbl_w)
+    tbl_w.set(qn("w:type"), "pct")
+    tbl_w.set(qn("w:w"), str(pct * 50))
+
+
+def _fill_text(cell, text, width):
+    cell.width = Twips(width)
+    cell.paragraphs[0].text = str(text if text is not None else "")
+
+
+def _fill_image(cell, data: bytes, width, size_px=CELL_IMAGE_PX):
+    cell.width = Twips(width)
+    run = cell.paragraphs[0].add_run()
+    run.add_picture(io.BytesIO(data), width=Emu(size_px[0] * EMU_PER_PX), height=Emu(size_px[1] * EMU_PER_PX))
+
+
+def _photo_preview(data: bytes) -> bytes:
+    """Зменшує велике фото (у DOCX воно все одно показується 180x120 px)."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.width <= PHOTO_MAX_SIZE[0] and image.height <= PHOTO_MAX_SIZE[1]:
+            return data
+        image.thumbnail(PHOTO_MAX_SIZE)
+        buf = io.BytesIO()
+        image.convert("RGB").save(buf, format="JPEG", quality=85)
+        return buf.getvalue()
+    except Exception:
+        return data
+
+
+def report_file_name(archive_name: str) -> str:
+    """report_<архів>_<час UTC>.docx, як у браузерній версії."""
+    base = re.sub(r"\.(zip|rar)$", "", os.path.basename(archive_name), flags=re.IGNORECASE)
+    safe = re.sub(r"[^\w\-.]", "_", base, flags=re.ASCII)
+    now = datetime.now(timezone.utc)
+    ts = now.strftime("%Y-%m-%dT%H-%M-%S-") + f"{now.microsecond // 1000:03d}Z"
+    return f"report_{safe}_{ts}.docx"
+
+
+def build_report(source, name: str = None, render_maps: bool = True, log=None):
+    """
+    Будує DOCX-звіт з архіву БМ.
+
+    Args:
+        source: Шлях або file-like об'єкт архіву
+        name: Ім'я архіву (за замовчуванням - з source)
+        render_maps: Будувати карти з тайлів (False - лише текст і фото)
+        log: Необов'язковий callback(str) для журналу обробки
+
+    Returns:
+        tuple: (ім'я DOCX, байти DOCX, статистика dict)
+    """
+    log = log or (lambda msg: None)
+    started = time.perf_counter()
+    stats = {"records": 0, "photos": 0, "maps": 0, "map_errors": 0}
+    renderer = get_renderer() if render_maps else None
+
+    log("Читаю архів…")
+    with ArchiveReader(source, name) as reader:
+        archive_name = os.path.basename(reader.name)
+        table_name, df = load_table(reader)
+        log("Знайдено таблицю: " + table_name)
+        if df.empty:
+            raise ValueError("Таблиця порожня.")
+        log("Опрацьовано таблицю: " + table_name)
+
+        cols = list(df.columns)
+        col_time = find_column(cols, CANDS["time"])
+        col_lat = find_column(cols, CANDS["lat"])
+        col_lon = find_column(cols, CANDS["lon"])
+        col_loc = find_column(cols, CANDS["loc"])
+        col_photo = find_column(cols, CANDS["photo"])
+        if not col_time:
+            raise ValueError(
+                "Не вдалося визначити обов'язкову колонку часу. Знайдено: "
+                f"{dict(col_time=col_time, col_lat=col_lat, col_lon=col_lon, col_loc=col_loc, col_photo=col_photo)}"
+            )
+
+        doc = Document()
+        doc.core_properties.author = "LocalTool"
+        doc.add_paragraph(f"Звіт з архіву: {archive_name}", style="Title")
+        doc.add_paragraph(f"Джерело: {archive_name}")
+        doc.add_paragraph(f"Всього записів: {len(df)}")
+
+        table = doc.add_table(rows=1, cols=4)
+        table.style = "Table Grid"
+        _set_table_width_pct(table)
+        widths = (COL_WIDTH_TIME, COL_WIDTH_LOC, COL_WIDTH_PHOTO, COL_WIDTH_MAP)
+        for cell, text, width in zip(table.rows[0].cells, ("Час", "Локація/Адреса", "Фото (попередній перегляд)", "Карта"), widths):
+            _fill_text(cell, text, width)
+
+        def _point_map(point):
+            if point is None or renderer is None:
+                return None, None
+            try:
+                return renderer.render_point_map(*point), None
+            except Exception as e:
+                return None, e
+
+        points = []
+        rows = df.to_dict("records")
+        with ThreadPoolExecutor(max_workers=MAP_WORKERS) as executor:
+            # Порціями: карти порції будуються паралельно, фото читаються по одному
+            for chunk_start in range(0, len(rows), ROW_CHUNK_SIZE):
+                chunk = rows[chunk_start:chunk_start + ROW_CHUNK_SIZE]
+                chunk_points = []
+                for r in chunk:
+                    lat = parse_coordinate(r.get(col_lat)) if col_lat else None
+                    lon = parse_coordinate(r.get(col_lon)) if col_lon else None
+                    chunk_points.append((lat, lon) if lat is not None and lon is not None else None)
+                maps = list(executor.map(_point_map, chunk_points))
+
+                for offset, (r, point, (map_png, map_error)) in enumerate(zip(chunk, chunk_points, maps)):
+                    row_no = chunk_start + offset + 1
+                    if point is not None:
+                        points.append(point)
+                    if map_error is not None:
+                        stats["map_errors"] += 1
+                        log(f"Карту для рядка {row_no} не побудовано: {map_error}")
+
+                    cells = table.add_row().cells
+                    _fill_text(cells[0], format_datetime_for_word(r.get(col_time, "")), COL_WIDTH_TIME)
+                    _fill_text(cells[1], r.get(col_loc, "") if col_loc else "", COL_WIDTH_LOC)
+
+                    photo_entry = reader.resolve_photo(r.get(col_photo)) if col_photo else None
+                    if photo_entry:
+                        try:
+                            _fill_image(cells[2], _photo_preview(reader.read(photo_entry)), COL_WIDTH_PHOTO)
+                            stats["photos"] += 1
+                        except Exception:
+                            _fill_text(cells[2], "", COL_WIDTH_PHOTO)
+                    else:
+                        _fill_text(cells[2], "", COL_WIDTH_PHOTO)
+
+                    if map_png:
+                        _fill_image(cells[3], map_png, COL_WIDTH_MAP)
+                        stats["maps"] += 1
+                    else:
+                        _fill_text(cells[3], "Немає координат", COL_WIDTH_MAP)
+                    stats["records"] += 1
+
+    if renderer is not None and points:
+        try:
+            overview = renderer.render_overview(points)
+        except Exception as e:
+            overview = None
+            log(f"Оглядову карту не побудовано: {e}")
+        if overview:
+            doc.add_paragraph("Карта з точками", style="Heading 2")
+            doc.add_paragraph().add_run().add_picture(
+                io.BytesIO(overview),
+                width=Emu(OVERVIEW_IMAGE_PX[0] * EMU_PER_PX),
+                height=Emu(OVERVIEW_IMAGE_PX[1] * EMU_PER_PX),
+            )
+
+    log("Генерую DOCX…")
+    buf = io.BytesIO()
+    doc.save(buf)
+    stats["duration"] = time.perf_counter() - started
+    log("Готово: згенеровано DOCX.")
+    return report_file_name(archive_name), buf.getvalue(), stats
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Пакетний режим
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _build_report_file(name: str, data: bytes, render_maps: bool):
+    """Робоча функція пулу: (ім'я DOCX, байти, статистика, помилка)."""
+    try:
+        file_name, docx_bytes, stats = build_report(io.BytesIO(data), name, render_maps)
+        return file_name, docx_bytes, stats, None
+    except Exception as e:
+        return None, None, {}, f"Помилка обробки архіву: {e}"
+
+
+def build_reports_batch(files, max_workers: int = None, render_maps: bool = True, on_progress=None):
+    """
+    Будує DOCX для багатьох архівів у пулі процесів.
+
+    Args:
+        files: Список UploadedFile/file-like або пар (ім'я, байти)
+        max_workers: Максимум одночасних задач у спільному пулі (за замовчуванням - усі воркери)
+        render_maps: Будувати карти з тайлів
+        on_progress: Необов'язковий callback(done, total, report)
+
+    Returns:
+        list: звіти у порядку завантаження - словники з ключами
+            'name', 'file_name', 'docx', 'stats', 'error'
+    """
+    reports = []
+    pending = {}
+    for idx, f in enumerate(files):
+        if isinstance(f, tuple):
+            name, data = f
+        else:
+            name = getattr(f, "name", f"archive_{idx + 1}.zip")
+            data = f.getvalue() if hasattr(f, "getvalue") else f.read()
+        reports.append({"name": name, "file_name": None, "docx": None, "stats": {}, "error": None})
+        pending[idx] = (name, data, render_maps)
+
+    done = 0
+
+    def _finish(idx, outcome):
+        nonlocal done
+        report = reports[idx]
+        report["file_name"], report["docx"], report["stats"], report["error"] = outcome
+        done += 1
+        if on_progress:
+            on_progress(done, len(reports), report)
+
+    workers = min(len(pending), max_workers or POOL_WORKERS)
+    if workers > 1:
+        try:
+            # Спільний теплий пул процесу порталу (shared_resources)
+            for idx, outcome in pool_map(_build_report_file, pending, max_workers=workers):
+                _finish(idx, outcome)
+                del pending[idx]
+        except Exception:
+            # Пул недоступний (обмеження середовища) - добираємо послідовно
+            pass
+
+    for idx, args in list(pending.items()):
+        _finish(idx, _build_report_file(*args))
+
+    return reports
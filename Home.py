@@ -1,6 +1,8 @@
 import streamlit as st
 import json
 import os
+from static_assets import font_css
+from shared_resources import format_resource_stats, start_warmup
 
 try:
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,11 +17,16 @@ st.set_page_config(
     layout="wide"
 )
 
+# Шрифти - з локального набору static/vendor (або Google Fonts, якщо його немає)
+st.markdown(f"<style>{font_css('fonts-home')}</style>", unsafe_allow_html=True)
+
+# Бібліотеки, типові зображення та пул процесів прогріваються у фоні - перший
+# перехід на сторінку не чекає на їх завантаження
+start_warmup()
+
 st.markdown(
     """
     <style>
-    @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600&family=Inter:wght@400;500;600;700&display=swap');
-    
     .stApp {
         background-color: #0d1117;
     }
@@ -332,6 +339,10 @@ def main():
     for idx, app in enumerate(apps):
         with cols[idx % 3]:
             render_app_card(app, idx)
+
+    with st.expander("🩺 Стан спільних ресурсів"):
+        for line in format_resource_stats():
+            st.caption(line)
     
     footer_html = """
     <div class="portal-footer">
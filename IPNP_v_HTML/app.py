@@ -1,18 +1,35 @@
 import streamlit as st
 import pandas as pd
 import folium
-import requests
 import re
 import io
+import os
+import sys
+import time
 import base64
+import zipfile
+import tempfile
 from folium.features import DivIcon
 from branca.element import Element
+from osrm_routing import OSRM_BASE_URL, get_router, format_router_status
+from route_geometry import prepare_route, route_polyline
+
+try:
+    from shared_resources import POOL_WORKERS, pool_map
+except ImportError:
+    # Запуск напряму з підпапки - додаємо корінь репозиторію
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from shared_resources import POOL_WORKERS, pool_map
 
 # --- НАСТРОЙКИ ---
 # st.set_page_config(page_title="Генератор Карт Маршрутов", page_icon="🗺️", layout="wide") # Moved to main/wrapper
-OSRM_URL = "http://router.project-osrm.org/route/v1/driving/{coords}?overview=full&geometries=geojson"
 DEFAULT_CENTER = (46.4825, 30.7233)  # Одесса
 MIN_POINTS_FOR_ROUTE = 2
+# Понад цю кількість рядків точки малюються на canvas з компактного JSON,
+# а таблиця подій - віртуальна (рендеряться лише видимі рядки)
+LARGE_DATASET_THRESHOLD = 3000
+VIRTUAL_ROW_HEIGHT = 30
+COORD_PRECISION = 6
 
 # --- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---
 
@@ -40,37 +57,84 @@ def sanitize_filename(name: str) -> str:
     name = name.replace(' ', '_')
     return name or "map_result"
 
+def read_workbook(file_name: str, data: bytes):
+    """
+    Читає книгу один раз: (ім'я вихідного файлу з B8, таблиця даних з 8-го рядка).
+
+    Результат збігається з попереднім подвійним читанням (B8 окремо, потім
+    skiprows=7): порожні хвостові колонки шапки відкидаються, типи колонок
+    виводяться наново вже без рядків шапки.
+    """
+    ext = file_name.split('.')[-1].lower()
+    engine = 'openpyxl' if ext in ['xlsx', 'xlsm', 'xltx'] else 'xlrd'
+    try:
+        raw = pd.read_excel(io.BytesIO(data), engine=engine, header=None)
+    except Exception:
+        # Fallback без движка
+        raw = pd.read_excel(io.BytesIO(data), header=None)
+
+    out_name = "route_map.html"
+    if raw.shape[0] > 7 and raw.shape[1] > 1:
+        val = str(raw.iat[7, 1])
+        if val and val != 'nan':
+            out_name = sanitize_filename(val) + ".html"
+
+    df = raw.iloc[7:].reset_index(drop=True)
+    filled = df.notna().any().to_numpy().nonzero()[0]
+    df = df.iloc[:, :filled.max() + 1] if len(filled) else df.iloc[:, :0]
+    df.columns = range(df.shape[1])
+    return out_name, df.infer_objects()
+
+DATETIME_FORMATS = ['%d.%m.%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%d.%m.%Y %H:%M', '%Y/%m/%d %H:%M:%S', None]
+DATETIME_SAMPLE_SIZE = 200  # скільки непорожніх значень колонки перевіряється при пошуку формату
+
+def _parse_datetimes(values: pd.Series, fmt):
+    if fmt is not None:
+        return pd.to_datetime(values, format=fmt, errors='coerce')
+    return pd.to_datetime(values, errors='coerce', dayfirst=False)
+
 def detect_datetime_column(df: pd.DataFrame, exclude_indices: set):
+    """
+    Шукає колонку з датою/часом.
+
+    Формати перевіряються на вибірці з DATETIME_SAMPLE_SIZE непорожніх значень
+    кожної колонки (перший формат, що розпізнав понад 90% вибірки, зупиняє
+    перебір); повністю парситься лише колонка-переможець з її форматом.
+    """
     best_col = None
-    best_count = 0
-    best_parsed = None
-    FORMATS_TO_TRY = ['%d.%m.%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%d.%m.%Y %H:%M', '%Y/%m/%d %H:%M:%S', None]
+    best_score = 0.0
+    best_fmt = None
 
     for col in df.columns:
         if not isinstance(col, int) or col in exclude_indices:
             continue
-        parsed = None
-        non_null = 0
-        for fmt in FORMATS_TO_TRY:
-            current_parsed = None
+        sample = df[col].dropna().head(DATETIME_SAMPLE_SIZE)
+        if sample.empty:
+            continue
+        if pd.api.types.is_numeric_dtype(sample):
+            continue
+        col_score = 0.0
+        col_fmt = None
+        for fmt in DATETIME_FORMATS:
             try:
-                if fmt is not None:
-                    current_parsed = pd.to_datetime(df.iloc[:, col], format=fmt, errors='coerce')
-                else:
-                    current_parsed = pd.to_datetime(df.iloc[:, col], errors='coerce', dayfirst=False)
-                current_non_null = current_parsed.notna().sum()
-                if current_non_null > non_null:
-                    non_null = current_non_null
-                    parsed = current_parsed
-                if fmt is not None and non_null > 0.9 * len(df) and len(df) > 0:
-                    break
+                ratio = _parse_datetimes(sample, fmt).notna().mean()
             except Exception:
                 continue
-        if non_null > best_count:
-            best_count = non_null
+            if ratio > col_score:
+                col_score = ratio
+                col_fmt = fmt
+            if fmt is not None and col_score > 0.9:
+                break
+        # Частка у вибірці, зважена на заповненість колонки
+        score = col_score * df[col].notna().mean()
+        if score > best_score:
+            best_score = score
             best_col = col
-            best_parsed = parsed
-    return best_col, best_parsed
+            best_fmt = col_fmt
+
+    if best_col is None:
+        return None, None
+    return best_col, _parse_datetimes(df[best_col], best_fmt)
 
 def clean_coordinate(val):
     if pd.isna(val) or val == "":
@@ -82,18 +146,28 @@ def clean_coordinate(val):
     except ValueError:
         return None
 
+def clean_coordinates(values: pd.Series) -> pd.Series:
+    """Векторний варіант clean_coordinate: кома як роздільник, пробіли, некоректні значення -> NaN."""
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_numeric(values, errors='coerce').astype(float)
+    text = values.astype(str).str.replace(',', '.', regex=False).str.replace(' ', '', regex=False)
+    return pd.to_numeric(text.where(values.notna()), errors='coerce')
+
 # --- ОСНОВНАЯ ЛОГИКА ГЕНЕРАЦИИ ---
 
-def generate_map_html(df: pd.DataFrame, logo_base64: str = None):
+def generate_map_html(df: pd.DataFrame, logo_base64: str = None, large_mode: bool = None, osrm_url: str = None,
+                      encode_routes: bool = False):
     # Проверки структуры
     if df.shape[1] <= 3:
         st.error("Недостаточно колонок: требуются C (index 2) => longitude и D (index 3) => latitude.")
         return None
 
     df = df.copy()
+    if large_mode is None:
+        large_mode = len(df) > LARGE_DATASET_THRESHOLD
     # Координаты (индексы 2 и 3)
-    df['longitude'] = df.iloc[:, 2].apply(clean_coordinate)
-    df['latitude'] = df.iloc[:, 3].apply(clean_coordinate)
+    df['longitude'] = clean_coordinates(df.iloc[:, 2])
+    df['latitude'] = clean_coordinates(df.iloc[:, 3])
     df['is_valid_coord'] = df['longitude'].notna() & df['latitude'].notna()
 
     # Устройство (индекс 5)
@@ -130,80 +204,88 @@ def generate_map_html(df: pd.DataFrame, logo_base64: str = None):
     import json
     markers_for_js = []
 
+    # Точки по днях за один прохід (замість фільтрації таблиці для кожного дня)
+    day_points = {
+        day_str: list(zip(group['longitude'].tolist(), group['latitude'].tolist()))
+        for day_str, group in valid_points.groupby('date_str', sort=False)
+    }
+
+    # Маршрути всіх днів - паралельно і з кешем (None -> прямі лінії)
+    routes = get_router(osrm_url).route_many({
+        day_str: points for day_str, points in day_points.items() if len(points) >= MIN_POINTS_FOR_ROUTE
+    })
+
     # 1. Создаем группы слоев и маршруты
     for idx_date, day_str in enumerate(dates_list):
         fg = folium.FeatureGroup(name=str(day_str), show=(idx_date == 0))
         m.add_child(fg)
         layer_dict[day_str] = fg
 
-        group_valid = df[(df['date_str'] == day_str) & (df['is_valid_coord'])]
-        points = list(zip(group_valid['longitude'], group_valid['latitude']))
+        points = day_points.get(day_str, [])
 
         if len(points) >= MIN_POINTS_FOR_ROUTE:
-            # Намагаємося побудувати маршрут через OSRM
-            try:
-                limit_osrm = 80
-                step = max(1, len(points) // limit_osrm)
-                route_input_points = points[::step]
-                if points[-1] != route_input_points[-1]:
-                    route_input_points.append(points[-1])
-                
-                coords_str = ";".join([f"{lon},{lat}" for lon, lat in route_input_points])
-                url = OSRM_URL.format(coords=coords_str)
-                
-                resp = requests.get(url, timeout=10) # Таймаут
-                if resp.status_code == 200:
-                    data = resp.json()
-                    if "routes" in data and data["routes"]:
-                        geo = data["routes"][0]["geometry"]["coordinates"]
-                        folium.PolyLine([(lat, lon) for lon, lat in geo], color="blue", weight=4, opacity=0.8).add_to(fg)
-                        # Старт/Финиш
-                        folium.Marker([(geo[0][1], geo[0][0])], tooltip="Start", icon=folium.Icon(color="green")).add_to(fg)
-                        folium.Marker([(geo[-1][1], geo[-1][0])], tooltip="End", icon=folium.Icon(color="red")).add_to(fg)
-                    else:
-                        raise Exception("No routes found")
-                else:
-                    raise Exception("OSRM Error")
-            except Exception:
+            geo = routes.get(day_str)
+            # Лінії спрощуються й округлюються перед вбудовуванням у HTML
+            if geo:
+                line = prepare_route(geo)
+                route_polyline(line, encode_routes, color="blue", weight=4, opacity=0.8).add_to(fg)
+            else:
                 # Fallback: прямые линии
-                folium.PolyLine([(lat, lon) for lon, lat in points], color="orange", weight=3, opacity=0.7, dash_array='5').add_to(fg)
-                if points:
-                    folium.Marker([points[0][1], points[0][0]], tooltip="Start", icon=folium.Icon(color="green")).add_to(fg)
-                    folium.Marker([points[-1][1], points[-1][0]], tooltip="End", icon=folium.Icon(color="red")).add_to(fg)
+                line = prepare_route(points)
+                route_polyline(line, encode_routes, color="orange", weight=3, opacity=0.7, dash_array='5').add_to(fg)
+            # Старт/Финиш
+            folium.Marker([line[0][1], line[0][0]], tooltip="Start", icon=folium.Icon(color="green")).add_to(fg)
+            folium.Marker([line[-1][1], line[-1][0]], tooltip="End", icon=folium.Icon(color="red")).add_to(fg)
         elif len(points) == 1:
             folium.Marker([points[0][1], points[0][0]], tooltip="Single Point", icon=folium.Icon(color="blue")).add_to(fg)
 
     folium.LayerControl(collapsed=False).add_to(m)
 
     # 2. Таблица и маркеры
-    table_rows_html = ""
-    global_num = 1
+    # Колонки готуються масивами, рядки таблиці збираються у список
+    table_rows = []
     current_date_header = None
 
-    for _, row in df.iterrows():
-        num = global_num
-        day_str = row['date_str']
+    day_values = df['date_str'].tolist()
+    date_displays = [
+        str(dt) if pd.notna(dt) else str(day)
+        for dt, day in zip(df['datetime'].tolist(), day_values)
+    ]
+    if device_col is not None:
+        device_values = df[device_col].where(df[device_col].notna(), "").astype(str).tolist()
+    else:
+        device_values = [""] * len(df)
+    raw_lons = df.iloc[:, 2].astype(str).str[:10].tolist()
+    raw_lats = df.iloc[:, 3].astype(str).str[:10].tolist()
+
+    rows_iter = zip(day_values, date_displays, device_values, df['is_valid_coord'].tolist(),
+                    df['latitude'].tolist(), df['longitude'].tolist(), raw_lats, raw_lons)
+    # Компактні рядки для режиму великих даних: [0, день] - заголовок дня,
+    # [№, індекс шару, дата, пристрій, lat, lon, сирі координати помилки]
+    compact_rows = []
+    day_index = {day_str: idx for idx, day_str in enumerate(dates_list)}
+    for num, (day_str, date_display, device_val, is_valid, lat, lon, raw_lat, raw_lon) in enumerate(rows_iter, start=1):
+        if large_mode:
+            if day_str != current_date_header:
+                current_date_header = day_str
+                compact_rows.append([0, day_str])
+            if is_valid:
+                compact_rows.append([num, day_index[day_str], date_display, device_val,
+                                     round(lat, COORD_PRECISION), round(lon, COORD_PRECISION), ""])
+            else:
+                compact_rows.append([num, day_index[day_str], date_display, device_val,
+                                     None, None, f"{raw_lat}, {raw_lon}"])
+            continue
 
         if day_str != current_date_header:
             current_date_header = day_str
-            table_rows_html += f"""
+            table_rows.append(f"""
             <tr style="background-color: #f3f4f6; color: #374151; font-weight: bold; border-top: 2px solid #e5e7eb;">
                 <td colspan="3" style="text-align: center; padding: 6px;">{day_str}</td>
             </tr>
-            """
-
-        if pd.notna(row.get('datetime')):
-            date_display = str(row.get('datetime'))
-        else:
-            date_display = str(day_str)
-
-        device_val = ""
-        if device_col is not None:
-            val = row.get(device_col, "")
-            device_val = "" if pd.isna(val) else str(val)
+            """)
 
-        if row['is_valid_coord']:
-            lat, lon = row['latitude'], row['longitude']
+        if is_valid:
             if day_str in layer_dict:
                 icon_html = f'''<div style="display:inline-block; background:#1978c8; color:white; font-weight:bold; 
                             border-radius:14px; padding:4px 8px; box-shadow:0 0 2px rgba(0,0,0,0.6);">{num}</div>'''
@@ -217,16 +299,15 @@ def generate_map_html(df: pd.DataFrame, logo_base64: str = None):
                 
                 markers_for_js.append({'num': num, 'day': str(day_str), 'lat': float(lat), 'lon': float(lon)})
 
-            table_rows_html += f'<tr class="valid-row" data-day="{day_str}" data-num="{num}">' \
-                               f'<td style="width:54px">{num}</td><td>{date_display}</td><td>{device_val}</td></tr>\n'
+            table_rows.append(f'<tr class="valid-row" data-day="{day_str}" data-num="{num}">'
+                              f'<td style="width:54px">{num}</td><td>{date_display}</td><td>{device_val}</td></tr>\n')
         else:
-            raw_lon = str(row.iloc[2])[:10]
-            raw_lat = str(row.iloc[3])[:10]
-            table_rows_html += f'<tr style="color: #d32f2f; background-color: #fef2f2;">' \
-                               f'<td style="width:54px">{num}</td>' \
-                               f'<td>{date_display}<br><small style="opacity:0.7">Err: {raw_lat}, {raw_lon}</small></td>' \
-                               f'<td>{device_val}</td></tr>\n'
-        global_num += 1
+            table_rows.append(f'<tr style="color: #d32f2f; background-color: #fef2f2;">'
+                              f'<td style="width:54px">{num}</td>'
+                              f'<td>{date_display}<br><small style="opacity:0.7">Err: {raw_lat}, {raw_lon}</small></td>'
+                              f'<td>{device_val}</td></tr>\n')
+
+    table_rows_html = "".join(table_rows)
 
     # Логотип
     logo_html = ""
@@ -238,6 +319,12 @@ def generate_map_html(df: pd.DataFrame, logo_base64: str = None):
         </div>
         """
 
+    if large_mode:
+        layer_names = [layer_dict[day_str].get_name() for day_str in dates_list]
+        overlay_html, overlay_script = build_large_overlay(m.get_name(), layer_names, compact_rows)
+        m.get_root().html.add_child(Element(overlay_html + overlay_script + logo_html))
+        return m.get_root().render()
+
     # CSS/JS Overlay
     overlay_html = f"""
     <style>
@@ -391,6 +478,303 @@ def generate_map_html(df: pd.DataFrame, logo_base64: str = None):
     # Повертаємо HTML як рядок
     return m.get_root().render()
 
+LARGE_OVERLAY_HTML = """
+<style>
+  #data-overlay {
+    position: absolute; right: 18px; bottom: 18px; width: 460px;
+    background: rgba(255,255,255,0.96); border-radius: 10px;
+    box-shadow: 0 6px 24px rgba(16,24,40,0.12); border: 1px solid rgba(0,0,0,0.05);
+    font-family: Arial, sans-serif; z-index: 9999;
+  }
+  #data-overlay header {
+    padding:10px 12px; border-bottom:1px solid rgba(0,0,0,0.04); display:flex;
+    justify-content:space-between; align-items:center; cursor: move;
+  }
+  #data-overlay h4 { margin:0; font-size:14px; color:#0f1724; }
+  #overlay-scroll { position: relative; height: 42vh; overflow: auto; margin: 0 12px 12px 12px; }
+  #overlay-rows { position: absolute; left: 0; right: 0; top: 0; }
+  .vrow { display:flex; height:__ROW_H__px; line-height:__ROW_H__px; font-size:13px; white-space:nowrap;
+          border-bottom:1px solid rgba(15,23,36,0.04); box-sizing:border-box; }
+  .vrow span { padding:0 10px; overflow:hidden; text-overflow:ellipsis; }
+  .vrow .num { width:54px; flex:none; }
+  .vrow .date { flex:1; }
+  .vrow .dev { width:140px; flex:none; }
+  .vrow.head { font-weight:bold; margin: 0 12px; }
+  .vrow.day { justify-content:center; background:#f3f4f6; color:#374151; font-weight:bold; border-top:2px solid #e5e7eb; }
+  .vrow.invalid { color:#d32f2f; background:#fef2f2; }
+  .vrow.valid:hover { background: linear-gradient(90deg, rgba(43,139,230,0.03), transparent); cursor:pointer; }
+  .vrow.highlight { background: linear-gradient(90deg, rgba(232,74,74,0.06), transparent); }
+</style>
+
+<div id="data-overlay">
+  <header>
+    <h4>Дані маршруту (__COUNT__ подій)</h4>
+    <button style="background:transparent;border:none;font-weight:700;cursor:pointer;color:#6b7280" onclick="document.getElementById('data-overlay').style.display='none'">✕</button>
+  </header>
+  <div class="vrow head"><span class="num">№</span><span class="date">Дата</span><span class="dev">Пристрій</span></div>
+  <div id="overlay-scroll"><div id="overlay-spacer"></div><div id="overlay-rows"></div></div>
+</div>
+"""
+
+LARGE_OVERLAY_SCRIPT = """
+<script>
+document.addEventListener('DOMContentLoaded', function() {
+  var map = __MAP__;
+  var layers = [__LAYERS__];
+  var rows = __ROWS__;
+  var ROW_H = __ROW_H__;
+  var renderer = L.canvas({padding: 0.5});
+  var byNum = {};
+  var highlighted = null;
+
+  function esc(s) {
+    return String(s).replace(/[&<>"]/g, function(c) {
+      return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c];
+    });
+  }
+
+  // Точки: один canvas на карту замість DOM-маркера на кожну подію
+  rows.forEach(function(r, i) {
+    if (r[0] === 0) return;
+    byNum[r[0]] = i;
+    if (r[4] === null) return;
+    var marker = L.circleMarker([r[4], r[5]], {
+      renderer: renderer, radius: 6, color: '#ffffff', weight: 1, fillColor: '#1978c8', fillOpacity: 0.9
+    });
+    marker.on('click', function() { centerOn(r[0]); });
+    layers[r[1]].addLayer(marker);
+  });
+
+  var scroller = document.getElementById('overlay-scroll');
+  var container = document.getElementById('overlay-rows');
+  document.getElementById('overlay-spacer').style.height = (rows.length * ROW_H) + 'px';
+
+  function renderRow(r) {
+    if (r[0] === 0) return '<div class="vrow day">' + esc(r[1]) + '</div>';
+    var invalid = r[4] === null;
+    var cls = invalid ? 'vrow invalid' : 'vrow valid';
+    if (r[0] === highlighted) cls += ' highlight';
+    var date = esc(r[2]);
+    if (invalid) date += ' <small style="opacity:0.7">Err: ' + esc(r[6]) + '</small>';
+    return '<div class="' + cls + '" data-num="' + r[0] + '"><span class="num">' + r[0] +
+           '</span><span class="date">' + date + '</span><span class="dev">' + esc(r[3]) + '</span></div>';
+  }
+
+  // Віртуальна таблиця: у DOM лише видимі рядки з невеликим запасом
+  function render() {
+    var first = Math.max(0, Math.floor(scroller.scrollTop / ROW_H) - 10);
+    var last = Math.min(rows.length, first + Math.ceil(scroller.clientHeight / ROW_H) + 20);
+    var html = [];
+    for (var i = first; i < last; i++) html.push(renderRow(rows[i]));
+    container.style.transform = 'translateY(' + (first * ROW_H) + 'px)';
+    container.innerHTML = html.join('');
+  }
+
+  var pending = false;
+  scroller.addEventListener('scroll', function() {
+    if (pending) return;
+    pending = true;
+    requestAnimationFrame(function() { pending = false; render(); });
+  });
+
+  function centerOn(num) {
+    var i = byNum[num];
+    if (i === undefined || rows[i][4] === null) return;
+    var r = rows[i];
+    if (!map.hasLayer(layers[r[1]])) map.addLayer(layers[r[1]]);
+    map.setView([r[4], r[5]], 18, {animate: true, duration: 0.5});
+    L.popup({maxWidth: 300}).setLatLng([r[4], r[5]])
+      .setContent('#' + num + '<br>' + esc(r[2]) + '<br>' + esc(r[3])).openOn(map);
+    highlighted = num;
+    scroller.scrollTop = Math.max(0, i * ROW_H - scroller.clientHeight / 2);
+    render();
+  }
+  window.centerOn = centerOn;
+
+  container.addEventListener('click', function(e) {
+    var row = e.target.closest('.vrow.valid');
+    if (row) centerOn(parseInt(row.dataset.num));
+  });
+
+  // Перетягування панелі за заголовок
+  var overlay = document.getElementById('data-overlay');
+  var pos3 = 0, pos4 = 0;
+  overlay.querySelector('header').onmousedown = function(e) {
+    e.preventDefault();
+    pos3 = e.clientX;
+    pos4 = e.clientY;
+    overlay.style.bottom = 'auto';
+    overlay.style.right = 'auto';
+    document.onmousemove = function(e) {
+      e.preventDefault();
+      overlay.style.top = (overlay.offsetTop - (pos4 - e.clientY)) + 'px';
+      overlay.style.left = (overlay.offsetLeft - (pos3 - e.clientX)) + 'px';
+      pos3 = e.clientX;
+      pos4 = e.clientY;
+    };
+    document.onmouseup = function() {
+      document.onmouseup = null;
+      document.onmousemove = null;
+    };
+  };
+
+  render();
+});
+</script>
+"""
+
+def build_large_overlay(map_name: str, layer_names: list, compact_rows: list):
+    """
+    Панель подій для великих файлів: (html, script).
+
+    Дані передаються одним компактним JSON-масивом; точки малюються через
+    L.canvas у шари днів, таблиця рендерить лише видимі рядки.
+    """
+    import json
+    rows_json = json.dumps(compact_rows, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    event_count = sum(1 for row in compact_rows if row[0])
+    html = (LARGE_OVERLAY_HTML
+            .replace('__ROW_H__', str(VIRTUAL_ROW_HEIGHT))
+            .replace('__COUNT__', str(event_count)))
+    script = (LARGE_OVERLAY_SCRIPT
+              .replace('__MAP__', map_name)
+              .replace('__LAYERS__', ', '.join(layer_names))
+              .replace('__ROW_H__', str(VIRTUAL_ROW_HEIGHT))
+              .replace('__ROWS__', rows_json))
+    return html, script
+
+# --- ПАКЕТНА ОБРОБКА ---
+
+WORKBOOK_EXTENSIONS = ('.xls', '.xlsx', '.xlsm')
+
+def iter_workbooks(source: str):
+    """(ім'я, байти) книг Excel з папки (рекурсивно) або ZIP-архіву."""
+    if os.path.isdir(source):
+        for root, _, names in sorted(os.walk(source)):
+            for file_name in sorted(names):
+                if file_name.lower().endswith(WORKBOOK_EXTENSIONS) and not file_name.startswith('~$'):
+                    path = os.path.join(root, file_name)
+                    with open(path, 'rb') as fh:
+                        yield os.path.relpath(path, source), fh.read()
+        return
+    with zipfile.ZipFile(source) as zf:
+        yield from iter_zip_workbooks(zf)
+
+def iter_zip_workbooks(zf: zipfile.ZipFile):
+    for info in zf.infolist():
+        base_name = os.path.basename(info.filename)
+        if info.is_dir() or base_name.startswith('~$') or not base_name.lower().endswith(WORKBOOK_EXTENSIONS):
+            continue
+        yield info.filename, zf.read(info)
+
+def unique_output_name(out_name: str, used: set) -> str:
+    """Додає суфікс _2, _3... якщо кілька книг мають однакове ім'я в B8."""
+    stem, ext = os.path.splitext(out_name)
+    candidate = out_name
+    counter = 2
+    while candidate.lower() in used:
+        candidate = f"{stem}_{counter}{ext}"
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+def _build_map_file(idx: int, file_name: str, data: bytes, out_dir: str, options: dict):
+    """
+    Робоча функція пулу: одна книга -> тимчасовий HTML у out_dir.
+
+    Returns:
+        tuple: (out_name, part_path, rows, read_time, render_time, size, error)
+    """
+    try:
+        started = time.perf_counter()
+        out_name, df = read_workbook(file_name, data)
+        read_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        html_content = generate_map_html(df, **options)
+        render_time = time.perf_counter() - started
+        if not html_content:
+            return out_name, None, len(df), read_time, render_time, 0, "Недостатньо колонок для координат"
+
+        part_path = os.path.join(out_dir, f".part_{idx}.html")
+        encoded = html_content.encode('utf-8')
+        with open(part_path, 'wb') as fh:
+            fh.write(encoded)
+        return out_name, part_path, len(df), read_time, render_time, len(encoded), None
+    except Exception as e:
+        return None, None, 0, 0.0, 0.0, 0, f"Помилка обробки файлу: {e}"
+
+def generate_maps_batch(files, out_dir: str, max_workers: int = None, on_progress=None, **options):
+    """
+    Будує карти для багатьох книг у пулі процесів і записує їх у out_dir.
+
+    Кожна книга читається один раз; файл карти отримує ім'я з B8
+    (sanitize_filename), однакові імена розрізняються суфіксом.
+
+    Args:
+        files: Ітерабельне з пар (ім'я файлу, байти)
+        out_dir: Папка для HTML-карт (створюється за потреби)
+        max_workers: Максимум одночасних задач у спільному пулі (за замовчуванням - усі воркери)
+        on_progress: Необов'язковий callback(done, total, report) - ще до призначення імені файлу
+        **options: Параметри generate_map_html (logo_base64, large_mode, osrm_url, encode_routes)
+
+    Returns:
+        list: звіти по файлах у порядку надходження - словники з ключами
+            'name', 'output', 'rows', 'size', 'read', 'render', 'duration', 'error'
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    pending = {idx: (name, data) for idx, (name, data) in enumerate(files)}
+    reports = [
+        {'name': name, 'output': None, 'rows': 0, 'size': 0, 'read': 0.0, 'render': 0.0,
+         'duration': 0.0, 'error': None}
+        for name, _ in pending.values()
+    ]
+    parts = {}
+    done = 0
+
+    def _finish(idx, outcome):
+        nonlocal done
+        out_name, part_path, rows, read_time, render_time, size, error = outcome
+        reports[idx].update(rows=rows, size=size, read=read_time, render=render_time,
+                            duration=read_time + render_time, error=error)
+        if part_path:
+            parts[idx] = (out_name, part_path)
+        done += 1
+        if on_progress:
+            on_progress(done, len(reports), reports[idx])
+
+    workers = min(len(pending), max_workers or POOL_WORKERS)
+    if workers > 1:
+        try:
+            # Спільний теплий пул процесу порталу (shared_resources)
+            tasks = {idx: (idx, name, data, out_dir, options) for idx, (name, data) in pending.items()}
+            for idx, outcome in pool_map(_build_map_file, tasks, max_workers=workers):
+                _finish(idx, outcome)
+                del pending[idx]
+        except Exception:
+            # Пул недоступний (обмеження середовища) - добираємо послідовно
+            pass
+
+    for idx, (name, data) in list(pending.items()):
+        _finish(idx, _build_map_file(idx, name, data, out_dir, options))
+
+    # Імена призначаються в порядку надходження, щоб суфікси не залежали від пулу
+    used_names = set()
+    for idx in sorted(parts):
+        out_name, part_path = parts[idx]
+        output = unique_output_name(out_name, used_names)
+        os.replace(part_path, os.path.join(out_dir, output))
+        reports[idx]['output'] = output
+
+    return reports
+
+def format_batch_report(report: dict) -> str:
+    """Рядок звіту по файлу: результат і час етапів."""
+    if report['error']:
+        return f"❌ {report['name']}: {report['error']}"
+    return (f"✅ {report['name']} -> {report['output']}: {report['rows']} рядків, "
+            f"читання {report['read']:.2f} с, карта {report['render']:.2f} с, {report['size'] / 1024:.0f} КБ")
+
 # --- ИНТЕРФЕЙС ---
 
 def main():
@@ -405,38 +789,38 @@ def main():
     with col2:
         uploaded_logo = st.file_uploader("Логотип (необов'язково)", type=['png', 'jpg', 'jpeg'])
 
+    display_mode = st.radio(
+        "Відображення точок",
+        ["Авто", "Звичайне", "Великі дані (canvas)"],
+        horizontal=True,
+        help=f"«Авто» вмикає режим великих даних для файлів понад {LARGE_DATASET_THRESHOLD} рядків.",
+    )
+    large_mode = {"Авто": None, "Звичайне": False, "Великі дані (canvas)": True}[display_mode]
+
+    with st.expander("⚙️ Маршрутизація (OSRM)"):
+        osrm_url = st.text_input(
+            "Адреса сервера OSRM",
+            value=OSRM_BASE_URL,
+            help="Наприклад, локальний сервер http://127.0.0.1:5000. За замовчуванням - змінна IPNP_OSRM_URL.",
+        )
+        st.caption(format_router_status(get_router(osrm_url)))
+        encode_routes = st.checkbox(
+            "Стиснути лінії маршрутів (Encoded Polyline)",
+            help="Менший HTML; лінії декодуються у браузері під час відкриття карти.",
+        )
+
     if uploaded_file is not None:
         if st.button("🚀 Побудувати карту", type="primary"):
             with st.spinner('Читання файлу і побудова маршрутів...'):
                 try:
-                    # Визначаємо движок
-                    ext = uploaded_file.name.split('.')[-1].lower()
-                    engine = 'openpyxl' if ext in ['xlsx', 'xlsm', 'xltx'] else 'xlrd'
-                    
-                    # Читаємо ім'я файлу з B8 (для імені вихідного файлу)
-                    out_name = "route_map.html"
-                    try:
-                        df_name = pd.read_excel(uploaded_file, engine=engine, usecols="B", header=None, skiprows=7, nrows=1)
-                        val = str(df_name.iloc[0, 0])
-                        if val and val != 'nan':
-                            out_name = sanitize_filename(val) + ".html"
-                    except:
-                        pass
-
-                    # Перемотуємо файл на початок і читаємо дані
-                    uploaded_file.seek(0)
-                    try:
-                        df = pd.read_excel(uploaded_file, engine=engine, header=None, skiprows=7)
-                    except Exception:
-                        # Fallback без движка
-                        uploaded_file.seek(0)
-                        df = pd.read_excel(uploaded_file, header=None, skiprows=7)
+                    # Ім'я з B8 і дані - за одне читання книги
+                    out_name, df = read_workbook(uploaded_file.name, uploaded_file.getvalue())
 
                     # Логотип
                     logo_b64 = image_to_base64(uploaded_logo) if uploaded_logo else None
 
                     # Генерация
-                    html_content = generate_map_html(df, logo_b64)
+                    html_content = generate_map_html(df, logo_b64, large_mode, osrm_url, encode_routes)
 
                     if html_content:
                         st.success("Карта успішно створена!")
@@ -457,6 +841,50 @@ def main():
                     st.error(f"Помилка при обробці: {e}")
                     st.exception(e)
 
+    with st.expander("📦 Пакетна обробка (кілька файлів або ZIP)"):
+        batch_files = st.file_uploader(
+            "Книги Excel або ZIP-архіви з ними",
+            type=['xls', 'xlsx', 'xlsm', 'zip'],
+            accept_multiple_files=True,
+            key="ipnp_batch_files",
+        )
+        if batch_files and st.button("🗂️ Побудувати всі карти"):
+            workbooks = []
+            for f in batch_files:
+                if f.name.lower().endswith('.zip'):
+                    with zipfile.ZipFile(io.BytesIO(f.getvalue())) as zf:
+                        workbooks.extend((f"{f.name}/{name}", data) for name, data in iter_zip_workbooks(zf))
+                else:
+                    workbooks.append((f.name, f.getvalue()))
+
+            logo_b64 = image_to_base64(uploaded_logo) if uploaded_logo else None
+            progress = st.progress(0.0, text="Побудова карт...")
+            with tempfile.TemporaryDirectory() as out_dir:
+                started = time.perf_counter()
+                reports = generate_maps_batch(
+                    workbooks, out_dir,
+                    on_progress=lambda done, total, _: progress.progress(done / total, text=f"Карт: {done}/{total}"),
+                    logo_base64=logo_b64, large_mode=large_mode, osrm_url=osrm_url, encode_routes=encode_routes,
+                )
+                elapsed = time.perf_counter() - started
+
+                archive = io.BytesIO()
+                with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    for report in reports:
+                        if report['output']:
+                            zf.write(os.path.join(out_dir, report['output']), report['output'])
+
+            ok = sum(1 for r in reports if r['output'])
+            st.success(f"Побудовано карт: {ok} з {len(reports)} за {elapsed:.1f} с")
+            st.dataframe(pd.DataFrame(reports), use_container_width=True)
+            if ok:
+                st.download_button(
+                    label="💾 Завантажити карти (ZIP)",
+                    data=archive.getvalue(),
+                    file_name="route_maps.zip",
+                    mime="application/zip",
+                )
+
 if __name__ == "__main__":
     st.set_page_config(page_title="Генератор Карт Маршрутов", page_icon="🗺️", layout="wide")
     main()
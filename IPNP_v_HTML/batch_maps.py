@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Пакетна побудова карт маршрутів без інтерфейсу.
+
+Бере папку або ZIP-архів з книгами Excel, будує карти у паралельних процесах
+і записує HTML з іменами з клітинки B8. Для кожного файлу друкує час читання
+та побудови карти.
+
+Запуск з кореня репозиторію:
+    python IPNP_v_HTML/batch_maps.py telemetry.zip -o maps/ --workers 4
+"""
+
+import argparse
+import base64
+import mimetypes
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import format_batch_report, generate_maps_batch, iter_workbooks
+
+
+def logo_to_base64(path):
+    mime_type = mimetypes.guess_type(path)[0] or "image/png"
+    with open(path, "rb") as fh:
+        return f"data:{mime_type};base64,{base64.b64encode(fh.read()).decode('utf-8')}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетна побудова HTML-карт маршрутів з книг Excel")
+    parser.add_argument("source", help="папка або ZIP-архів з .xls/.xlsx/.xlsm")
+    parser.add_argument("-o", "--output", help="папка для карт (за замовчуванням <source>_maps)")
+    parser.add_argument("--workers", type=int, default=None, help="кількість процесів")
+    parser.add_argument("--logo", help="зображення логотипу для карт")
+    parser.add_argument("--osrm-url", help="адреса сервера OSRM (за замовчуванням IPNP_OSRM_URL)")
+    parser.add_argument("--large", choices=["auto", "on", "off"], default="auto",
+                        help="режим великих даних (canvas і віртуальна таблиця)")
+    parser.add_argument("--encode-routes", action="store_true", help="кодувати лінії маршрутів (Encoded Polyline)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(os.path.abspath(args.source).rstrip(os.sep))[0] + "_maps"
+    options = {
+        "logo_base64": logo_to_base64(args.logo) if args.logo else None,
+        "large_mode": {"auto": None, "on": True, "off": False}[args.large],
+        "osrm_url": args.osrm_url,
+        "encode_routes": args.encode_routes,
+    }
+
+    started = time.perf_counter()
+    reports = generate_maps_batch(
+        iter_workbooks(args.source), output, max_workers=args.workers,
+        on_progress=lambda done, total, report: print(f"[{done}/{total}] {report['name']}", flush=True),
+        **options,
+    )
+    elapsed = time.perf_counter() - started
+
+    for report in reports:
+        print(format_batch_report(report))
+    failed = [r for r in reports if r["error"]]
+    print(f"Карт: {len(reports) - len(failed)} з {len(reports)} за {elapsed:.2f} с -> {output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Маршрутизація днів через OSRM: паралельні запити, кеш геометрії, швидкий відступ.
+
+Маршрути всіх днів запитуються одночасно (пул потоків), геометрія кешується у
+SQLite (.cache/osrm_routes.sqlite3 у корені репозиторію) за хешем списку
+координат і адреси сервера, тож повторна побудова того ж файлу не робить
+жодного запиту. Недавно використані геометрії тримаються і в пам'яті процесу
+(LRU з лімітом точок IPNP_ROUTE_MEMORY_POINTS). Адресу сервера можна змінити змінною IPNP_OSRM_URL (наприклад,
+локальний OSRM http://127.0.0.1:5000). Якщо сервер не відповів, його
+позначено недоступним на OSRM_DOWN_COOLDOWN секунд - решта днів одразу
+отримують None (прямі лінії) без очікування таймаутів.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OSRM_BASE_URL = os.environ.get("IPNP_OSRM_URL", "http://router.project-osrm.org")
+OSRM_ROUTE_PATH = "/route/v1/driving/{coords}?overview=full&geometries=geojson"
+OSRM_TIMEOUT = float(os.environ.get("IPNP_OSRM_TIMEOUT", 10))
+OSRM_MAX_WORKERS = int(os.environ.get("IPNP_OSRM_WORKERS", 6))
+# Скільки секунд не звертатися до сервера після збою з'єднання
+OSRM_DOWN_COOLDOWN = 300
+# Максимум точок у запиті (публічний сервер обмежує довжину URL)
+OSRM_POINT_LIMIT = 80
+# Ліміт точок геометрій у пам'яті процесу (понад нього - лише SQLite)
+ROUTE_MEMORY_POINTS = int(os.environ.get("IPNP_ROUTE_MEMORY_POINTS", 200_000))
+ROUTE_CACHE_PATH = os.environ.get("IPNP_ROUTE_CACHE_PATH", os.path.join(ROOT_DIR, ".cache", "osrm_routes.sqlite3"))
+
+
+def sample_route_points(points: list, limit: int = OSRM_POINT_LIMIT) -> list:
+    """Проріджує точки дня до limit з обов'язковою останньою точкою."""
+    step = max(1, len(points) // limit)
+    sampled = points[::step]
+    if points and points[-1] != sampled[-1]:
+        sampled.append(points[-1])
+    return sampled
+
+
+def route_key(base_url: str, points: list) -> str:
+    """Хеш адреси сервера та списку координат (lon, lat)."""
+    coords = ";".join(f"{lon:.6f},{lat:.6f}" for lon, lat in points)
+    return hashlib.sha1(f"{base_url}|{coords}".encode("utf-8")).hexdigest()
+
+
+class RouteCache:
+    """Постійний кеш геометрій маршрутів; порожній список - OSRM не знайшов маршрут."""
+
+    def __init__(self, path: str = ROUTE_CACHE_PATH, memory_points: int = ROUTE_MEMORY_POINTS):
+        self.path = path
+        self.memory_points = memory_points
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> геометрія, від найдавніше використаної
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS routes ("
+                "key TEXT PRIMARY KEY, geometry TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, geometry: list) -> None:
+        """Додає геометрію в LRU пам'яті (викликається під self._lock)."""
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        if len(geometry) > self.memory_points:
+            return
+        self._memory[key] = geometry
+        self._memory_size += len(geometry)
+        while self._memory_size > self.memory_points:
+            _, dropped = self._memory.popitem(last=False)
+            self._memory_size -= len(dropped)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self.hits += 1
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            with self._connect() as conn:
+                row = conn.execute("SELECT geometry FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            geometry = json.loads(row[0])
+            self._remember(key, geometry)
+            return geometry
+
+    def put(self, key: str, geometry: list) -> None:
+        with self._lock:
+            self._remember(key, geometry)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO routes (key, geometry, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(geometry), time.time()),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            with self._connect() as conn:
+                conn.execute("DELETE FROM routes")
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "memory_points": self._memory_size,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+
+class OsrmRouter:
+    """Клієнт OSRM з кешем, пулом з'єднань і позначкою недоступності сервера."""
+
+    def __init__(self, base_url: str = OSRM_BASE_URL, cache: RouteCache = None,
+                 timeout: float = OSRM_TIMEOUT, max_workers: int = OSRM_MAX_WORKERS):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache or get_route_cache()
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.requests_made = 0
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def is_down(self) -> bool:
+        return time.monotonic() < self._down_until
+
+    def mark_down(self) -> None:
+        with self._lock:
+            self._down_until = time.monotonic() + OSRM_DOWN_COOLDOWN
+
+    def route(self, points: list):
+        """
+        Геометрія маршруту [(lon, lat), ...] через точки дня або None.
+
+        None означає, що маршрут не отримано (сервер недоступний, помилка чи
+        OSRM не знайшов маршрут) і треба малювати прямі лінії.
+        """
+        sampled = sample_route_points(points)
+        key = route_key(self.base_url, sampled)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached or None
+        if self.is_down:
+            return None
+
+        coords = ";".join(f"{lon},{lat}" for lon, lat in sampled)
+        url = self.base_url + OSRM_ROUTE_PATH.format(coords=coords)
+        try:
+            with self._lock:
+                self.requests_made += 1
+            resp = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException:
+            self.mark_down()
+            return None
+
+        if resp.status_code == 429 or resp.status_code >= 500:
+            self.mark_down()
+            return None
+        try:
+            data = resp.json()
+        except ValueError:
+            return None
+        routes = data.get("routes") if isinstance(data, dict) else None
+        if resp.status_code == 200 and routes:
+            geometry = [tuple(c) for c in routes[0]["geometry"]["coordinates"]]
+            self.cache.put(key, geometry)
+            return geometry
+        if isinstance(data, dict) and data.get("code") in ("NoRoute", "NoSegment"):
+            # Відповідь сервера стабільна - кешуємо відсутність маршруту
+            self.cache.put(key, [])
+        return None
+
+    def route_many(self, day_points: dict) -> dict:
+        """Маршрути для всіх днів одночасно: {день: геометрія або None}."""
+        if not day_points:
+            return {}
+        workers = max(1, min(self.max_workers, len(day_points)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {day: executor.submit(self.route, points) for day, points in day_points.items()}
+            return {day: future.result() for day, future in futures.items()}
+
+
+_route_cache = None
+_routers = {}
+_init_lock = threading.Lock()
+
+
+def get_route_cache() -> RouteCache:
+    """Кеш маршрутів, один на процес."""
+    global _route_cache
+    with _init_lock:
+        if _route_cache is None:
+            _route_cache = RouteCache()
+        return _route_cache
+
+
+def get_router(base_url: str = None) -> OsrmRouter:
+    """Маршрутизатор для адреси сервера, один на процес (зберігає стан недоступності)."""
+    base_url = (base_url or OSRM_BASE_URL).rstrip("/")
+    cache = get_route_cache()
+    with _init_lock:
+        if base_url not in _routers:
+            _routers[base_url] = OsrmRouter(base_url, cache=cache)
+        return _routers[base_url]
+
+
+def format_router_status(router: OsrmRouter) -> str:
+    """Короткий рядок стану маршрутизації для інтерфейсу."""
+    stats = router.cache.stats()
+    state = "недоступний, прямі лінії" if router.is_down else "доступний"
+    return (
+        f"OSRM {router.base_url}: {state}; запитів {router.requests_made}, "
+        f"кеш маршрутів: записів {stats['entries']}, влучань {stats['hits']}, "
+        f"{stats['size_bytes'] / 1024:.0f} КБ"
+    )
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Постобробка геометрії маршрутів перед вбудовуванням у HTML карти.
+
+- спрощення Дугласа-Пекера з допуском, прив'язаним до масштабу карти
+  (відхилення не більше ROUTE_PIXEL_TOLERANCE пікселя на ROUTE_DETAIL_ZOOM);
+- округлення координат до ROUTE_COORD_PRECISION знаків (5 знаків ~ 1 м);
+- за бажанням - кодування Google Encoded Polyline (EncodedPolyLine),
+  яке декодується у браузері.
+
+Крайні точки лінії завжди зберігаються, тож маркери старту/фінішу не
+зміщуються.
+"""
+
+import json
+import math
+
+import folium
+import numpy as np
+from branca.element import Element
+from jinja2 import Template
+
+# Масштаб, на якому спрощена лінія має бути візуально точною (17 - рівень будинків)
+ROUTE_DETAIL_ZOOM = 17
+ROUTE_PIXEL_TOLERANCE = 1.0
+ROUTE_COORD_PRECISION = 5
+
+
+def zoom_tolerance(zoom: int = ROUTE_DETAIL_ZOOM, pixels: float = ROUTE_PIXEL_TOLERANCE) -> float:
+    """Допуск у градусах довготи, що відповідає pixels пікселям на масштабі zoom."""
+    return pixels * 360.0 / (256 * 2 ** zoom)
+
+
+def simplify_polyline(points: list, tolerance: float) -> list:
+    """
+    Douglas-Peucker для точок (lon, lat); tolerance - у градусах довготи.
+
+    Довгота масштабується на cos(широти), щоб відстані були ізотропними.
+    Ітеративний варіант (без рекурсії) з векторними відстанями NumPy.
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+    coords = np.asarray(points, dtype=float)
+    xy = coords.copy()
+    xy[:, 0] *= math.cos(math.radians(float(np.mean(coords[:, 1]))))
+    tolerance = tolerance * math.cos(math.radians(float(np.mean(coords[:, 1]))))
+
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = xy[start + 1:end]
+        a, b = xy[start], xy[end]
+        dx, dy = b - a
+        norm = math.hypot(dx, dy)
+        if norm == 0:
+            dist = np.hypot(segment[:, 0] - a[0], segment[:, 1] - a[1])
+        else:
+            dist = np.abs(dx * (segment[:, 1] - a[1]) - dy * (segment[:, 0] - a[0])) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return [tuple(p) for p in coords[keep].tolist()]
+
+
+def round_points(points: list, precision: int = ROUTE_COORD_PRECISION) -> list:
+    """Округлює координати та прибирає послідовні дублікати, що з'явились після округлення."""
+    rounded = []
+    for lon, lat in points:
+        point = (round(lon, precision), round(lat, precision))
+        if not rounded or rounded[-1] != point:
+            rounded.append(point)
+    return rounded
+
+
+def prepare_route(points: list, zoom: int = ROUTE_DETAIL_ZOOM,
+                  precision: int = ROUTE_COORD_PRECISION) -> list:
+    """Спрощення + округлення лінії (lon, lat); крайні точки зберігаються."""
+    simplified = round_points(simplify_polyline(points, zoom_tolerance(zoom)), precision)
+    if len(points) >= 2 and len(simplified) < 2:
+        # Уся лінія злилась в одну точку - лишаємо старт і фініш
+        simplified = simplified * 2
+    return simplified
+
+
+def encode_polyline(latlngs: list, precision: int = ROUTE_COORD_PRECISION) -> str:
+    """Google Encoded Polyline для точок (lat, lon)."""
+    factor = 10 ** precision
+    chunks = []
+    prev_lat = prev_lng = 0
+    for lat, lng in latlngs:
+        lat_i = int(round(lat * factor))
+        lng_i = int(round(lng * factor))
+        for value in (lat_i - prev_lat, lng_i - prev_lng):
+            value = ~(value << 1) if value < 0 else value << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(chunks)
+
+
+POLYLINE_DECODER_JS = """
+<script>
+function decodePolyline(str, precision) {
+  var index = 0, lat = 0, lng = 0, coords = [], factor = Math.pow(10, precision);
+  while (index < str.length) {
+    var shift = 0, result = 0, b;
+    do { b = str.charCodeAt(index++) - 63; result |= (b & 0x1f) << shift; shift += 5; } while (b >= 0x20);
+    lat += (result & 1) ? ~(result >> 1) : (result >> 1);
+    shift = 0; result = 0;
+    do { b = str.charCodeAt(index++) - 63; result |= (b & 0x1f) << shift; shift += 5; } while (b >= 0x20);
+    lng += (result & 1) ? ~(result >> 1) : (result >> 1);
+    coords.push([lat / factor, lng / factor]);
+  }
+  return coords;
+}
+</script>
+"""
+
+
+class EncodedPolyLine(folium.PolyLine):
+    """PolyLine, координати якої вбудовуються рядком Encoded Polyline."""
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.polyline(
+                decodePolyline({{ this.encoded_js }}, {{ this.precision }}),
+                {{ this.options|tojson }}
+            ).addTo({{this._parent.get_name()}});
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, locations, precision: int = ROUTE_COORD_PRECISION, **kwargs):
+        super().__init__(locations, **kwargs)
+        self.precision = precision
+        self.encoded = encode_polyline(locations, precision)
+        # branca повторно розбирає згенерований скрипт як шаблон Jinja, тому
+        # фігурні дужки у рядку (можливі в кодуванні) екрануються для JS
+        self.encoded_js = json.dumps(self.encoded).replace("{", "\\u007b").replace("}", "\\u007d")
+
+    def render(self, **kwargs):
+        # Декодер додається у заголовок сторінки один раз (за іменем)
+        self.get_root().header.add_child(Element(POLYLINE_DECODER_JS), name="polyline_decoder")
+        super().render(**kwargs)
+
+
+def route_polyline(points: list, encode: bool = False, **kwargs):
+    """Лінія folium з точок (lon, lat) - звичайна або закодована."""
+    latlngs = [(lat, lon) for lon, lat in points]
+    if encode:
+        return EncodedPolyLine(latlngs, **kwargs)
+    return folium.PolyLine(latlngs, **kwargs)
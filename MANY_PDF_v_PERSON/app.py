@@ -1,188 +1,48 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import os
 import io
 import base64
+import tempfile
 import time
-import re
+import uuid
 from io import BytesIO
 from pdf_processor import process_pdfs_to_paragraphs
 from document_generator import generate_docx, generate_empty_dossier, EMPTY_DOSSIER_BLOCKS, BLOCK_MAPPING, get_filename_from_intro
 from PIL import Image
 from streamlit_sortables import sort_items
-from streamlit_pdf_viewer import pdf_viewer
+from pdf_preview import describe_pdf, render_pages, page_window, PREVIEW_PAGE_STEP
 from arkan_processor import process_excel_to_data
 import dms_processor
 from dms_processor import extract_dms_data
-from real_estate_processor import parse_real_estate_pdf
+from real_estate_processor import parse_real_estate_batch
 from car_processor import append_car_to_doc
-from pension_processor import process_pension_data
+from pension_processor import process_pension_data, process_pension_batch, pension_batch_table, finap_status_line
+# Спільні парсери лежать у корені репозиторію (шлях додає real_estate_processor)
+from vehicle_parser import extract_excel_vehicles, parse_vehicle_text, parse_vehicle_record, parse_vehicle_files, vehicles_table
+from shared_resources import default_image
+from session_store import SessionStore
+from stage_timing import StageRecorder, set_recorder
+from docx_fragments import cache_stats as fragment_cache_stats
 import pandas as pd
 
 
 # --- ФУНКЦІЇ ДЛЯ ОБРОБКИ ДАНИХ ПРО ТЗ ---
 
-def parse_vehicle_data(text):
-    """Парсить текст та витягує дані про ТЗ"""
-    result = {}
-
-    # Шаблони для пошуку
-    patterns = {
-        'номерний_знак': [
-            r'Державний номер[:\s]*([A-ZА-ЯІЇЄҐ0-9]+)',
-            r'Номерний знак[:\s]*([A-ZА-ЯІЇЄҐ0-9]+)',
-            r'НОМЕРНИЙ ЗНАК[:\s]*([A-ZА-ЯІЇЄҐ0-9]+)',
-        ],
-        'власник': [
-            r'Власник[:\s]*([A-ZА-ЯІЇЄҐ\s]+?)(?=\s*\d{2}\.\d{2}\.\d{4}|\s*$)',
-        ],
-        'дата_народження': [
-            r'Дата народження[:\s]*(\d{2}\.\d{2}\.\d{4})',
-            r'Власник[:\s]*[A-ZА-ЯІЇЄҐ\s]+(\d{2}\.\d{2}\.\d{4})',
-        ],
-        'іпн': [
-            r'ІПН[:\s]*(\d+)',
-            r'ІПН/ЄДРПОУ[:\s]*(\d+)',
-        ],
-        'місце_реєстрації': [
-            r'Адреса власника[:\s]*([^\n]+)',
-            r'Адреса реєстрації ТЗ[:\s]*([^\n]+)',
-        ],
-        'марка': [
-            r'Марка/модель ТЗ[:\s]*([A-Z]+)',
-        ],
-        'модель': [
-            r'Марка/модель ТЗ[:\s]*[A-Z]+\s+([A-Z0-9]+(?:\s+[A-Z0-9.]+)?)',
-        ],
-        'vin': [
-            r'vin ТЗ[:\s]*([A-Z0-9]+)',
-            r'VIN[:\s]*([A-Z0-9]+)',
-        ],
-        'колір': [
-            r'Колір ТЗ[:\s]*([A-ZА-ЯІЇЄҐ]+)',
-            r'Колір[:\s]*([A-ZА-ЯІЇЄҐ]+)',
-        ],
-        'рік_випуску': [
-            r'Рік випуску[:\s]*(\d{4})',
-            r'Рік випуску[:\s]*([0-9]{4})',
-            r'Рік[:\s]*випуску[:\s]*(\d{4})',
-            r'(\d{4})\s*рік випуску',
-            r'рік випуску.*?(\d{4})',
-            r'(\d{4})\s*р.',
-            r'(\d{4})\s*року',
-        ],
-    }
-
-    for field, field_patterns in patterns.items():
-        for pattern in field_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result[field] = match.group(1).strip()
-                break
-
-    # Спеціальна обробка для марка/модель з тексту
-    if 'марка' not in result:
-        match = re.search(r'Марка/модель ТЗ[:\s]*([^\n]+)', text, re.IGNORECASE)
-        if match:
-            full = match.group(1).strip()
-            parts = full.split()
-            if len(parts) >= 1:
-                result['марка'] = parts[0]
-            if len(parts) >= 2:
-                result['модель'] = ' '.join(parts[1:])
+def parse_excel_file(df):
+    """Парсить Excel файл специфічного формату, повертає список ТЗ"""
+    return extract_excel_vehicles(df, text_parser=parse_vehicle_record)
 
-    return result
 
-
-def parse_excel_file(df):
-    """Парсить Excel файл специфічного формату"""
-    result = {}
-
-    # Перетворюємо DataFrame у словник для пошуку
-    text = df.to_string()
-
-    # Проходимо по всіх клітинках
-    for idx, row in df.iterrows():
-        for col_idx, cell in enumerate(row):
-            if pd.notna(cell):
-                cell_str = str(cell).strip()
-
-                # Номерний знак
-                if 'НОМЕРНИЙ ЗНАК' in cell_str.upper():
-                    # Значення в наступній колонці
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['номерний_знак'] = str(row.iloc[col_idx + 1]).strip()
-
-                # Власник
-                if 'Власник' in cell_str and ':' in cell_str:
-                    match = re.search(r'Власник[:\s]*([A-ZА-ЯІЇЄҐ\s]+)', cell_str)
-                    if match:
-                        result['власник'] = match.group(1).strip()
-
-                # Дата народження
-                if 'Дата народження' in cell_str:
-                    match = re.search(r'(\d{2}\.\d{2}\.\d{4})', cell_str)
-                    if match:
-                        result['дата_народження'] = match.group(1)
-
-                # ІПН
-                if 'ІПН' in cell_str:
-                    # Шукаємо в тій самій клітинці
-                    match = re.search(r'ІПН[:\s]*(\d+)', cell_str)
-                    if match:
-                        result['іпн'] = match.group(1)
-                    # Або в наступній клітинці
-                    elif col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        val = str(row.iloc[col_idx + 1]).strip()
-                        if val.isdigit():
-                            result['іпн'] = val
-
-                # Місце реєстрації
-                if 'Місце реєстрації' in cell_str:
-                    match = re.search(r'Місце реєстрації[:\s]*(.+)', cell_str)
-                    if match:
-                        result['місце_реєстрації'] = match.group(1).strip()
-
-                # Марка
-                if cell_str.strip() == 'Марка':
-                    # Значення в наступній колонці
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['марка'] = str(row.iloc[col_idx + 1]).strip()
-
-                # Модель
-                if cell_str.strip() == 'Модель':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['модель'] = str(row.iloc[col_idx + 1]).strip()
-
-                # VIN
-                if cell_str.strip() == 'VIN':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['vin'] = str(row.iloc[col_idx + 1]).strip()
-
-                # Колір
-                if cell_str.strip() == 'Колір':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['колір'] = str(row.iloc[col_idx + 1]).strip()
-
-                # Рік випуску
-                if cell_str.strip() == 'Рік випуску':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['рік_випуску'] = str(row.iloc[col_idx + 1]).strip()
-                elif 'Рік випуску' in cell_str:
-                    match = re.search(r'(\d{4})', cell_str)
-                    if match:
-                        result['рік_випуску'] = match.group(1)
-
-    # Якщо не знайшли через структуру, шукаємо через текст
-    if not result:
-        result = parse_vehicle_data(text)
-
-    # Дозаповнюємо пропущені поля з тексту
-    text_result = parse_vehicle_data(text)
-    for key, value in text_result.items():
-        if key not in result or not result[key]:
-            result[key] = value
-
-    return result
+def collect_car_data(store):
+    """ТЗ з оброблених файлів (у сховищі сесії) та з ручного вводу."""
+    all_car_results = list(store.get('car_files_data') or [])
+    for item in st.session_state.get('car_manual_entries', []):
+        if item.get('text'):
+            for parsed_data in parse_vehicle_text(item['text']):
+                parsed_data['source'] = 'manual'
+                all_car_results.append(parsed_data)
+    return all_car_results
 
 
 # Налаштування сторінки
@@ -255,9 +115,879 @@ def cleanup_temp_photos(exclude_path=None):
                 pass
 
 
+def render_pdf_preview(file_obj, paragraphs, file_key):
+    """Мініатюри сторінок навколо вибраного блоку; наступні сторінки - на вимогу."""
+    digest, total = describe_pdf(file_obj)
+    if not total:
+        st.caption("PDF не містить сторінок")
+        return
+
+    focus = 0
+    if paragraphs:
+        focus = st.selectbox(
+            "Перейти до блоку",
+            range(len(paragraphs)),
+            format_func=lambda i: f"{i + 1}. {paragraphs[i].get('header') or 'Блок'} (стор. {paragraphs[i].get('page', 0) + 1})",
+            key=f"preview_focus_{file_key}"
+        )
+    page = paragraphs[focus].get('page', 0) if paragraphs else 0
+
+    # Догружені сторінки скидаються при переході до іншого блоку
+    more_key = f"preview_more_{file_key}"
+    more = st.session_state.get(more_key)
+    extra = more['extra'] if more and more['focus'] == focus else 0
+
+    pages = page_window(page, total, extra)
+    for number, image in zip(pages, render_pages(file_obj, pages, digest=digest)):
+        if image:
+            st.image(image, caption=f"Сторінка {number + 1} з {total}", use_container_width=True)
+
+    if pages.stop < total:
+        if st.button(f"⬇️ Наступні сторінки ({pages.stop + 1}-{min(total, pages.stop + PREVIEW_PAGE_STEP)} з {total})", key=f"preview_next_{file_key}"):
+            st.session_state[more_key] = {'focus': focus, 'extra': extra + PREVIEW_PAGE_STEP}
+            rerun_section()
+
+
+@st.fragment
+def render_performance_panel():
+    """Панель «Продуктивність»: час і обсяги етапів конвеєра в цій сесії."""
+    recorder = st.session_state.get('stage_recorder')
+    store = st.session_state.get('session_store')
+    with st.expander("⏱️ Продуктивність (Performance)"):
+        if store:
+            st.caption(store.format_stats())
+        fragments = fragment_cache_stats()
+        st.caption(
+            f"Кеш секцій DOCX: {fragments['fragments']} секцій, {fragments['bytes'] / 1024 / 1024:.1f} МБ; "
+            f"з кешу {fragments['hits']}, побудовано {fragments['misses']}"
+        )
+        records = recorder.snapshot() if recorder else []
+        if not records:
+            st.caption("Вимірювань ще немає - вони з'являться після обробки файлів і генерації досьє.")
+            return
+        st.dataframe(pd.DataFrame(recorder.summary()), use_container_width=True, hide_index=True)
+        st.caption(f"Останні виклики (усього записів: {len(records)})")
+        st.dataframe(pd.DataFrame(records[::-1][:50]), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Експорт JSON Lines",
+                data=recorder.to_jsonl(),
+                file_name="stage_timing.jsonl",
+                mime="application/x-ndjson"
+            )
+        with col2:
+            if st.button("🗑️ Очистити вимірювання"):
+                recorder.clear()
+                rerun_section()
+
+
+def rerun_section():
+    """Перезапускає лише поточний фрагмент (якщо дію обробляє повний rerun - увесь скрипт)."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def _mark_selection_changed():
+    st.session_state['selection_changed'] = True
+
+
+def collect_selected_content(store):
+    """Вибрані блоки всіх файлів (з назвою файлу та індексом блоку)."""
+    selected_content = []
+    all_paragraphs_dict = store.get('all_paragraphs') or {}
+    selections = st.session_state.get('selections', {})
+    for fname, f_paras in all_paragraphs_dict.items():
+        if fname in selections:
+            for i, sel in enumerate(selections[fname]):
+                if sel:
+                    block = f_paras[i].copy()
+                    block['filename'] = fname
+                    block['idx'] = i
+                    selected_content.append(block)
+    return selected_content
+
+
+@st.fragment
+def selection_section(store, uploaded_files):
+    """Секція 2: вибір блоків і перегляд PDF; клік по блоку перерисовує лише цю секцію."""
+    all_paragraphs_dict = store.get('all_paragraphs') or {}
+    if not all_paragraphs_dict:
+        return
+
+    if 'selections' not in st.session_state:
+        st.session_state['selections'] = {}
+
+    # --- Разделенный экран: Текст (слева) и PDF (справа) ---
+    file_names = list(all_paragraphs_dict.keys())
+    active_file = file_names[0]
+    if len(file_names) > 1:
+        active_file = st.radio("📂 Оберіть файл для перегляду:", file_names, horizontal=True)
+
+    # Збірка (секція 5) - окремий фрагмент, вона перебудовується при повному rerun
+    if st.session_state.get('selection_changed'):
+        col_note, col_refresh = st.columns([3, 1])
+        with col_note:
+            st.info("Вибір блоків змінено - оновіть збірку досьє, щоб побачити новий порядок.")
+        with col_refresh:
+            if st.button("🔄 Оновити збірку", key="refresh_assembly"):
+                st.rerun()
+
+    paragraphs = all_paragraphs_dict[active_file]
+
+    col_left, col_right = st.columns([1, 1])
+
+    with col_left:
+        st.markdown("#### 📝 Вибір блоків")
+
+        if active_file not in st.session_state['selections']:
+            st.session_state['selections'][active_file] = [True] * len(paragraphs)
+
+        with st.container():
+            for i, block in enumerate(paragraphs):
+                header = block.get("header", "")
+                content = block.get("content", "")
+                key = f"cb_{active_file}_{i}"
+
+                display_header = f"**{header}**" if header else f"Блок {i+1}"
+                is_selected = st.checkbox(display_header, value=st.session_state['selections'][active_file][i], key=key, on_change=_mark_selection_changed)
+
+                if content:
+                    st.caption(content)
+
+                st.session_state['selections'][active_file][i] = is_selected
+
+    with col_right:
+        st.markdown("#### 📑 Оригінальний PDF")
+        # Знаходимо об'єкт файлу
+        file_obj = next((f for f in uploaded_files or [] if f.name == active_file), None)
+        if file_obj:
+            # Сторінки рендеряться на сервері й кешуються за хешем файлу -
+            # на rerun PDF повторно в браузер не передається
+            render_pdf_preview(file_obj, paragraphs, active_file)
+
+
+
+@st.fragment
+def ordering_section(store):
+    """Секція 5: порядок і видалення вибраних блоків; результат - st.session_state['ordered_content']."""
+    selected_content = collect_selected_content(store)
+    ordered_content = []
+
+    if selected_content:
+        st.markdown("---")
+        st.header("5️⃣ Збірка та порядок досьє")
+        st.info("💡 1. Перетягніть блоки для зміни порядку. 2. Відредагуйте текст прямо в полях нижче. 3. Натисніть ✖️ для видалення блоку.")
+
+        if 'edited_texts' not in st.session_state:
+            st.session_state['edited_texts'] = {}
+
+        # CSS для темно-зеленого тексту на білому фоні в полях редагування
+        st.markdown("""
+            <style>
+            div[data-baseweb="textarea"] textarea {
+                color: #006400 !important;
+                font-weight: 500;
+                background-color: #ffffff !important;
+            }
+            </style>
+        """, unsafe_allow_html=True)
+
+        # 1. Сортування (показуємо компактні "ручки" для перетягування)
+        # Сортуємо елементи за заданим порядком: "Початок документа", "Адреса", потім за алфавітом
+        sorted_selected_content = []
+
+        # Спочатку додаємо "Початок документа", якщо він є
+        for i, item in enumerate(selected_content):
+            if item.get('header') == "Початок документа":
+                sorted_selected_content.append(selected_content[i])
+
+        # Потім додаємо "Адреса", якщо вона є
+        for i, item in enumerate(selected_content):
+            if item.get('header') == "Адреса":
+                sorted_selected_content.append(selected_content[i])
+
+        # Потім додаємо "АВТО (НАІС ТЗ)", якщо воно є
+        for i, item in enumerate(selected_content):
+            header = item.get('header', '').strip().lower()
+            if header in ["авто наіс тз", "авто (наіс тз)", "база наіс тз"]:
+                sorted_selected_content.append(selected_content[i])
+
+        # Потім додаємо інші елементи за алфавітом
+        other_items = []
+        for item in selected_content:
+            header = item.get('header', '').strip().lower()
+            if header not in ["початок документа", "адреса"] and header not in ["авто наіс тз", "авто (наіс тз)", "база наіс тз"]:
+                other_items.append(item)
+
+        # Сортуємо інші елементи за заголовком
+        other_items.sort(key=lambda x: x.get('header', '').lower())
+        sorted_selected_content.extend(other_items)
+
+        # Додаємо можливість видалення блоків
+        if 'deleted_blocks' not in st.session_state:
+            st.session_state['deleted_blocks'] = set()
+
+        # Відображаємо кожен блок з хрестиком для видалення
+        for i, item in enumerate(sorted_selected_content):
+            if i not in st.session_state['deleted_blocks']:
+                col1, col2 = st.columns([10, 1])
+                with col1:
+                    # Показуємо інформацію про блок
+                    block_info = f"[ID:{i}] "
+                    if item.get('header'):
+                        block_info += f"【{item['header']}】 "
+                    content_preview = item.get('content', '')[:50] + "..."
+                    st.write(block_info + content_preview)
+                with col2:
+                    # Кнопка видалення
+                    if st.button("✖️", key=f"delete_{i}", help="Видалити цей блок"):
+                        st.session_state['deleted_blocks'].add(i)
+                        rerun_section()
+
+        # Створюємо список для сортування з урахуванням видалених блоків
+        # Створюємо список елементів, що залишилися, з індексами
+        remaining_items = []
+        for i, item in enumerate(sorted_selected_content):
+            if i not in st.session_state['deleted_blocks']:
+                display_label = f"[ID:{i}] "
+                if item.get('header'):
+                    display_label += f"【{item['header']}】 "
+                content_preview = item.get('content', '')[:50] + "..."
+                remaining_items.append({
+                    'index': i,
+                    'item': item,
+                    'label': display_label + content_preview
+                })
+
+        # Застосовуємо сортування тільки до блоків, що залишилися
+        if remaining_items:
+            # Витягуємо тільки мітки для передачі в sort_items
+            labels_only = [item_info['label'] for item_info in remaining_items]
+            sorted_labels = sort_items(labels_only, direction="vertical")
+        else:
+            sorted_labels = []
+
+        # 2. Визначаємо впорядкований список
+        ordered_content = []
+        if sorted_labels and len(sorted_labels) > 0:
+            # Відновлюємо порядок елементів на основі відсортованих міток
+            for label in sorted_labels:
+                # Знайдемо відповідний елемент у списку, що залишилися
+                for item_info in remaining_items:
+                    if item_info['label'] == label:
+                        ordered_content.append(item_info['item'])
+                        break
+        else:
+            # Якщо сортування не застосовувалося, просто виключаємо видалені
+            ordered_content = [item for i, item in enumerate(sorted_selected_content) if i not in st.session_state['deleted_blocks']]
+
+    st.session_state['ordered_content'] = ordered_content
+
+
+@st.fragment
+def dms_section(store):
+    """Вкладка ДМС: дані особи та фото з PDF ДМС."""
+    uploaded_dms = st.file_uploader(
+        "Завантажте PDF файл (ДМС)",
+        type=['pdf'],
+        key="dms_pdf_uploader"
+    )
+
+    if uploaded_dms:
+        if st.session_state.get('last_uploaded_dms') != uploaded_dms.name:
+            with st.spinner("Обробка PDF ДМС..."):
+                dms_info, photo_bytes, error = extract_dms_data(uploaded_dms)
+                if error:
+                    st.error(error)
+                else:
+                    st.success(f"✅ Дані з файлу {uploaded_dms.name} успішно зчитано")
+                    store.put('dms_data', {
+                        'info': dms_info,
+                        'photo_bytes': photo_bytes
+                    })
+                    st.session_state['last_uploaded_dms'] = uploaded_dms.name
+                    if photo_bytes:
+                        store.put('photo_bytes', photo_bytes)
+                        # Фото з ДМС показується в секції 3 поза фрагментом
+                        st.rerun()
+
+    if 'dms_data' in store:
+        st.info(f"📁 Використовуються дані ДМС з: {st.session_state.get('last_uploaded_dms')}")
+        if st.button("❌ Очистити дані ДМС"):
+            store.delete('dms_data')
+            st.session_state['last_uploaded_dms'] = None
+            rerun_section()
+
+
+@st.fragment
+def arkan_section(store):
+    """Вкладка Аркан: перетини кордону з Excel."""
+    uploaded_excel = st.file_uploader(
+        "Завантажте Excel файл (Аркан)",
+        type=['xlsx', 'xls'],
+        key="arkan_excel_uploader"
+    )
+
+    if uploaded_excel:
+        if st.session_state.get('last_uploaded_arkan') != uploaded_excel.name:
+            with st.spinner("Обробка Excel файлу..."):
+                border_data, error = process_excel_to_data(uploaded_excel)
+                if error:
+                    st.error(error)
+                else:
+                    st.success(f"✅ Дані з файлу {uploaded_excel.name} успішно зчитано")
+                    store.put('border_crossing_data', border_data or None)
+                    st.session_state['last_uploaded_arkan'] = uploaded_excel.name
+
+    if 'border_crossing_data' in store:
+        st.info(f"📁 Використовуються дані Аркан з: {st.session_state.get('last_uploaded_arkan')}")
+        if st.button("❌ Очистити дані Аркан"):
+            store.delete('border_crossing_data')
+            st.session_state['last_uploaded_arkan'] = None
+            rerun_section()
+
+
+def _upload_key(uploaded_file) -> str:
+    """Ідентифікатор завантаження без читання вмісту (file_id або ім'я + розмір)."""
+    return getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}_{uploaded_file.size}"
+
+
+@st.fragment
+def real_estate_section(store):
+    """Вкладка нерухомості: пакетний розбір PDF ДРРП."""
+    uploader_generation = st.session_state.get('real_estate_uploader_generation', 0)
+    uploaded_real_estate = st.file_uploader(
+        "Завантажте PDF файл (Нерухомість)",
+        type=['pdf'],
+        accept_multiple_files=True,
+        key=f"real_estate_pdf_uploader_{uploader_generation}"
+    )
+
+    # Ключ завантаження -> {'hash', 'report'}; вміст хешується лише для нових файлів,
+    # записи нерухомості перебудовуються з поточного набору завантажень
+    uploads = {_upload_key(f): f for f in uploaded_real_estate or []}
+    known = st.session_state.setdefault('real_estate_uploads', {})
+    if uploads.keys() != known.keys():
+        results_by_hash = store.get('real_estate_results') or {}
+        new_files = [f for key, f in uploads.items() if key not in known]
+        if new_files:
+            with st.spinner("Обробка PDF файлів нерухомості..."):
+                progress_bar = st.progress(0)
+                reports = parse_real_estate_batch(
+                    new_files,
+                    on_progress=lambda done, total: progress_bar.progress(done / total)
+                )
+                progress_bar.empty()
+
+            # Повтори в межах пакета пропускаються - беруть результат першого файлу з тим же вмістом
+            for report in reports:
+                if report['hash'] and not report['skipped'] and report['results']:
+                    results_by_hash[report['hash']] = report['results']
+
+            new_records = 0
+            for f, report in zip(new_files, reports):
+                if report['error']:
+                    st.error(f"Помилка обробки файлу {report['name']}: {report['error']}")
+                elif not report['skipped']:
+                    new_records += len(report['results'] or [])
+                known[_upload_key(f)] = {
+                    'hash': report['hash'],
+                    'report': {
+                        "Файл": report['name'],
+                        "Сторінок": report['pages'],
+                        "Час, с": round(report['duration'], 2),
+                        "Записів": len(results_by_hash.get(report['hash']) or []),
+                        "Статус": "кеш" if report['cached'] or report['skipped'] else ("помилка" if report['error'] else "ok"),
+                    },
+                }
+
+            if new_records:
+                st.success(f"✅ Дані з файлів нерухомості успішно зчитано. Знайдено {new_records} записів.")
+            else:
+                st.warning("Не знайдено даних про нерухомість у завантажених файлах.")
+
+        # Файли, прибрані із завантажувача, разом зі своїми записами
+        for key in [key for key in known if key not in uploads]:
+            del known[key]
+
+        all_real_estate_data = []
+        used_hashes = []
+        for key in uploads:
+            file_hash = known[key]['hash']
+            if file_hash in results_by_hash and file_hash not in used_hashes:
+                used_hashes.append(file_hash)
+                all_real_estate_data.extend(results_by_hash[file_hash])
+        store.put('real_estate_results', {h: results_by_hash[h] for h in used_hashes} or None)
+        store.put('real_estate_data', all_real_estate_data or None)
+
+    if known:
+        with st.expander("⏱️ Обробка файлів нерухомості", expanded=False):
+            st.dataframe(pd.DataFrame([entry['report'] for entry in known.values()]), use_container_width=True, hide_index=True)
+
+    if 'real_estate_data' in store:
+        st.info(f"📁 Використовуються дані нерухомості")
+
+        # Отображаем извлеченные данные для проверки
+        with st.expander("🔍 Перегляд даних нерухомості", expanded=False):
+            real_estate_data = store.get('real_estate_data')
+            for idx, item in enumerate(real_estate_data):
+                st.write(f"**Об'єкт нерухомості #{idx + 1}:**")
+                for key, value in item.items():
+                    if value:
+                        st.write(f"- {key}: {value}")
+                st.write("---")  # Разделитель между объектами
+
+        if st.button("❌ Очистити дані нерухомості"):
+            store.delete('real_estate_data')
+            store.delete('real_estate_results')
+            st.session_state['real_estate_uploads'] = {}
+            # Новий ключ завантажувача прибирає з нього файли, інакше їх записи повернуться
+            st.session_state['real_estate_uploader_generation'] = uploader_generation + 1
+            rerun_section()
+
+
+@st.fragment
+def car_section(store):
+    """Вкладка АВТО: ТЗ з файлів НАІС та ручного вводу."""
+    # Ініціалізація session_state для ручного вводу ТЗ (дані з файлів - у сховищі сесії)
+    if 'car_manual_entries' not in st.session_state:
+        st.session_state['car_manual_entries'] = []
+
+    st.markdown("##### **Або додати вручну:**")
+
+    # Кнопка додавання запису
+    if st.button("➕ Додати запис (ручний ввід)", key="add_manual_car"):
+        st.session_state['car_manual_entries'].append({
+            'text': '',
+            'source': 'manual'
+        })
+        rerun_section()
+
+    # Показуємо вручну додані записи
+    if st.session_state.get('car_manual_entries'):
+        st.markdown("**Ручний ввід:**")
+
+        for idx in range(len(st.session_state['car_manual_entries'])):
+            item = st.session_state['car_manual_entries'][idx]
+
+            col1, col2 = st.columns([2, 1])
+
+            with col1:
+                # Текстове поле
+                text_key = f"manual_car_text_{idx}"
+                new_text = st.text_area(
+                    f"Запис #{idx + 1}:",
+                    value=item.get('text', ''),
+                    key=text_key,
+                    height=150
+                )
+                st.session_state['car_manual_entries'][idx]['text'] = new_text
+
+            with col2:
+                # Кнопка видалення
+                if st.button(f"❌ Видалити #{idx + 1}", key=f"delete_manual_car_{idx}"):
+                    st.session_state['car_manual_entries'].pop(idx)
+                    rerun_section()
+
+    st.markdown("---")
+    st.markdown("##### **Завантажити файли (Excel або текстові)**")
+    uploaded_car_files = st.file_uploader(
+        "Завантажте файли (Excel або текстові)",
+        type=['xlsx', 'xls', 'txt'],
+        accept_multiple_files=True,
+        key="car_files_uploader"
+    )
+
+    # Обробка завантажених файлів
+    if uploaded_car_files:
+        st.write(f"🔍 Вибрано файлів: **{len(uploaded_car_files)}** — " + ", ".join(f"`{f.name}`" for f in uploaded_car_files))
+
+    if st.button("🔄 Обробити файли", type="primary", key="process_car_files_btn") and uploaded_car_files:
+        with st.spinner("Обробка файлів..."):
+            # Усі файли розбираються паралельно, результат - одна зведена таблиця
+            car_reports = parse_vehicle_files(uploaded_car_files)
+            all_car_data = [vehicle for report in car_reports for vehicle in report['vehicles']]
+            failed = [report for report in car_reports if report['error']]
+
+            st.session_state['car_files_summary'] = {
+                'files': len(car_reports),
+                'vehicles': len(all_car_data),
+                'failed': [f"{report['name']}: {report['error']}" for report in failed],
+                'table': vehicles_table(car_reports),
+            }
+
+            if all_car_data:
+                store.put('car_files_data', list(store.get('car_files_data') or []) + all_car_data)
+                rerun_section()
+            else:
+                st.warning("⚠️ Не вдалося витягти дані з жодного файлу. Перевірте формат даних.")
+
+    car_files_summary = st.session_state.get('car_files_summary')
+    if car_files_summary:
+        summary_text = f"✅ Оброблено файлів: {car_files_summary['files']}, знайдено ТЗ: {car_files_summary['vehicles']}"
+        if car_files_summary['failed']:
+            st.warning(summary_text + f", з помилками: {len(car_files_summary['failed'])} — " + "; ".join(car_files_summary['failed']))
+        else:
+            st.success(summary_text)
+        with st.expander("📋 Зведена таблиця файлів", expanded=False):
+            st.dataframe(car_files_summary['table'], use_container_width=True, hide_index=True)
+
+    # Об'єднуємо дані з файлів та ручного вводу
+    all_car_results = collect_car_data(store)
+
+    if all_car_results:
+        st.info(f"📊 Всього записів про ТЗ: {len(all_car_results)}")
+
+        # Відображаємо результати
+        for idx, item in enumerate(all_car_results):
+            with st.expander(f"🚗 ТЗ #{idx + 1}", expanded=False):
+                col1, col2 = st.columns([2, 1])
+
+                with col1:
+                    st.write("**Поля:**")
+                    for key, value in item.items():
+                        if key not in ['source', 'filename'] and value:
+                            st.write(f"• **{key}:** {value}")
+
+                    if item.get('source') == 'file':
+                        st.write(f"• **Джерело:** Файл `{item.get('filename', '')}`")
+                    else:
+                        st.write(f"• **Джерело:** Ручний ввід")
+
+                with col2:
+                    # Форматований вивід
+                    formatted_parts = []
+                    if item.get('номерний_знак'):
+                        formatted_parts.append(f"Номерний знак: {item['номерний_знак']}")
+                    if item.get('марка') or item.get('модель'):
+                        brand_model = f"{item.get('марка', '')} {item.get('модель', '')}".strip()
+                        formatted_parts.append(f"ТЗ: {brand_model}")
+                    if item.get('vin'):
+                        formatted_parts.append(f"VIN: {item['vin']}")
+                    if item.get('колір'):
+                        formatted_parts.append(f"Колір: {item['колір']}")
+
+                    if item.get('рік_випуску'):
+                        formatted_parts.append(f"Рік випуску: {item['рік_випуску']}")
+
+                    formatted_text = ', '.join(formatted_parts) + '.' if formatted_parts else 'Немає даних'
+                    st.success(formatted_text)
+
+    # Кнопка очищення
+    if st.button("🧹 Очистити всі дані про ТЗ", key="clear_all_car_data"):
+        store.delete('car_files_data')
+        st.session_state['car_manual_entries'] = []
+        st.session_state['car_files_summary'] = None
+        rerun_section()
+
+
+@st.fragment
+def pension_section():
+    """Вкладка Пенсійний: страхувальники з ІПНП і перевірка у FinAP."""
+    st.markdown("##### **Вставте текст з реєстру ІПНП**")
+
+    # Ініціалізація session_state
+    if 'pension_data' not in st.session_state:
+        st.session_state['pension_data'] = None
+    if 'pension_raw_text' not in st.session_state:
+        st.session_state['pension_raw_text'] = ""
+
+    # Поле для вставки тексту
+    pension_text = st.text_area(
+        "Текст з реєстру Пенсійного фонду",
+        value=st.session_state.get('pension_raw_text', ''),
+        placeholder='Вставте сюди рядок з ІПНП...\nНаприклад: ПРИВАТНЕ АКЦІОНЕРНЕ ТОВАРИСТВО "ІСРЗ" 32333962 01.08.2014',
+        height=150,
+        label_visibility="collapsed",
+        key="pension_text_area"
+    )
+
+    # Зберігаємо введений текст
+    st.session_state['pension_raw_text'] = pension_text
+
+    bypass_finap_cache = st.checkbox("Оминути кеш FinAP (свіжий запит)", value=False, key="pension_bypass_cache")
+
+    # Кнопка перевірки
+    if st.button("🔎  Перевірити в FinAP"):
+        if not pension_text.strip():
+            st.warning("⚠️ Введіть текст для обробки")
+        else:
+            with st.spinner("Обробка даних з ПФУ..."):
+                result = process_pension_data(pension_text, use_cache=not bypass_finap_cache)
+
+                if result['error']:
+                    st.error(f"❌ {result['error']}")
+                    st.session_state['pension_data'] = None
+                else:
+                    st.session_state['pension_data'] = result
+                    st.success("✅ Дані успішно оброблено")
+                    rerun_section()
+
+    # Пакетна перевірка всіх страхувальників з виписки
+    with st.expander("📚 Пакетна перевірка всієї виписки ПФУ", expanded=False):
+        pension_file = st.file_uploader(
+            "Або завантажте виписку (.txt)",
+            type=['txt'],
+            key="pension_batch_uploader"
+        )
+        if st.button("🔎  Перевірити всіх у FinAP", key="pension_batch_btn"):
+            batch_text = pension_file.getvalue().decode('utf-8', errors='ignore') if pension_file else pension_text
+            if not batch_text.strip():
+                st.warning("⚠️ Введіть текст або завантажте виписку")
+            else:
+                with st.spinner("Паралельна перевірка страхувальників у FinAP..."):
+                    batch_results = process_pension_batch(batch_text, use_cache=not bypass_finap_cache)
+
+                lines = [res['formatted_line'] for res in batch_results if res['formatted_line']]
+                if lines:
+                    st.session_state['pension_data'] = {
+                        'raw_text': batch_text,
+                        'parsed': None,
+                        'finap_info': None,
+                        'formatted_line': "\n".join(lines),
+                        'error': None,
+                        'batch': batch_results,
+                    }
+                    rerun_section()
+                elif batch_results:
+                    st.error("❌ Жоден страхувальник не знайдений у FinAP")
+                    st.dataframe(pension_batch_table(batch_results), use_container_width=True, hide_index=True)
+                else:
+                    st.warning("⚠️ Не вдалося знайти жодного ЄДРПОУ або РНОКПП у виписці")
+
+    st.caption(finap_status_line())
+
+    pension_data = st.session_state.get('pension_data')
+    if pension_data and pension_data.get('batch'):
+        batch_results = pension_data['batch']
+        failed = sum(1 for res in batch_results if res['error'])
+        st.success(f"✅ Перевірено страхувальників: {len(batch_results)}, з помилками: {failed}")
+        st.dataframe(pension_batch_table(batch_results), use_container_width=True, hide_index=True)
+
+        if st.button("❌ Очистити дані Пенсійний", key="clear_pension_batch"):
+            st.session_state['pension_data'] = None
+            st.session_state['pension_raw_text'] = ""
+            rerun_section()
+
+    # Відображення результатів
+    if st.session_state.get('pension_data') and st.session_state['pension_data'].get('finap_info'):
+        data = st.session_state['pension_data']
+        parsed = data['parsed']
+        info = data['finap_info']
+
+        # Визначаємо тип коду
+        code_label = "РНОКПП" if (parsed.edrpou and len(parsed.edrpou) == 10) else "ЄДРПОУ"
+
+        # Попередній перегляд розпарсеного
+        chips_html = '<div style="display: flex; gap: 8px; flex-wrap: wrap; margin: 0.8rem 0 1.4rem;">'
+        chips_html += f'<div style="background: #151820; border: 1px solid #252A36; border-radius: 20px; padding: 4px 12px; font-family: monospace; font-size: 0.72rem; color: #8A94A6;">🏢 Назва<span style="color: #00E5A0; margin-left: 4px;">{parsed.company_name or "—"}</span></div>'
+        chips_html += f'<div style="background: #151820; border: 1px solid #252A36; border-radius: 20px; padding: 4px 12px; font-family: monospace; font-size: 0.72rem; color: #8A94A6;">🔢 {code_label}<span style="color: #00E5A0; margin-left: 4px;">{parsed.edrpou or "—"}</span></div>'
+        chips_html += f'<div style="background: #151820; border: 1px solid #252A36; border-radius: 20px; padding: 4px 12px; font-family: monospace; font-size: 0.72rem; color: #8A94A6;">📅 Дата внеску<span style="color: #00E5A0; margin-left: 4px;">{parsed.last_payment_date or "—"}</span></div>'
+        chips_html += '</div>'
+        st.markdown(chips_html, unsafe_allow_html=True)
+
+        # Картка з результатами
+        status_val = info.get('status', '—')
+        if "ЗАРЕЄСТРОВАНО" in status_val.upper() and "ПРИПИНЕНО" not in status_val.upper():
+            status_html = f'<span style="display: inline-block; background: rgba(0,229,160,0.12); color: #00E5A0; border-radius: 4px; padding: 2px 10px; font-size: 0.78rem; font-family: monospace;">{status_val}</span>'
+        else:
+            status_html = f'<span style="display: inline-block; background: rgba(255,80,80,0.12); color: #FF5050; border-radius: 4px; padding: 2px 10px; font-size: 0.78rem; font-family: monospace;">{status_val}</span>'
+
+        card = f"""
+<div style="background: #151820; border: 1px solid #1E2430; border-radius: 12px; padding: 1.5rem 1.8rem; margin-top: 1rem;">
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">🏢</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Назва</div>
+    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['name']}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">🔢</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">{code_label}</div>
+    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{parsed.edrpou}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">📍</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Адреса</div>
+    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['address']}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">👤</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Керівник</div>
+    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['manager']}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">🏭</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Вид діяльності</div>
+    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['kved']}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">📊</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Статус</div>
+    <div style="font-size: 0.88rem; color: #E8EAF0;">{status_html}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">📧</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Email</div>
+    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{info['email'] or "—"}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">📞</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Телефон</div>
+    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{info['phone'] or "—"}</div>
+  </div>
+  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; gap: 1rem;">
+    <div style="font-size: 1rem; min-width: 24px;">📅</div>
+    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Остання дата внеску</div>
+    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{parsed.last_payment_date or '—'}</div>
+  </div>
+</div>
+"""
+        st.markdown(card, unsafe_allow_html=True)
+
+        # Інформація для виводу в Word
+        st.markdown(f"<div style='font-size: 0.85rem; margin-top: 1rem; color: #8A94A6; font-family: monospace;'>{data['formatted_line']}</div>", unsafe_allow_html=True)
+
+        # Кнопка очищення
+        if st.button("❌ Очистити дані Пенсійний"):
+            st.session_state['pension_data'] = None
+            st.session_state['pension_raw_text'] = ""
+            rerun_section()
+
+
+@st.fragment
+def family_section(store, relative_type):
+    """Вкладка родича: дані з PDF ДМС і ручні записи з фото."""
+    st.markdown("##### **Завантажити PDF файли (ДМС)**")
+    uploaded_family_pdfs = st.file_uploader(
+        f"Завантажте PDF файли ДМС ({relative_type})",
+        type=['pdf'],
+        accept_multiple_files=True,
+        key=f"family_pdf_{relative_type}"
+    )
+
+    # Обробка завантажених файлів
+    if uploaded_family_pdfs:
+        files_key = f"last_uploaded_family_{relative_type}"
+        current_files = [f.name for f in uploaded_family_pdfs]
+        last_files = st.session_state.get(files_key, [])
+
+        if current_files != last_files:
+            with st.spinner(f"Обробка PDF файлів {relative_type}..."):
+                if relative_type not in st.session_state['family_data']:
+                    st.session_state['family_data'][relative_type] = []
+
+                for pdf_file in uploaded_family_pdfs:
+                    dms_info, photo_bytes, error = extract_dms_data(pdf_file)
+                    if error:
+                        st.error(f"Помилка у файлі {pdf_file.name}: {error}")
+                    else:
+                        st.success(f"✅ Дані родича ({relative_type}) з файлу {pdf_file.name} успішно зчитано")
+                        photo_key = f"family_photo_{uuid.uuid4().hex}"
+                        store.put(photo_key, photo_bytes)
+                        st.session_state['family_data'][relative_type].append({
+                            'info': dms_info,
+                            'photo_key': photo_key,
+                            'source': 'pdf',
+                            'filename': pdf_file.name
+                        })
+
+                st.session_state[files_key] = current_files
+
+    # Показуємо завантажені дані
+    if relative_type in st.session_state['family_data'] and st.session_state['family_data'][relative_type]:
+        st.markdown("##### **Завантажені дані з PDF:**")
+        for idx, item in enumerate(st.session_state['family_data'][relative_type]):
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.info(f"📁 Файл: {item.get('filename', 'Невідомо')}")
+            with col2:
+                if st.button(f"❌", key=f"delete_pdf_{relative_type}_{idx}", help="Видалити"):
+                    store.delete(item['photo_key'])
+                    st.session_state['family_data'][relative_type].pop(idx)
+                    rerun_section()
+
+    st.markdown("---")
+    st.markdown("##### **Або додати вручну:**")
+
+    # Кнопка додавання нового запису
+    if st.button(f"➕ Додати запис ({relative_type})", key=f"add_manual_{relative_type}"):
+        if relative_type not in st.session_state['family_manual_data']:
+            st.session_state['family_manual_data'][relative_type] = []
+        st.session_state['family_manual_data'][relative_type].append({
+            'text': '',
+            'photo_key': f"family_manual_photo_{uuid.uuid4().hex}"
+        })
+        rerun_section()
+
+    # Показуємо вручну додані записи
+    if relative_type in st.session_state['family_manual_data'] and st.session_state['family_manual_data'][relative_type]:
+        for idx, item in enumerate(st.session_state['family_manual_data'][relative_type]):
+            st.markdown(f"**Запис #{idx + 1}:**")
+            col1, col2 = st.columns([1, 2])
+
+            with col1:
+                # Завантаження фото для запису
+                uploaded_photo = st.file_uploader(
+                    "Фото",
+                    type=['png', 'jpg', 'jpeg'],
+                    key=f"manual_photo_{relative_type}_{idx}"
+                )
+
+                photo_bytes = store.get(item['photo_key'])
+                if uploaded_photo:
+                    # Перекодовуємо лише новий файл, а не на кожен rerun
+                    upload_id = f"{uploaded_photo.name}_{uploaded_photo.size}"
+                    if item.get('photo_upload_id') != upload_id:
+                        img = Image.open(uploaded_photo)
+                        buffered = BytesIO()
+                        img.save(buffered, format="PNG")
+                        photo_bytes = buffered.getvalue()
+                        store.put(item['photo_key'], photo_bytes)
+                        item['photo_upload_id'] = upload_id
+                    st.image(Image.open(BytesIO(photo_bytes)), width=150)
+                elif photo_bytes:
+                    st.image(Image.open(BytesIO(photo_bytes)), width=150)
+                elif default_image('default_avatar.png'):
+                    st.image(default_image('default_avatar.png'), width=150)
+
+            with col2:
+                # Текстове поле для введення даних
+                text_key = f"manual_text_{relative_type}_{idx}"
+                current_text = item.get('text', '')
+                new_text = st.text_area(
+                    "Текст (використовуйте формат \"Ключ: значення\" для кожного поля)",
+                    value=current_text,
+                    key=text_key,
+                    height=150
+                )
+                st.session_state['family_manual_data'][relative_type][idx]['text'] = new_text
+
+            # Кнопка видалення запису
+            if st.button(f"❌ Видалити запис #{idx + 1}", key=f"delete_manual_{relative_type}_{idx}"):
+                store.delete(item['photo_key'])
+                st.session_state['family_manual_data'][relative_type].pop(idx)
+                rerun_section()
+
+            st.markdown("---")
+
 def main():
     # Очищення старих фото більше не потрібно, оскільки фото зберігаються в session_state
 
+    # Вимірювання етапів (get_pdf_paragraphs, extract_dms_data, fop, ...) - окремо для кожної сесії
+    if 'stage_recorder' not in st.session_state:
+        st.session_state['stage_recorder'] = StageRecorder()
+    set_recorder(st.session_state['stage_recorder'])
+
+    # Великі дані сесії (абзаци, фото, вивантаження) - у сховищі з бюджетом пам'яті;
+    # понад бюджет вони скидаються у каталог сесії на диску
+    if 'session_store' not in st.session_state:
+        st.session_state['session_store'] = SessionStore()
+    store = st.session_state['session_store']
+
     # Заголовок з чекбоксом у правій частині
     col_title, col_checkbox = st.columns([3, 2])
     with col_title:
@@ -309,8 +1039,8 @@ def main():
             with st.spinner("Обробка PDF файлів..."):
                 all_paragraphs = process_pdfs_to_paragraphs(uploaded_files)
 
-                # Зберігаємо в session_state
-                st.session_state['all_paragraphs'] = all_paragraphs
+                # Зберігаємо у сховищі сесії
+                store.put('all_paragraphs', all_paragraphs)
                 st.session_state['processing_done'] = True
                 # Скидаємо вибір при новій обробці
                 if 'selections' in st.session_state:
@@ -318,72 +1048,13 @@ def main():
 
                 st.success("✅ Обробка завершена!")
 
-    # Секция 2: Выбор и Секция 3: Фото
-    if 'processing_done' in st.session_state and st.session_state['processing_done']:
+    # Секция 2: Выбор (фрагмент)
+    if st.session_state.get('processing_done'):
         st.markdown("---")
         st.header("2️⃣ Вибір інформації з файлів")
-
-        all_paragraphs_dict = st.session_state['all_paragraphs']
-
-        if 'selections' not in st.session_state:
-            st.session_state['selections'] = {}
-
-        selected_content = []
-
-        # --- Разделенный экран: Текст (слева) и PDF (справа) ---
-        file_names = list(all_paragraphs_dict.keys())
-        active_file = file_names[0]
-        if len(file_names) > 1:
-            active_file = st.radio("📂 Оберіть файл для перегляду:", file_names, horizontal=True)
-
-        paragraphs = all_paragraphs_dict[active_file]
-        # Динамічний розрахунок висоти: приблизно 115 пікселів на блок + заголовок
-        pdf_height = max(800, len(paragraphs) * 115 + 100)
-
-        col_left, col_right = st.columns([1, 1])
-
-        with col_left:
-            st.markdown("#### 📝 Вибір блоків")
-
-            if active_file not in st.session_state['selections']:
-                st.session_state['selections'][active_file] = [True] * len(paragraphs)
-
-            with st.container():
-                for i, block in enumerate(paragraphs):
-                    header = block.get("header", "")
-                    content = block.get("content", "")
-                    key = f"cb_{active_file}_{i}"
-
-                    display_header = f"**{header}**" if header else f"Блок {i+1}"
-                    is_selected = st.checkbox(display_header, value=st.session_state['selections'][active_file][i], key=key)
-
-                    if content:
-                        st.caption(content)
-
-                    st.session_state['selections'][active_file][i] = is_selected
-
-        with col_right:
-            st.markdown("#### 📑 Оригінальний PDF")
-            # Знаходимо об'єкт файлу
-            file_obj = next((f for f in uploaded_files if f.name == active_file), None)
-            if file_obj:
-                file_obj.seek(0)
-                # Використання спеціалізованої бібліотеки для Streamlit Cloud
-                pdf_viewer(file_obj.read(), height=pdf_height)
-
-        # Собираем выбранное
-        for fname, f_paras in all_paragraphs_dict.items():
-            if fname in st.session_state['selections']:
-                for i, sel in enumerate(st.session_state['selections'][fname]):
-                    if sel:
-                        block = f_paras[i].copy()
-                        block['filename'] = fname
-                        block['idx'] = i
-                        selected_content.append(block)
-    else:
-        selected_content = []
-
-    ordered_content = []
+        # Повний rerun перебудовує й збірку (секція 5)
+        st.session_state['selection_changed'] = False
+        selection_section(store, uploaded_files)
 
     # ПЕРЕНЕСЕНО СЮДИ: Секція завантаження фото (завжди доступна після вибору файлів або відразу)
     st.markdown("---")
@@ -434,12 +1105,11 @@ def main():
                 img_bytes = base64.b64decode(img_data)
                 img = Image.open(BytesIO(img_bytes))
 
-                # Конвертуємо зображення назад у base64 для зберігання в session_state
+                # Зберігаємо зображення як PNG у сховищі сесії
                 buffered = BytesIO()
                 img.save(buffered, format="PNG")
-                img_base64 = base64.b64encode(buffered.getvalue()).decode()
 
-                st.session_state['photo_data'] = img_base64
+                store.put('photo_bytes', buffered.getvalue())
                 st.session_state['last_processed_paste'] = paste_result
                 # st.rerun()  # Убираем rerun, чтобы избежать циклов
             except Exception as e:
@@ -452,12 +1122,11 @@ def main():
             if st.session_state.get('last_uploaded_id') != file_id:
                 img = Image.open(uploaded_photo)
 
-                # Конвертуємо зображення у base64 для зберігання в session_state
+                # Зберігаємо зображення як PNG у сховищі сесії
                 buffered = BytesIO()
                 img.save(buffered, format="PNG")
-                img_base64 = base64.b64encode(buffered.getvalue()).decode()
 
-                st.session_state['photo_data'] = img_base64
+                store.put('photo_bytes', buffered.getvalue())
                 st.session_state['last_uploaded_id'] = file_id
                 # st.rerun()  # Убираем rerun, чтобы избежать циклов
 
@@ -542,133 +1211,23 @@ def main():
         """, height=220)
 
     with col2:
-        if 'photo_data' in st.session_state:
-            img_bytes = base64.b64decode(st.session_state['photo_data'])
+        img_bytes = store.get('photo_bytes')
+        if img_bytes:
             img = Image.open(BytesIO(img_bytes))
             st.image(img, caption="Фото для досьє", width=150)
-        elif os.path.exists('default_avatar.png'):
-            st.image('default_avatar.png', caption="Фото за замовчуванням", width=150)
+        elif default_image('default_avatar.png'):
+            st.image(default_image('default_avatar.png'), caption="Фото за замовчуванням", width=150)
 
     # Повертаємо логіку Секції 5 (якщо є вибраний контент)
     show_advanced = ('processing_done' in st.session_state and st.session_state['processing_done']) or st.session_state.get('empty_dossier_mode', False)
     
     if 'processing_done' in st.session_state and st.session_state['processing_done']:
 
-        # Секция сортування
-        if selected_content:
-            st.markdown("---")
-            st.header("5️⃣ Збірка та порядок досьє")
-            st.info("💡 1. Перетягніть блоки для зміни порядку. 2. Відредагуйте текст прямо в полях нижче. 3. Натисніть ✖️ для видалення блоку.")
-
-            if 'edited_texts' not in st.session_state:
-                st.session_state['edited_texts'] = {}
-
-            # CSS для темно-зеленого тексту на білому фоні в полях редагування
-            st.markdown("""
-                <style>
-                div[data-baseweb="textarea"] textarea {
-                    color: #006400 !important;
-                    font-weight: 500;
-                    background-color: #ffffff !important;
-                }
-                </style>
-            """, unsafe_allow_html=True)
-
-            # 1. Сортування (показуємо компактні "ручки" для перетягування)
-            # Сортуємо елементи за заданим порядком: "Початок документа", "Адреса", потім за алфавітом
-            sorted_selected_content = []
-
-            # Спочатку додаємо "Початок документа", якщо він є
-            for i, item in enumerate(selected_content):
-                if item.get('header') == "Початок документа":
-                    sorted_selected_content.append(selected_content[i])
-
-            # Потім додаємо "Адреса", якщо вона є
-            for i, item in enumerate(selected_content):
-                if item.get('header') == "Адреса":
-                    sorted_selected_content.append(selected_content[i])
-
-            # Потім додаємо "АВТО (НАІС ТЗ)", якщо воно є
-            for i, item in enumerate(selected_content):
-                header = item.get('header', '').strip().lower()
-                if header in ["авто наіс тз", "авто (наіс тз)", "база наіс тз"]:
-                    sorted_selected_content.append(selected_content[i])
-
-            # Потім додаємо інші елементи за алфавітом
-            other_items = []
-            for item in selected_content:
-                header = item.get('header', '').strip().lower()
-                if header not in ["початок документа", "адреса"] and header not in ["авто наіс тз", "авто (наіс тз)", "база наіс тз"]:
-                    other_items.append(item)
-
-            # Сортуємо інші елементи за заголовком
-            other_items.sort(key=lambda x: x.get('header', '').lower())
-            sorted_selected_content.extend(other_items)
-
-            # Додаємо можливість видалення блоків
-            if 'deleted_blocks' not in st.session_state:
-                st.session_state['deleted_blocks'] = set()
-
-            # Відображаємо кожен блок з хрестиком для видалення
-            for i, item in enumerate(sorted_selected_content):
-                if i not in st.session_state['deleted_blocks']:
-                    col1, col2 = st.columns([10, 1])
-                    with col1:
-                        # Показуємо інформацію про блок
-                        block_info = f"[ID:{i}] "
-                        if item.get('header'):
-                            block_info += f"【{item['header']}】 "
-                        content_preview = item.get('content', '')[:50] + "..."
-                        st.write(block_info + content_preview)
-                    with col2:
-                        # Кнопка видалення
-                        if st.button("✖️", key=f"delete_{i}", help="Видалити цей блок"):
-                            st.session_state['deleted_blocks'].add(i)
-                            st.rerun()
-
-            # Створюємо список для сортування з урахуванням видалених блоків
-            # Створюємо список елементів, що залишилися, з індексами
-            remaining_items = []
-            for i, item in enumerate(sorted_selected_content):
-                if i not in st.session_state['deleted_blocks']:
-                    display_label = f"[ID:{i}] "
-                    if item.get('header'):
-                        display_label += f"【{item['header']}】 "
-                    content_preview = item.get('content', '')[:50] + "..."
-                    remaining_items.append({
-                        'index': i,
-                        'item': item,
-                        'label': display_label + content_preview
-                    })
-
-            # Застосовуємо сортування тільки до блоків, що залишилися
-            if remaining_items:
-                # Витягуємо тільки мітки для передачі в sort_items
-                labels_only = [item_info['label'] for item_info in remaining_items]
-                sorted_labels = sort_items(labels_only, direction="vertical")
-            else:
-                sorted_labels = []
-
-            # 2. Визначаємо впорядкований список
-            ordered_content = []
-            if sorted_labels and len(sorted_labels) > 0:
-                # Відновлюємо порядок елементів на основі відсортованих міток
-                for label in sorted_labels:
-                    # Знайдемо відповідний елемент у списку, що залишилися
-                    for item_info in remaining_items:
-                        if item_info['label'] == label:
-                            ordered_content.append(item_info['item'])
-                            break
-            else:
-                # Якщо сортування не застосовувалося, просто виключаємо видалені
-                ordered_content = [item for i, item in enumerate(sorted_selected_content) if i not in st.session_state['deleted_blocks']]
-
-            # 3. Редагування контенту (ВИДАЛЕНО ЗА ЗАПИТОМ)
-            # st.markdown("### ✏️ Редагування вмісту")
-            # ...
-            pass
-        else:
-            ordered_content = []
+        # Секция сортування (фрагмент; при повному rerun виконується до експорту)
+        ordering_section(store)
+        ordered_content = st.session_state.get('ordered_content') or []
+    else:
+        ordered_content = []
 
     # Секції 6, 7, 8 показуємо якщо processing_done або empty_dossier_mode
     if show_advanced:
@@ -678,418 +1237,21 @@ def main():
         
         tab_dms, tab_arkan, tab_real_estate, tab_car, tab_pension = st.tabs(["🏛️ ДМС", "🚢 Аркан", "🏢 Нерухомість", "🚗 АВТО", "🏦 Пенсійний"])
 
+        # Кожна вкладка - окремий фрагмент: дії в ній перерисовують лише її
         with tab_dms:
-            uploaded_dms = st.file_uploader(
-                "Завантажте PDF файл (ДМС)",
-                type=['pdf'],
-                key="dms_pdf_uploader"
-            )
-
-            if uploaded_dms:
-                if st.session_state.get('last_uploaded_dms') != uploaded_dms.name:
-                    with st.spinner("Обробка PDF ДМС..."):
-                        dms_info, photo_bytes, error = extract_dms_data(uploaded_dms)
-                        if error:
-                            st.error(error)
-                        else:
-                            st.success(f"✅ Дані з файлу {uploaded_dms.name} успішно зчитано")
-                            st.session_state['dms_data'] = {
-                                'info': dms_info,
-                                'photo_bytes': photo_bytes
-                            }
-                            st.session_state['last_uploaded_dms'] = uploaded_dms.name
-                            if photo_bytes:
-                                st.session_state['photo_data'] = base64.b64encode(photo_bytes).decode()
-
-            if st.session_state.get('dms_data'):
-                st.info(f"📁 Використовуються дані ДМС з: {st.session_state.get('last_uploaded_dms')}")
-                if st.button("❌ Очистити дані ДМС"):
-                    st.session_state['dms_data'] = None
-                    st.session_state['last_uploaded_dms'] = None
-                    st.rerun()
+            dms_section(store)
 
         with tab_arkan:
-            uploaded_excel = st.file_uploader(
-                "Завантажте Excel файл (Аркан)",
-                type=['xlsx', 'xls'],
-                key="arkan_excel_uploader"
-            )
-
-            if uploaded_excel:
-                if st.session_state.get('last_uploaded_arkan') != uploaded_excel.name:
-                    with st.spinner("Обробка Excel файлу..."):
-                        border_data, error = process_excel_to_data(uploaded_excel)
-                        if error:
-                            st.error(error)
-                        else:
-                            st.success(f"✅ Дані з файлу {uploaded_excel.name} успішно зчитано")
-                            st.session_state['border_crossing_data'] = border_data
-                            st.session_state['last_uploaded_arkan'] = uploaded_excel.name
-
-            if st.session_state.get('border_crossing_data'):
-                st.info(f"📁 Використовуються дані Аркан з: {st.session_state.get('last_uploaded_arkan')}")
-                if st.button("❌ Очистити дані Аркан"):
-                    st.session_state['border_crossing_data'] = None
-                    st.session_state['last_uploaded_arkan'] = None
-                    st.rerun()
+            arkan_section(store)
 
         with tab_real_estate:
-            uploaded_real_estate = st.file_uploader(
-                "Завантажте PDF файл (Нерухомість)",
-                type=['pdf'],
-                accept_multiple_files=True,
-                key="real_estate_pdf_uploader"
-            )
-
-            if uploaded_real_estate:
-                if st.session_state.get('last_uploaded_real_estate') != uploaded_real_estate[0].name:
-                    with st.spinner("Обробка PDF файлів нерухомості..."):
-                        all_real_estate_data = []
-                        
-                        for uploaded_file in uploaded_real_estate:
-                            # Seek to the beginning of the file
-                            uploaded_file.seek(0)
-                            
-                            real_estate_data, error = parse_real_estate_pdf(uploaded_file)
-                            
-                            if error:
-                                st.error(f"Помилка обробки файлу {uploaded_file.name}: {error}")
-                            else:
-                                if real_estate_data:
-                                    all_real_estate_data.extend(real_estate_data)
-                        
-                        if all_real_estate_data:
-                            st.session_state['real_estate_data'] = all_real_estate_data
-                            st.success(f"✅ Дані з файлів нерухомості успішно зчитано. Знайдено {len(all_real_estate_data)} записів.")
-                        else:
-                            st.warning("Не знайдено даних про нерухомість у завантажених файлах.")
-                        
-                        st.session_state['last_uploaded_real_estate'] = uploaded_real_estate[0].name
-
-            if st.session_state.get('real_estate_data'):
-                st.info(f"📁 Використовуються дані нерухомості")
-                
-                # Отображаем извлеченные данные для проверки
-                with st.expander("🔍 Перегляд даних нерухомості", expanded=False):
-                    real_estate_data = st.session_state['real_estate_data']
-                    for idx, item in enumerate(real_estate_data):
-                        st.write(f"**Об'єкт нерухомості #{idx + 1}:**")
-                        for key, value in item.items():
-                            if value:
-                                st.write(f"- {key}: {value}")
-                        st.write("---")  # Разделитель между объектами
-                
-                if st.button("❌ Очистити дані нерухомості"):
-                    st.session_state['real_estate_data'] = None
-                    st.session_state['last_uploaded_real_estate'] = None
-                    st.rerun()
+            real_estate_section(store)
 
         with tab_car:
-            # Ініціалізація session_state для даних про ТЗ
-            if 'car_files_data' not in st.session_state:
-                st.session_state['car_files_data'] = []
-            if 'car_manual_entries' not in st.session_state:
-                st.session_state['car_manual_entries'] = []
-
-            st.markdown("##### **Або додати вручну:**")
-
-            # Кнопка додавання запису
-            if st.button("➕ Додати запис (ручний ввід)", key="add_manual_car"):
-                st.session_state['car_manual_entries'].append({
-                    'text': '',
-                    'source': 'manual'
-                })
-                st.rerun()
-
-            # Показуємо вручну додані записи
-            if st.session_state.get('car_manual_entries'):
-                st.markdown("**Ручний ввід:**")
-
-                for idx in range(len(st.session_state['car_manual_entries'])):
-                    item = st.session_state['car_manual_entries'][idx]
-
-                    col1, col2 = st.columns([2, 1])
-
-                    with col1:
-                        # Текстове поле
-                        text_key = f"manual_car_text_{idx}"
-                        new_text = st.text_area(
-                            f"Запис #{idx + 1}:",
-                            value=item.get('text', ''),
-                            key=text_key,
-                            height=150
-                        )
-                        st.session_state['car_manual_entries'][idx]['text'] = new_text
-
-                    with col2:
-                        # Кнопка видалення
-                        if st.button(f"❌ Видалити #{idx + 1}", key=f"delete_manual_car_{idx}"):
-                            st.session_state['car_manual_entries'].pop(idx)
-                            st.rerun()
-
-            st.markdown("---")
-            st.markdown("##### **Завантажити файли (Excel або текстові)**")
-            uploaded_car_files = st.file_uploader(
-                "Завантажте файли (Excel або текстові)",
-                type=['xlsx', 'xls', 'txt'],
-                accept_multiple_files=True,
-                key="car_files_uploader"
-            )
-
-            # Обробка завантажених файлів
-            if uploaded_car_files:
-                st.write(f"🔍 Вибрано файлів: **{len(uploaded_car_files)}**")
-                for f in uploaded_car_files:
-                    st.write(f"   • `{f.name}`")
-
-            if st.button("🔄 Обробити файли", type="primary", key="process_car_files_btn") and uploaded_car_files:
-                with st.spinner("Обробка файлів..."):
-                    all_car_data = []
-
-                    for uploaded_file in uploaded_car_files:
-                        try:
-                            st.write(f"⏳ Обробка `{uploaded_file.name}`...")
-
-                            # Визначаємо тип файлу
-                            file_ext = os.path.splitext(uploaded_file.name)[1].lower()
-
-                            if file_ext == '.txt':
-                                # Текстовий файл - парсинг даних про ТЗ
-                                content = uploaded_file.read().decode('utf-8')
-                                car_data = parse_vehicle_data(content)
-                                if car_data:
-                                    car_data['source'] = 'file'
-                                    car_data['filename'] = uploaded_file.name
-                                    all_car_data.append(car_data)
-                                    st.success(f"✅ `{uploaded_file.name}` - текстовий файл оброблено")
-
-                            elif file_ext in ['.xls', '.xlsx', '.xlsm']:
-                                # Excel файл
-                                try:
-                                    if file_ext == '.xls':
-                                        df = pd.read_excel(uploaded_file, engine='xlrd')
-                                    else:
-                                        df = pd.read_excel(uploaded_file, engine='openpyxl')
-                                    car_data = parse_excel_file(df)
-                                    if car_data:
-                                        car_data['source'] = 'file'
-                                        car_data['filename'] = uploaded_file.name
-                                        all_car_data.append(car_data)
-                                        st.success(f"✅ `{uploaded_file.name}` - Excel файл оброблено")
-                                except Exception as e:
-                                    st.error(f"❌ Помилка читання Excel `{uploaded_file.name}`: {e}")
-                                    # Пробуємо як текст
-                                    try:
-                                        uploaded_file.seek(0)
-                                        content = uploaded_file.read().decode('utf-8', errors='ignore')
-                                        car_data = parse_vehicle_data(content)
-                                        if car_data:
-                                            car_data['source'] = 'file'
-                                            car_data['filename'] = uploaded_file.name
-                                            all_car_data.append(car_data)
-                                    except Exception as e2:
-                                        st.error(f"❌ Помилка обробки `{uploaded_file.name}` як текст: {e2}")
-
-                            else:
-                                st.warning(f"⚠️ Невідомий формат файлу `{uploaded_file.name}`")
-
-                        except Exception as e:
-                            st.error(f"❌ Помилка обробки файлу `{uploaded_file.name}`: {e}")
-
-                    if all_car_data:
-                        st.session_state['car_files_data'].extend(all_car_data)
-                        st.success(f"✅ Всього оброблено: {len(all_car_data)} записів")
-                        st.rerun()
-                    elif not all_car_data:
-                        st.warning("⚠️ Не вдалося витягти дані з жодного файлу. Перевірте формат даних.")
-
-            # Об'єднуємо дані з файлів та ручного вводу
-            all_car_results = []
-
-            # Додаємо дані з файлів
-            for item in st.session_state.get('car_files_data', []):
-                all_car_results.append(item)
-
-            # Додаємо дані з ручного вводу
-            for item in st.session_state.get('car_manual_entries', []):
-                if item.get('text'):
-                    parsed_data = parse_vehicle_data(item['text'])
-                    if parsed_data:
-                        parsed_data['source'] = 'manual'
-                        all_car_results.append(parsed_data)
-
-            if all_car_results:
-                st.info(f"📊 Всього записів про ТЗ: {len(all_car_results)}")
-
-                # Відображаємо результати
-                for idx, item in enumerate(all_car_results):
-                    with st.expander(f"🚗 ТЗ #{idx + 1}", expanded=False):
-                        col1, col2 = st.columns([2, 1])
-
-                        with col1:
-                            st.write("**Поля:**")
-                            for key, value in item.items():
-                                if key not in ['source', 'filename'] and value:
-                                    st.write(f"• **{key}:** {value}")
-
-                            if item.get('source') == 'file':
-                                st.write(f"• **Джерело:** Файл `{item.get('filename', '')}`")
-                            else:
-                                st.write(f"• **Джерело:** Ручний ввід")
-
-                        with col2:
-                            # Форматований вивід
-                            formatted_parts = []
-                            if item.get('номерний_знак'):
-                                formatted_parts.append(f"Номерний знак: {item['номерний_знак']}")
-                            if item.get('марка') or item.get('модель'):
-                                brand_model = f"{item.get('марка', '')} {item.get('модель', '')}".strip()
-                                formatted_parts.append(f"ТЗ: {brand_model}")
-                            if item.get('vin'):
-                                formatted_parts.append(f"VIN: {item['vin']}")
-                            if item.get('колір'):
-                                formatted_parts.append(f"Колір: {item['колір']}")
-                            
-                            if item.get('рік_випуску'):
-                                formatted_parts.append(f"Рік випуску: {item['рік_випуску']}")
-
-                            formatted_text = ', '.join(formatted_parts) + '.' if formatted_parts else 'Немає даних'
-                            st.success(formatted_text)
-
-            # Зберігаємо об'єднані дані в session_state для експорту
-            if all_car_results:
-                st.session_state['combined_car_data'] = all_car_results
-            else:
-                st.session_state['combined_car_data'] = None
-
-            # Кнопка очищення
-            if st.button("🧹 Очистити всі дані про ТЗ", key="clear_all_car_data"):
-                st.session_state['car_files_data'] = []
-                st.session_state['car_manual_entries'] = []
-                st.session_state['combined_car_data'] = None
-                st.rerun()
+            car_section(store)
 
         with tab_pension:
-            st.markdown("##### **Вставте текст з реєстру ІПНП**")
-            
-            # Ініціалізація session_state
-            if 'pension_data' not in st.session_state:
-                st.session_state['pension_data'] = None
-            if 'pension_raw_text' not in st.session_state:
-                st.session_state['pension_raw_text'] = ""
-            
-            # Поле для вставки тексту
-            pension_text = st.text_area(
-                "Текст з реєстру Пенсійного фонду",
-                value=st.session_state.get('pension_raw_text', ''),
-                placeholder='Вставте сюди рядок з ІПНП...\nНаприклад: ПРИВАТНЕ АКЦІОНЕРНЕ ТОВАРИСТВО "ІСРЗ" 32333962 01.08.2014',
-                height=150,
-                label_visibility="collapsed",
-                key="pension_text_area"
-            )
-            
-            # Зберігаємо введений текст
-            st.session_state['pension_raw_text'] = pension_text
-            
-            # Кнопка перевірки
-            if st.button("🔎  Перевірити в FinAP"):
-                if not pension_text.strip():
-                    st.warning("⚠️ Введіть текст для обробки")
-                else:
-                    with st.spinner("Обробка даних з ПФУ..."):
-                        result = process_pension_data(pension_text)
-
-                        if result['error']:
-                            st.error(f"❌ {result['error']}")
-                            st.session_state['pension_data'] = None
-                        else:
-                            st.session_state['pension_data'] = result
-                            st.success("✅ Дані успішно оброблено")
-                            st.rerun()
-            
-            # Відображення результатів
-            if st.session_state.get('pension_data') and st.session_state['pension_data'].get('finap_info'):
-                data = st.session_state['pension_data']
-                parsed = data['parsed']
-                info = data['finap_info']
-                
-                # Визначаємо тип коду
-                code_label = "РНОКПП" if (parsed.edrpou and len(parsed.edrpou) == 10) else "ЄДРПОУ"
-                
-                # Попередній перегляд розпарсеного
-                chips_html = '<div style="display: flex; gap: 8px; flex-wrap: wrap; margin: 0.8rem 0 1.4rem;">'
-                chips_html += f'<div style="background: #151820; border: 1px solid #252A36; border-radius: 20px; padding: 4px 12px; font-family: monospace; font-size: 0.72rem; color: #8A94A6;">🏢 Назва<span style="color: #00E5A0; margin-left: 4px;">{parsed.company_name or "—"}</span></div>'
-                chips_html += f'<div style="background: #151820; border: 1px solid #252A36; border-radius: 20px; padding: 4px 12px; font-family: monospace; font-size: 0.72rem; color: #8A94A6;">🔢 {code_label}<span style="color: #00E5A0; margin-left: 4px;">{parsed.edrpou or "—"}</span></div>'
-                chips_html += f'<div style="background: #151820; border: 1px solid #252A36; border-radius: 20px; padding: 4px 12px; font-family: monospace; font-size: 0.72rem; color: #8A94A6;">📅 Дата внеску<span style="color: #00E5A0; margin-left: 4px;">{parsed.last_payment_date or "—"}</span></div>'
-                chips_html += '</div>'
-                st.markdown(chips_html, unsafe_allow_html=True)
-                
-                # Картка з результатами
-                status_val = info.get('status', '—')
-                if "ЗАРЕЄСТРОВАНО" in status_val.upper() and "ПРИПИНЕНО" not in status_val.upper():
-                    status_html = f'<span style="display: inline-block; background: rgba(0,229,160,0.12); color: #00E5A0; border-radius: 4px; padding: 2px 10px; font-size: 0.78rem; font-family: monospace;">{status_val}</span>'
-                else:
-                    status_html = f'<span style="display: inline-block; background: rgba(255,80,80,0.12); color: #FF5050; border-radius: 4px; padding: 2px 10px; font-size: 0.78rem; font-family: monospace;">{status_val}</span>'
-                
-                card = f"""
-<div style="background: #151820; border: 1px solid #1E2430; border-radius: 12px; padding: 1.5rem 1.8rem; margin-top: 1rem;">
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">🏢</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Назва</div>
-    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['name']}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">🔢</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">{code_label}</div>
-    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{parsed.edrpou}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">📍</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Адреса</div>
-    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['address']}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">👤</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Керівник</div>
-    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['manager']}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">🏭</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Вид діяльності</div>
-    <div style="font-size: 0.88rem; color: #E8EAF0;">{info['kved']}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">📊</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Статус</div>
-    <div style="font-size: 0.88rem; color: #E8EAF0;">{status_html}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">📧</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Email</div>
-    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{info['email'] or "—"}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; border-bottom: 1px solid #1A1F2A; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">📞</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Телефон</div>
-    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{info['phone'] or "—"}</div>
-  </div>
-  <div style="display: flex; align-items: flex-start; padding: 0.65rem 0; gap: 1rem;">
-    <div style="font-size: 1rem; min-width: 24px;">📅</div>
-    <div style="font-family: monospace; font-size: 0.68rem; color: #556070; text-transform: uppercase; letter-spacing: 0.07em; min-width: 130px;">Остання дата внеску</div>
-    <div style="font-family: monospace; font-size: 0.82rem; color: #E8EAF0;">{parsed.last_payment_date or '—'}</div>
-  </div>
-</div>
-"""
-                st.markdown(card, unsafe_allow_html=True)
-                
-                # Інформація для виводу в Word
-                st.markdown(f"<div style='font-size: 0.85rem; margin-top: 1rem; color: #8A94A6; font-family: monospace;'>{data['formatted_line']}</div>", unsafe_allow_html=True)
-                
-                # Кнопка очищення
-                if st.button("❌ Очистити дані Пенсійний"):
-                    st.session_state['pension_data'] = None
-                    st.session_state['pension_raw_text'] = ""
-                    st.rerun()
+            pension_section()
 
         # Секція 7: Родинні зв'язки
         st.markdown("---")
@@ -1106,108 +1268,7 @@ def main():
 
         for i, relative_type in enumerate(relatives):
             with family_tabs[i]:
-                st.markdown("##### **Завантажити PDF файли (ДМС)**")
-                uploaded_family_pdfs = st.file_uploader(
-                    f"Завантажте PDF файли ДМС ({relative_type})",
-                    type=['pdf'],
-                    accept_multiple_files=True,
-                    key=f"family_pdf_{relative_type}"
-                )
-
-                # Обробка завантажених файлів
-                if uploaded_family_pdfs:
-                    files_key = f"last_uploaded_family_{relative_type}"
-                    current_files = [f.name for f in uploaded_family_pdfs]
-                    last_files = st.session_state.get(files_key, [])
-
-                    if current_files != last_files:
-                        with st.spinner(f"Обробка PDF файлів {relative_type}..."):
-                            if relative_type not in st.session_state['family_data']:
-                                st.session_state['family_data'][relative_type] = []
-
-                            for pdf_file in uploaded_family_pdfs:
-                                dms_info, photo_bytes, error = extract_dms_data(pdf_file)
-                                if error:
-                                    st.error(f"Помилка у файлі {pdf_file.name}: {error}")
-                                else:
-                                    st.success(f"✅ Дані родича ({relative_type}) з файлу {pdf_file.name} успішно зчитано")
-                                    st.session_state['family_data'][relative_type].append({
-                                        'info': dms_info,
-                                        'photo_bytes': photo_bytes,
-                                        'source': 'pdf',
-                                        'filename': pdf_file.name
-                                    })
-
-                            st.session_state[files_key] = current_files
-
-                # Показуємо завантажені дані
-                if relative_type in st.session_state['family_data'] and st.session_state['family_data'][relative_type]:
-                    st.markdown("##### **Завантажені дані з PDF:**")
-                    for idx, item in enumerate(st.session_state['family_data'][relative_type]):
-                        col1, col2 = st.columns([4, 1])
-                        with col1:
-                            st.info(f"📁 Файл: {item.get('filename', 'Невідомо')}")
-                        with col2:
-                            if st.button(f"❌", key=f"delete_pdf_{relative_type}_{idx}", help="Видалити"):
-                                st.session_state['family_data'][relative_type].pop(idx)
-                                st.rerun()
-
-                st.markdown("---")
-                st.markdown("##### **Або додати вручну:**")
-
-                # Кнопка додавання нового запису
-                if st.button(f"➕ Додати запис ({relative_type})", key=f"add_manual_{relative_type}"):
-                    if relative_type not in st.session_state['family_manual_data']:
-                        st.session_state['family_manual_data'][relative_type] = []
-                    st.session_state['family_manual_data'][relative_type].append({
-                        'text': '',
-                        'photo_bytes': None
-                    })
-                    st.rerun()
-
-                # Показуємо вручну додані записи
-                if relative_type in st.session_state['family_manual_data'] and st.session_state['family_manual_data'][relative_type]:
-                    for idx, item in enumerate(st.session_state['family_manual_data'][relative_type]):
-                        st.markdown(f"**Запис #{idx + 1}:**")
-                        col1, col2 = st.columns([1, 2])
-
-                        with col1:
-                            # Завантаження фото для запису
-                            uploaded_photo = st.file_uploader(
-                                "Фото",
-                                type=['png', 'jpg', 'jpeg'],
-                                key=f"manual_photo_{relative_type}_{idx}"
-                            )
-
-                            if uploaded_photo:
-                                img = Image.open(uploaded_photo)
-                                buffered = BytesIO()
-                                img.save(buffered, format="PNG")
-                                st.session_state['family_manual_data'][relative_type][idx]['photo_bytes'] = buffered.getvalue()
-                                st.image(img, width=150)
-                            elif item.get('photo_bytes'):
-                                st.image(Image.open(BytesIO(item['photo_bytes'])), width=150)
-                            elif os.path.exists('default_avatar.png'):
-                                st.image('default_avatar.png', width=150)
-
-                        with col2:
-                            # Текстове поле для введення даних
-                            text_key = f"manual_text_{relative_type}_{idx}"
-                            current_text = item.get('text', '')
-                            new_text = st.text_area(
-                                "Текст (використовуйте формат \"Ключ: значення\" для кожного поля)",
-                                value=current_text,
-                                key=text_key,
-                                height=150
-                            )
-                            st.session_state['family_manual_data'][relative_type][idx]['text'] = new_text
-
-                        # Кнопка видалення запису
-                        if st.button(f"❌ Видалити запис #{idx + 1}", key=f"delete_manual_{relative_type}_{idx}"):
-                            st.session_state['family_manual_data'][relative_type].pop(idx)
-                            st.rerun()
-
-                        st.markdown("---")
+                family_section(store, relative_type)
 
         # Секція експорту
         st.markdown("---")
@@ -1225,12 +1286,7 @@ def main():
                 if st.button("📥 Завантажити DOCX", type="primary"):
                     with st.spinner("Генерація DOCX..."):
                         try:
-                            photo_bytes = None
-                            if 'photo_data' in st.session_state:
-                                photo_bytes = base64.b64decode(st.session_state['photo_data'])
-                            elif os.path.exists('default_avatar.png'):
-                                with open('default_avatar.png', 'rb') as f:
-                                    photo_bytes = f.read()
+                            photo_bytes = store.get('photo_bytes') or default_image('default_avatar.png')
 
                             family_list = []
                             if 'family_data' in st.session_state:
@@ -1239,16 +1295,17 @@ def main():
                                         family_list.append({
                                             'relative_type': rel_type,
                                             'info': rel_item['info'],
-                                            'photo_bytes': rel_item['photo_bytes']
+                                            'photo_bytes': store.get(rel_item['photo_key'])
                                         })
                             if 'family_manual_data' in st.session_state:
                                 for rel_type, manual_list in st.session_state['family_manual_data'].items():
                                     for manual_item in manual_list:
-                                        if manual_item.get('text') or manual_item.get('photo_bytes'):
+                                        manual_photo = store.get(manual_item['photo_key'])
+                                        if manual_item.get('text') or manual_photo:
                                             family_list.append({
                                                 'relative_type': rel_type,
                                                 'manual_text': manual_item.get('text', ''),
-                                                'photo_bytes': manual_item.get('photo_bytes')
+                                                'photo_bytes': manual_photo
                                             })
 
                             # Визначаємо заповнені блоки з PDF
@@ -1273,31 +1330,40 @@ def main():
                                                     filled_blocks[dossier_header] = content
                                                 break
 
-                            # Якщо режим порожнього досьє або немає контенту з PDF
-                            if st.session_state.get('empty_dossier_mode') or not ordered_content:
-                                docx_data = generate_empty_dossier(
-                                    photo_bytes=photo_bytes,
-                                    border_crossing_data=st.session_state.get('border_crossing_data'),
-                                    dms_data=st.session_state.get('dms_data'),
-                                    family_data=family_list,
-                                    real_estate_data=st.session_state.get('real_estate_data'),
-                                    car_data=st.session_state.get('combined_car_data'),
-                                    pension_data=st.session_state.get('pension_data'),
-                                    filled_blocks=filled_blocks
-                                )
-                                filename = "Dossier.docx"
-                            else:
-                                docx_data = generate_docx(
-                                    {"Контент": ordered_content},
-                                    photo_bytes=photo_bytes,
-                                    border_crossing_data=st.session_state.get('border_crossing_data'),
-                                    dms_data=st.session_state.get('dms_data'),
-                                    family_data=family_list,
-                                    real_estate_data=st.session_state.get('real_estate_data'),
-                                    car_data=st.session_state.get('combined_car_data'),
-                                    pension_data=st.session_state.get('pension_data')
-                                )
-                                filename = get_filename_from_intro({"Контент": ordered_content})
+                            car_data = collect_car_data(store) or None
+
+                            # Документ пишеться потоково у тимчасовий файл по секціях, без повного
+                            # дерева python-docx і проміжних копій у пам'яті
+                            with tempfile.TemporaryFile() as docx_file:
+                                # Якщо режим порожнього досьє або немає контенту з PDF
+                                if st.session_state.get('empty_dossier_mode') or not ordered_content:
+                                    generate_empty_dossier(
+                                        photo_bytes=photo_bytes,
+                                        border_crossing_data=store.get('border_crossing_data'),
+                                        dms_data=store.get('dms_data'),
+                                        family_data=family_list,
+                                        real_estate_data=store.get('real_estate_data'),
+                                        car_data=car_data,
+                                        pension_data=st.session_state.get('pension_data'),
+                                        filled_blocks=filled_blocks,
+                                        output=docx_file
+                                    )
+                                    filename = "Dossier.docx"
+                                else:
+                                    generate_docx(
+                                        {"Контент": ordered_content},
+                                        photo_bytes=photo_bytes,
+                                        border_crossing_data=store.get('border_crossing_data'),
+                                        dms_data=store.get('dms_data'),
+                                        family_data=family_list,
+                                        real_estate_data=store.get('real_estate_data'),
+                                        car_data=car_data,
+                                        pension_data=st.session_state.get('pension_data'),
+                                        output=docx_file
+                                    )
+                                    filename = get_filename_from_intro({"Контент": ordered_content})
+                                docx_file.seek(0)
+                                docx_data = docx_file.read()
 
                             st.download_button(
                                 label="💾 Зберегти DOCX",
@@ -1313,7 +1379,8 @@ def main():
             st.markdown("---")
             if st.button("🧹 Завершити та очистити все", help="Це видалить усі тимчасові фото та скине вибір"):
                 cleanup_temp_photos()
-                keys_to_keep = ['processing_done', 'all_paragraphs']
+                store.clear(keep=('all_paragraphs',))
+                keys_to_keep = ['processing_done', 'session_store']
                 for key in list(st.session_state.keys()):
                     if key not in keys_to_keep:
                         del st.session_state[key]
@@ -1323,6 +1390,8 @@ def main():
         if not st.session_state.get('empty_dossier_mode', False):
             st.info("👆 Завантажте PDF файли для початку роботи або активуйте 'Створити порожнє досьє'")
 
+    render_performance_panel()
+
 
 if __name__ == "__main__":
     st.set_page_config(
@@ -1331,7 +1400,7 @@ if __name__ == "__main__":
         layout="wide"
     )
     # Перевіряємо наявність default_avatar.png
-    if not os.path.exists('default_avatar.png'):
+    if not default_image('default_avatar.png'):
         st.warning("⚠️ Файл default_avatar.png не знайдено. Створіть його або завантажте власне фото.")
 
     main()
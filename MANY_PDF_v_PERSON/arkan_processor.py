@@ -83,6 +83,23 @@ def process_excel_to_data(excel_file):
             pass
 
 
+# Рядок з часом формування; у секції з кешу фрагментів досьє його оновлює refresh_operative_info()
+OPERATIVE_INFO_PREFIX = "Оперативна iнформацiя станом на"
+
+
+def operative_info_text() -> str:
+    now = datetime.datetime.now()
+    return f"{OPERATIVE_INFO_PREFIX} {now.strftime('%d.%m.%Y %H:%M')} "
+
+
+def refresh_operative_info(doc: Document) -> None:
+    """Ставить поточний час у рядок «Оперативна інформація станом на» документа."""
+    text = operative_info_text()
+    for paragraph in doc.paragraphs:
+        if paragraph.text.startswith(OPERATIVE_INFO_PREFIX) and paragraph.runs:
+            paragraph.runs[0].text = text
+
+
 def append_border_crossing_to_doc(doc: Document, border_data: list):
     """
     Додає секцію з даними про перетин кордону до існуючого документа.
@@ -159,8 +176,7 @@ def append_border_crossing_to_doc(doc: Document, border_data: list):
 Підстава для виїзду - {border_data[0][17]}"""
     
     text_paragraf_3 = doc.add_paragraph()
-    now = datetime.datetime.now()
-    text_paragraf_3.add_run(f"Оперативна iнформацiя станом на {now.strftime('%d.%m.%Y %H:%M')} ")
+    text_paragraf_3.add_run(operative_info_text())
     
     text_paragraf_1 = text_paragraf.add_run(text)
     text_paragraf_1.bold = True
@@ -195,18 +211,20 @@ def append_border_crossing_to_doc(doc: Document, border_data: list):
     table_1_2[3].text = 'Ділянка кордону'
     table_1_2[4].text = 'Тип ПП'
     
+    # Рядки border_data не змінюються: від них залежить ключ кешу секції
     for val in border_data:
-        if val[11] == 'Автомобільний транспорт':
-            val[11] = "aвто"
-        if val[11] == 'Повітряний транспорт':
-            val[11] = "лiтак"
+        pp_type = val[11]
+        if pp_type == 'Автомобільний транспорт':
+            pp_type = "aвто"
+        if pp_type == 'Повітряний транспорт':
+            pp_type = "лiтак"
         
         row_cells = table_1.add_row().cells
         row_cells[0].text = str(val[5])
         row_cells[1].text = str(val[0])
         row_cells[2].text = str(val[2])
         row_cells[3].text = str(val[4])
-        row_cells[4].text = str(val[11])
+        row_cells[4].text = str(pp_type)
     
     # Таблиця 2: Транспорт
     text_2 = "2. Tранспорт"
@@ -234,15 +252,16 @@ def append_border_crossing_to_doc(doc: Document, border_data: list):
         if val[11] == 'Пішохід':
             continue
         
-        if val[12] == 'Легковий автомобіль':
-            val[12] = 'Легковий'
-        if val[12] == 'Літак пасажирський':
-            val[12] = 'Літак'
+        transport = val[12]
+        if transport == 'Легковий автомобіль':
+            transport = 'Легковий'
+        if transport == 'Літак пасажирський':
+            transport = 'Літак'
         
         row_cells = table_2.add_row().cells
         row_cells[0].text = str(val[5])
         row_cells[1].text = str(val[0])
         row_cells[2].text = str(val[3])
-        row_cells[3].text = str(val[12])
+        row_cells[3].text = str(transport)
         row_cells[4].text = str(val[13])
         row_cells[5].text = str(val[14])
@@ -10,11 +10,16 @@ from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 import io
 import os
-try:
-    from .image_search import get_car_image
-except ImportError:
-    # Если относительный импорт не работает, используем абсолютный
-    from image_search import get_car_image
+
+
+def _get_car_image(**kwargs):
+    """Пошук фото ТЗ; image_search (ddgs) імпортується лише при першому виклику."""
+    try:
+        from .image_search import get_car_image
+    except ImportError:
+        # Если относительный импорт не работает, используем абсолютный
+        from image_search import get_car_image
+    return get_car_image(**kwargs)
 
 
 def append_car_to_doc(doc: Document, car_data: list, header_name="АМТ (НАІС)"):
@@ -96,7 +101,7 @@ def append_car_to_doc(doc: Document, car_data: list, header_name="АМТ (НАІ
         year = car.get('рік_випуску', '')
 
         if brand or color:
-            car_image_bytes = get_car_image(brand=brand, model=model, color=color, year=year)
+            car_image_bytes = _get_car_image(brand=brand, model=model, color=color, year=year)
 
         # Додаємо зображення в ліву клітинку, якщо воно доступне
         if car_image_bytes:
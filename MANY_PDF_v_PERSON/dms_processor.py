@@ -6,8 +6,6 @@
 import fitz
 import re
 import requests
-from bs4 import BeautifulSoup
-from lxml import etree
 from docx.shared import Inches, Pt, RGBColor, Mm, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
@@ -16,7 +14,17 @@ import io
 import os
 import random
 import datetime
+import sys
 
+# Спільні ресурси процесу лежать у корені репозиторію
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from shared_resources import default_image
+from stage_timing import timed_stage
+
+@timed_stage("fop")
 def fop(ipn):
     """Перевірка статусу ФОП через YouControl"""
     if not ipn or ipn == 'невідомо':
@@ -26,6 +34,10 @@ def fop(ipn):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Safari/537.36'
     }
 
+    # bs4/lxml потрібні лише тут - імпорт відкладено до першої перевірки
+    from bs4 import BeautifulSoup
+    from lxml import etree
+
     try:
         pages = requests.get(f'https://youcontrol.com.ua/search/?country=1&q={ipn}', headers=headers, timeout=10)
         if not pages.ok:
@@ -42,6 +54,7 @@ def fop(ipn):
     except Exception:
         return False
 
+@timed_stage("extract_dms_data")
 def extract_dms_data(pdf_file):
     """
     Вилучає дані з PDF файлу ДМС.
@@ -240,10 +253,10 @@ def append_dms_to_doc(doc, dms_info, photo_bytes=None, header_name="ІНФОРМ
         p_img = left_cell.paragraphs[0]
         run_img = p_img.add_run()
         run_img.add_picture(io.BytesIO(photo_bytes), width=Inches(1.6))
-    elif os.path.exists('default_avatar.png'):
+    elif default_image('default_avatar.png'):
         p_img = left_cell.paragraphs[0]
         run_img = p_img.add_run()
-        run_img.add_picture('default_avatar.png', width=Inches(1.6))
+        run_img.add_picture(io.BytesIO(default_image('default_avatar.png')), width=Inches(1.6))
         
     # Основна інформація в праву клітинку
     p = right_cell.paragraphs[0]
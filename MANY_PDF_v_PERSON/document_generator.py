@@ -10,7 +10,7 @@ from PIL import Image
 import io
 import os
 from datetime import datetime
-from arkan_processor import append_border_crossing_to_doc
+from arkan_processor import append_border_crossing_to_doc, refresh_operative_info
 from dms_processor import append_dms_to_doc
 from real_estate_processor import append_real_estate_to_doc
 try:
@@ -21,6 +21,11 @@ try:
     from .pension_processor import process_pension_data
 except ImportError:
     from pension_processor import process_pension_data
+# Спільні ресурси процесу (корінь репозиторію додає до шляху real_estate_processor)
+from shared_resources import default_image
+from stage_timing import timed_stage
+from docx_fragments import render_fragment
+from docx_stream import StreamingDocxWriter
 
 
 import re
@@ -76,11 +81,21 @@ def get_filename_from_intro(data: dict) -> str:
     return "Dossier.docx"
 
 
-def generate_docx(data: dict, photo_bytes: bytes = None, border_crossing_data: list = None, dms_data: dict = None, family_data: list = None, real_estate_data: list = None, car_data: list = None, pension_data: dict = None) -> bytes:
+@timed_stage("generate_docx")
+def generate_docx(data: dict, photo_bytes: bytes = None, border_crossing_data: list = None, dms_data: dict = None, family_data: list = None, real_estate_data: list = None, car_data: list = None, pension_data: dict = None, output=None) -> bytes:
     """
     Генерує документ Word з вибраних абзаців.
+
+    Без output повертає bytes DOCX. З output (шлях або двійковий файловий
+    об'єкт) документ пишеться туди потоково, секція за секцією
+    (StreamingDocxWriter), і повертається output.
     """
     doc = Document()
+    stream = StreamingDocxWriter(doc, output) if output is not None else None
+
+    def flush_sections():
+        if stream:
+            stream.flush()
 
     # Налаштування полів сторінки
     section = doc.sections[0]
@@ -164,34 +179,6 @@ def generate_docx(data: dict, photo_bytes: bytes = None, border_crossing_data: l
             run.font.name = 'Times New Roman'
             run.font.size = Pt(14)
 
-    # Додаємо заголовки над блоком "АНАЛІТИЧНЕ ДОСЬЄ НА ОСОБУ"
-    p_analitic_profile = doc.add_paragraph()
-    p_analitic_profile.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p_analitic_profile.paragraph_format.space_before = Pt(0)
-    p_analitic_profile.paragraph_format.space_after = Pt(0)
-    p_analitic_profile.paragraph_format.line_spacing = 1.15  # Устанавливаем межстрочный интервал 1,15
-    run_analitic_profile = p_analitic_profile.add_run("АНАЛІТИЧНИЙ ПРОФІЛЬ")
-    run_analitic_profile.bold = True
-    run_analitic_profile.font.size = Pt(14)
-
-
-    p_on_person = doc.add_paragraph()
-    p_on_person.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p_on_person.paragraph_format.space_before = Pt(0)
-    p_on_person.paragraph_format.space_after = Pt(0)
-    p_on_person.paragraph_format.line_spacing = 1.15  # Устанавливаем межстрочный интервал 1,15
-    run_on_person = p_on_person.add_run("на фізичну особу")
-    run_on_person.bold = True
-    run_on_person.font.size = Pt(14)
-
-
-    # Пустая строка после "на фізичну особу"
-    empty_line_after_person = doc.add_paragraph()
-    empty_line_after_person.paragraph_format.space_before = Pt(0)
-    empty_line_after_person.paragraph_format.space_after = Pt(0)
-    empty_line_after_person.paragraph_format.line_spacing = 1.15
-
-
     # Шукаємо вступний текст (Початок документа)
     content_list = data.get("Контент", [])
     intro_text = ""
@@ -213,151 +200,184 @@ def generate_docx(data: dict, photo_bytes: bytes = None, border_crossing_data: l
          final_photo_bytes = dms_data['photo_bytes']
     elif photo_bytes:
          final_photo_bytes = photo_bytes
-    elif os.path.exists('default_avatar.png'):
-         with open('default_avatar.png', 'rb') as f:
-             final_photo_bytes = f.read()
-
-    # ЛОГІКА ЗАМІНИ АНКЕТНИХ ДАНИХ НА ДМС
-    if dms_data and dms_data.get('info'):
-        # Виводимо ДМС першим блоком із заголовком "ІНФОРМАЦІЯ З ДМС"
-        append_dms_to_doc(doc, dms_data['info'], photo_bytes=final_photo_bytes, header_name="ІНФОРМАЦІЯ З ДМС")
     else:
-        # 1. ЗАГАЛЬНИЙ ЗАГОЛОВОК (тільки якщо немає ДМС)
-        t_top = doc.add_table(rows=1, cols=1)
-        t_top.width = Inches(6.5)
-        cell_top = t_top.rows[0].cells[0]
-        
-        shd = OxmlElement('w:shd')
-        shd.set(qn('w:fill'), '9BC2E6')
-        cell_top._element.get_or_add_tcPr().append(shd)
-        
-        p_top = cell_top.paragraphs[0]
-        p_top.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        p_top.paragraph_format.space_before = Pt(0)
-        p_top.paragraph_format.space_after = Pt(0)
-        run_top = p_top.add_run("       " + "АНКЕТНІ ДАНІ:")
-        run_top.bold = True
-        run_top.italic = True
-        run_top.font.size = Pt(14)
-
-        # 2. Створюємо стандартну вступну таблицю (АНКЕТНІ ДАНІ), якщо немає ДМС
-        spacer = doc.add_paragraph()
-        spacer.paragraph_format.space_before = Mm(3)
-        spacer.paragraph_format.space_after = Mm(0)
-        spacer.paragraph_format.line_spacing = 0
-
-        table = doc.add_table(rows=1, cols=2)
-        table.autofit = False
-        
-        left_cell = table.rows[0].cells[0]
-        left_cell.width = Inches(2.0)
-        if final_photo_bytes:
-            paragraph = left_cell.paragraphs[0]
-            run = paragraph.add_run()
-            run.add_picture(BytesIO(final_photo_bytes), width=Inches(1.8))
-            
-        right_cell = table.rows[0].cells[1]
-        right_cell.width = Inches(4.5)
-        right_cell.vertical_alignment = 1
-
-        # Очищаємо стандартні параграфи у правій клітинці перед додаванням контенту
-        for para in right_cell.paragraphs:
-            para.clear()
-
-        if intro_text:
-            intro_text = intro_text.replace("д.н.", "").replace("  ", " ")
-            add_bulleted_content(right_cell, intro_text, alignment=WD_ALIGN_PARAGRAPH.LEFT,
-                                 use_bullet_style=False, bold_matches=True, bold_content=True, pattern=BOLD_PATTERN, exclude_pattern=INTRO_PATTERN, use_first_paragraph=True)
+         final_photo_bytes = default_image('default_avatar.png')
+
+    def render_intro(intro_text):
+        # Додаємо заголовки над блоком "АНАЛІТИЧНЕ ДОСЬЄ НА ОСОБУ"
+        p_analitic_profile = doc.add_paragraph()
+        p_analitic_profile.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        p_analitic_profile.paragraph_format.space_before = Pt(0)
+        p_analitic_profile.paragraph_format.space_after = Pt(0)
+        p_analitic_profile.paragraph_format.line_spacing = 1.15  # Устанавливаем межстрочный интервал 1,15
+        run_analitic_profile = p_analitic_profile.add_run("АНАЛІТИЧНИЙ ПРОФІЛЬ")
+        run_analitic_profile.bold = True
+        run_analitic_profile.font.size = Pt(14)
+
+
+        p_on_person = doc.add_paragraph()
+        p_on_person.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        p_on_person.paragraph_format.space_before = Pt(0)
+        p_on_person.paragraph_format.space_after = Pt(0)
+        p_on_person.paragraph_format.line_spacing = 1.15  # Устанавливаем межстрочный интервал 1,15
+        run_on_person = p_on_person.add_run("на фізичну особу")
+        run_on_person.bold = True
+        run_on_person.font.size = Pt(14)
+
+
+        # Пустая строка после "на фізичну особу"
+        empty_line_after_person = doc.add_paragraph()
+        empty_line_after_person.paragraph_format.space_before = Pt(0)
+        empty_line_after_person.paragraph_format.space_after = Pt(0)
+        empty_line_after_person.paragraph_format.line_spacing = 1.15
+
+        # ЛОГІКА ЗАМІНИ АНКЕТНИХ ДАНИХ НА ДМС
+        if dms_data and dms_data.get('info'):
+            # Виводимо ДМС першим блоком із заголовком "ІНФОРМАЦІЯ З ДМС"
+            append_dms_to_doc(doc, dms_data['info'], photo_bytes=final_photo_bytes, header_name="ІНФОРМАЦІЯ З ДМС")
         else:
-            title_paragraph = right_cell.paragraphs[0]
-            title_paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            title_run = title_paragraph.add_run("Особисте досьє")
-            title_run.font.size = Pt(14)
-            title_run.font.bold = True
-            title_run.font.color.rgb = RGBColor(0, 0, 0)
+            # 1. ЗАГАЛЬНИЙ ЗАГОЛОВОК (тільки якщо немає ДМС)
+            t_top = doc.add_table(rows=1, cols=1)
+            t_top.width = Inches(6.5)
+            cell_top = t_top.rows[0].cells[0]
+
+            shd = OxmlElement('w:shd')
+            shd.set(qn('w:fill'), '9BC2E6')
+            cell_top._element.get_or_add_tcPr().append(shd)
+
+            p_top = cell_top.paragraphs[0]
+            p_top.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            p_top.paragraph_format.space_before = Pt(0)
+            p_top.paragraph_format.space_after = Pt(0)
+            run_top = p_top.add_run("       " + "АНКЕТНІ ДАНІ:")
+            run_top.bold = True
+            run_top.italic = True
+            run_top.font.size = Pt(14)
+
+            # 2. Створюємо стандартну вступну таблицю (АНКЕТНІ ДАНІ), якщо немає ДМС
+            spacer = doc.add_paragraph()
+            spacer.paragraph_format.space_before = Mm(3)
+            spacer.paragraph_format.space_after = Mm(0)
+            spacer.paragraph_format.line_spacing = 0
+
+            table = doc.add_table(rows=1, cols=2)
+            table.autofit = False
+
+            left_cell = table.rows[0].cells[0]
+            left_cell.width = Inches(2.0)
+            if final_photo_bytes:
+                paragraph = left_cell.paragraphs[0]
+                run = paragraph.add_run()
+                run.add_picture(BytesIO(final_photo_bytes), width=Inches(1.8))
+
+            right_cell = table.rows[0].cells[1]
+            right_cell.width = Inches(4.5)
+            right_cell.vertical_alignment = 1
+
+            # Очищаємо стандартні параграфи у правій клітинці перед додаванням контенту
+            for para in right_cell.paragraphs:
+                para.clear()
+
+            if intro_text:
+                intro_text = intro_text.replace("д.н.", "").replace("  ", " ")
+                add_bulleted_content(right_cell, intro_text, alignment=WD_ALIGN_PARAGRAPH.LEFT,
+                                     use_bullet_style=False, bold_matches=True, bold_content=True, pattern=BOLD_PATTERN, exclude_pattern=INTRO_PATTERN, use_first_paragraph=True)
+            else:
+                title_paragraph = right_cell.paragraphs[0]
+                title_paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
+                title_run = title_paragraph.add_run("Особисте досьє")
+                title_run.font.size = Pt(14)
+                title_run.font.bold = True
+                title_run.font.color.rgb = RGBColor(0, 0, 0)
+
+    render_fragment(doc, "intro", (intro_text, dms_data.get('info') if dms_data else None, final_photo_bytes),
+                    render_intro, intro_text)
 
     # Додаємо секцію нерухомості, якщо вона є (має бути другою за логікою)
     if real_estate_data:
-        append_real_estate_to_doc(doc, real_estate_data)
-
-    # Добавляем контент (вже відфільтрований без вступу)
-    for item in filtered_content:
-        header = item.get("header", "").strip()
-        content = item.get("content", "").strip()
-
-
-        if header:
-            if header == "Початок документа":
-                # Виводимо тільки контент як звичайний текст на початку
-                if content:
-                    add_bulleted_content(doc, content, pattern=None)
-                    # Добавляем отступ после вводного блока
-                    doc.add_paragraph().paragraph_format.space_after = Pt(6)
-                continue
-
-
-            # Створюємо таблицю для заголовка на блакитному фоні
-            t = doc.add_table(rows=1, cols=1)
-            t.width = Inches(6.5)
-            cell = t.rows[0].cells[0]
-
-
-            # Налаштування блакитного фону (#9BC2E6)
-            shading_elm = OxmlElement('w:shd')
-            shading_elm.set(qn('w:fill'), '9BC2E6')
-            cell._element.get_or_add_tcPr().append(shading_elm)
-
-
-            # Прибираємо границі
-            tcPr = cell._element.get_or_add_tcPr()
-            tcBorders = OxmlElement('w:tcBorders')
-            for border in ['top', 'left', 'bottom', 'right']:
-                b = OxmlElement(f'w:{border}')
-                b.set(qn('w:val'), 'none')
-                tcBorders.append(b)
-            tcPr.append(tcBorders)
-
+        render_fragment(doc, "real_estate", real_estate_data, append_real_estate_to_doc, doc, real_estate_data)
+
+    def render_block(header, content):
+        if header == "Початок документа":
+            # Виводимо тільки контент як звичайний текст на початку
+            if content:
+                add_bulleted_content(doc, content, pattern=None)
+                # Добавляем отступ после вводного блока
+                doc.add_paragraph().paragraph_format.space_after = Pt(6)
+            return
+
+
+        # Створюємо таблицю для заголовка на блакитному фоні
+        t = doc.add_table(rows=1, cols=1)
+        t.width = Inches(6.5)
+        cell = t.rows[0].cells[0]
+
+
+        # Налаштування блакитного фону (#9BC2E6)
+        shading_elm = OxmlElement('w:shd')
+        shading_elm.set(qn('w:fill'), '9BC2E6')
+        cell._element.get_or_add_tcPr().append(shading_elm)
+
+
+        # Прибираємо границі
+        tcPr = cell._element.get_or_add_tcPr()
+        tcBorders = OxmlElement('w:tcBorders')
+        for border in ['top', 'left', 'bottom', 'right']:
+            b = OxmlElement(f'w:{border}')
+            b.set(qn('w:val'), 'none')
+            tcBorders.append(b)
+        tcPr.append(tcBorders)
+
+
+        p_h = cell.paragraphs[0]
+        p_h.alignment = WD_ALIGN_PARAGRAPH.LEFT
+        # Додаємо 7 пробілів перед заголовком та робимо текст великими літерами
+        display_header = "АДРЕСИ" if header == "Адреса" else header.upper()
+        run_h = p_h.add_run("       " + display_header)
+        run_h.bold = True
+        run_h.italic = True
+        run_h.font.size = Pt(14)
+        p_h.paragraph_format.space_before = Pt(0)
+        p_h.paragraph_format.space_after = Pt(0)
+
+
+        paragraphs_list = content.split('\n')
+        for i, p_text in enumerate(paragraphs_list):
+            if p_text.strip():
+                # Применяем выравнивание по центру для всех блоков кроме "Початок документа"
+                pat = (r'(№\s+\d{24}\s+від\s+\d{2}\.\d{2}\.\d{4}\s*,\s*за\s*СТ\.|' + BOLD_PATTERN[1:] if header == "ЄРДР" else
+                       r'(місце\s*проживання\s*:|' + BOLD_PATTERN[1:] if header == "Адреса" else BOLD_PATTERN)
+                p_c = add_bulleted_content(doc, p_text.strip(), alignment=WD_ALIGN_PARAGRAPH.JUSTIFY, pattern=pat)
+
+        # Після блоку Адреса додаємо блоки ДМС (АДРЕСИ ДМС + ДОКУМЕНТИ)
+        if header == "Адреса":
+            if dms_data and dms_data.get('info') and dms_data['info'].get('adress'):
+                add_block_header(doc, "АДРЕСА ДМС")
+                p = doc.add_paragraph()
+                p.paragraph_format.space_before = Pt(0)
+                p.paragraph_format.space_after = Pt(2)
+                run = p.add_run(f"Адреса перебування: {dms_data['info']['adress']}")
+                run.font.name = 'Times New Roman'
+                run.font.size = Pt(14)
 
-            p_h = cell.paragraphs[0]
-            p_h.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            # Додаємо 7 пробілів перед заголовком та робимо текст великими літерами
-            display_header = "АДРЕСИ" if header == "Адреса" else header.upper()
-            run_h = p_h.add_run("       " + display_header)
-            run_h.bold = True
-            run_h.italic = True
-            run_h.font.size = Pt(14)
-            p_h.paragraph_format.space_before = Pt(0)
-            p_h.paragraph_format.space_after = Pt(0)
-
-
-            paragraphs_list = content.split('\n')
-            for i, p_text in enumerate(paragraphs_list):
-                if p_text.strip():
-                    # Применяем выравнивание по центру для всех блоков кроме "Початок документа"
-                    pat = (r'(№\s+\d{24}\s+від\s+\d{2}\.\d{2}\.\d{4}\s*,\s*за\s*СТ\.|' + BOLD_PATTERN[1:] if header == "ЄРДР" else
-                           r'(місце\s*проживання\s*:|' + BOLD_PATTERN[1:] if header == "Адреса" else BOLD_PATTERN)
-                    p_c = add_bulleted_content(doc, p_text.strip(), alignment=WD_ALIGN_PARAGRAPH.JUSTIFY, pattern=pat)
-
-            # Після блоку Адреса додаємо блоки ДМС (АДРЕСИ ДМС + ДОКУМЕНТИ)
-            if header == "Адреса":
-                if dms_data and dms_data.get('info') and dms_data['info'].get('adress'):
-                    add_block_header(doc, "АДРЕСА ДМС")
+            if dms_data and dms_data.get('info') and dms_data['info'].get('documents'):
+                add_block_header(doc, "ДОКУМЕНТИ")
+                for doc_str in dms_data['info']['documents']:
                     p = doc.add_paragraph()
                     p.paragraph_format.space_before = Pt(0)
                     p.paragraph_format.space_after = Pt(2)
-                    run = p.add_run(f"Адреса перебування: {dms_data['info']['adress']}")
+                    run = p.add_run(f"• {doc_str}")
                     run.font.name = 'Times New Roman'
                     run.font.size = Pt(14)
 
-                if dms_data and dms_data.get('info') and dms_data['info'].get('documents'):
-                    add_block_header(doc, "ДОКУМЕНТИ")
-                    for doc_str in dms_data['info']['documents']:
-                        p = doc.add_paragraph()
-                        p.paragraph_format.space_before = Pt(0)
-                        p.paragraph_format.space_after = Pt(2)
-                        run = p.add_run(f"• {doc_str}")
-                        run.font.name = 'Times New Roman'
-                        run.font.size = Pt(14)
+    # Добавляем контент (вже відфільтрований без вступу); блоки ДМС після "Адреса" входять у ключ кешу
+    dms_info = dms_data.get('info') if dms_data else None
+    for item in filtered_content:
+        header = item.get("header", "").strip()
+        content = item.get("content", "").strip()
+        if header:
+            dms_extra = (dms_info.get('adress'), dms_info.get('documents')) if dms_info and header == "Адреса" else None
+            render_fragment(doc, "block", (header, content, dms_extra), render_block, header, content)
 
     # Знаходимо абзац з текстом "АНКЕТНІ ДАНІ:" і змінюємо формат порожніх абзаців перед і після нього
     paragraphs = doc.paragraphs
@@ -428,119 +448,120 @@ def generate_docx(data: dict, photo_bytes: bytes = None, border_crossing_data: l
     footer_run.font.size = Pt(12)
     footer_run.font.bold = True
 
+    # Далі секції в потоковому режимі пишуться в архів і звільняються по одній
+    flush_sections()
+
+    def render_member(member):
+        # member - це словник {'relative_type': 'дружина', 'info': dms_info, 'photo_bytes': bytes}
+        # або {'relative_type': 'дружина', 'manual_text': '...', 'photo_bytes': bytes}
+        header = member.get('relative_type', 'РОДИЧ').upper()
+        if member.get('info'):
+            append_dms_to_doc(doc, member['info'], photo_bytes=member.get('photo_bytes'), header_name=f"{header} (ДМС)")
+        elif member.get('manual_text'):
+            # Для вручну введених даних створюємо таблицю з фото та текстом
+            # 1. Заголовок на блакитному фоні
+            separator_table = doc.add_table(rows=1, cols=1)
+            separator_table.width = Inches(6.5)
+            separator_cell = separator_table.rows[0].cells[0]
 
-    # Додаємо родинні зв'язки (ДМС родичів), якщо вони є
-    if family_data:
-        for member in family_data:
-            # member - це словник {'relative_type': 'дружина', 'info': dms_info, 'photo_bytes': bytes}
-            # або {'relative_type': 'дружина', 'manual_text': '...', 'photo_bytes': bytes}
-            header = member.get('relative_type', 'РОДИЧ').upper()
-            if member.get('info'):
-                append_dms_to_doc(doc, member['info'], photo_bytes=member.get('photo_bytes'), header_name=f"{header} (ДМС)")
-            elif member.get('manual_text'):
-                # Для вручну введених даних створюємо таблицю з фото та текстом
-                # 1. Заголовок на блакитному фоні
-                separator_table = doc.add_table(rows=1, cols=1)
-                separator_table.width = Inches(6.5)
-                separator_cell = separator_table.rows[0].cells[0]
-
-                shading_elm = OxmlElement('w:shd')
-                shading_elm.set(qn('w:fill'), '9BC2E6')
-                separator_cell._element.get_or_add_tcPr().append(shading_elm)
-
-                tcPr = separator_cell._element.get_or_add_tcPr()
-                tcBorders = OxmlElement('w:tcBorders')
-                for border in ['top', 'left', 'bottom', 'right']:
-                    b = OxmlElement(f'w:{border}')
-                    b.set(qn('w:val'), 'none')
-                    tcBorders.append(b)
-                tcPr.append(tcBorders)
-
-                p_separator = separator_cell.paragraphs[0]
-                p_separator.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                p_separator.paragraph_format.space_before = Pt(0)
-                p_separator.paragraph_format.space_after = Pt(0)
-                run_separator = p_separator.add_run("       " + header)
-                run_separator.bold = True
-                run_separator.italic = True
-                run_separator.font.size = Pt(14)
-                run_separator.font.color.rgb = RGBColor(0, 0, 0)
-                run_separator.font.name = 'Times New Roman'
-
-                # 2. Таблиця з фото (зліва) та текстом (справа)
-                spacer = doc.add_paragraph()
-                spacer.paragraph_format.space_before = Mm(3)
-                spacer.paragraph_format.space_after = Mm(0)
-                spacer.paragraph_format.line_spacing = 0
+            shading_elm = OxmlElement('w:shd')
+            shading_elm.set(qn('w:fill'), '9BC2E6')
+            separator_cell._element.get_or_add_tcPr().append(shading_elm)
 
-                table = doc.add_table(rows=1, cols=2)
-                table.autofit = False
+            tcPr = separator_cell._element.get_or_add_tcPr()
+            tcBorders = OxmlElement('w:tcBorders')
+            for border in ['top', 'left', 'bottom', 'right']:
+                b = OxmlElement(f'w:{border}')
+                b.set(qn('w:val'), 'none')
+                tcBorders.append(b)
+            tcPr.append(tcBorders)
 
-                left_cell = table.rows[0].cells[0]
-                left_cell.width = Inches(2.0)
-                photo_bytes = member.get('photo_bytes')
-                if photo_bytes:
+            p_separator = separator_cell.paragraphs[0]
+            p_separator.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            p_separator.paragraph_format.space_before = Pt(0)
+            p_separator.paragraph_format.space_after = Pt(0)
+            run_separator = p_separator.add_run("       " + header)
+            run_separator.bold = True
+            run_separator.italic = True
+            run_separator.font.size = Pt(14)
+            run_separator.font.color.rgb = RGBColor(0, 0, 0)
+            run_separator.font.name = 'Times New Roman'
+
+            # 2. Таблиця з фото (зліва) та текстом (справа)
+            spacer = doc.add_paragraph()
+            spacer.paragraph_format.space_before = Mm(3)
+            spacer.paragraph_format.space_after = Mm(0)
+            spacer.paragraph_format.line_spacing = 0
+
+            table = doc.add_table(rows=1, cols=2)
+            table.autofit = False
+
+            left_cell = table.rows[0].cells[0]
+            left_cell.width = Inches(2.0)
+            photo_bytes = member.get('photo_bytes')
+            if photo_bytes:
+                paragraph = left_cell.paragraphs[0]
+                run = paragraph.add_run()
+                run.add_picture(BytesIO(photo_bytes), width=Inches(1.8))
+            else:
+                avatar_bytes = default_image('default_avatar.png')
+                if avatar_bytes:
                     paragraph = left_cell.paragraphs[0]
                     run = paragraph.add_run()
-                    run.add_picture(BytesIO(photo_bytes), width=Inches(1.8))
-                else:
-                    # Пробуем найти default_avatar.png в нескольких местах
-                    avatar_paths = [
-                        'default_avatar.png',
-                        'MANY_PDF_v_PERSON/default_avatar.png',
-                        os.path.join(os.path.dirname(__file__), 'default_avatar.png')
-                    ]
-                    avatar_path = None
-                    for path in avatar_paths:
-                        if os.path.exists(path):
-                            avatar_path = path
-                            break
-
-                    if avatar_path:
-                        with open(avatar_path, 'rb') as f:
-                            paragraph = left_cell.paragraphs[0]
-                            run = paragraph.add_run()
-                            run.add_picture(BytesIO(f.read()), width=Inches(1.8))
+                    run.add_picture(BytesIO(avatar_bytes), width=Inches(1.8))
+
+            right_cell = table.rows[0].cells[1]
+            right_cell.width = Inches(4.5)
+            right_cell.vertical_alignment = 1
+
+            # Додаємо текст у праву клітинку
+            manual_text = member.get('manual_text', '')
+            if manual_text:
+                # Розбиваємо текст на рядки та додаємо кожен як окремий абзац
+                lines = manual_text.split('\n')
+                for line_idx, line in enumerate(lines):
+                    if line.strip():
+                        # Для першого рядка використовуємо існуючий параграф
+                        if line_idx == 0:
+                            p = right_cell.paragraphs[0]
+                            p.clear()
+                        else:
+                            p = right_cell.add_paragraph()
+                        p.paragraph_format.space_before = Pt(0)
+                        p.paragraph_format.space_after = Pt(2)
+                        # Тільки перший рядок робимо жирним
+                        if line_idx == 0:
+                            run = p.add_run(line.strip())
+                            run.bold = True
+                        else:
+                            run = p.add_run(line.strip())
+                        run.font.name = 'Times New Roman'
+                        run.font.size = Pt(14)
 
-                right_cell = table.rows[0].cells[1]
-                right_cell.width = Inches(4.5)
-                right_cell.vertical_alignment = 1
+    # Додаємо родинні зв'язки (ДМС родичів), якщо вони є
+    if family_data:
+        for member in family_data:
+            render_fragment(doc, "family", member, render_member, member)
+            flush_sections()
 
-                # Додаємо текст у праву клітинку
-                manual_text = member.get('manual_text', '')
-                if manual_text:
-                    # Розбиваємо текст на рядки та додаємо кожен як окремий абзац
-                    lines = manual_text.split('\n')
-                    for line_idx, line in enumerate(lines):
-                        if line.strip():
-                            # Для першого рядка використовуємо існуючий параграф
-                            if line_idx == 0:
-                                p = right_cell.paragraphs[0]
-                                p.clear()
-                            else:
-                                p = right_cell.add_paragraph()
-                            p.paragraph_format.space_before = Pt(0)
-                            p.paragraph_format.space_after = Pt(2)
-                            # Тільки перший рядок робимо жирним
-                            if line_idx == 0:
-                                run = p.add_run(line.strip())
-                                run.bold = True
-                            else:
-                                run = p.add_run(line.strip())
-                            run.font.name = 'Times New Roman'
-                            run.font.size = Pt(14)
-
-    # Додаємо секцію про транспортні засоби, якщо вона є
+    # Додаємо секцію про транспортні засоби, якщо вона є (фото ТЗ шукаються лише для нових даних)
     if car_data:
-        append_car_to_doc(doc, car_data)
+        render_fragment(doc, "cars", car_data, append_car_to_doc, doc, car_data)
+        flush_sections()
 
     # Додаємо секцію про Пенсійний фонд, якщо вона є
     if pension_data:
-        append_pension_to_doc(doc, pension_data)
+        render_fragment(doc, "pension", pension_data, append_pension_to_doc, doc, pension_data)
+        flush_sections()
 
     # Додаємо секцію про перетин кордону, якщо вона є
     if border_crossing_data:
-        append_border_crossing_to_doc(doc, border_crossing_data)
+        render_fragment(doc, "arkan", border_crossing_data, append_border_crossing_to_doc, doc, border_crossing_data)
+        refresh_operative_info(doc)
+
+    if stream:
+        stream.close()
+        return output
 
     buffer = io.BytesIO()
     doc.save(buffer)
@@ -639,7 +660,7 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
                            dms_data: dict = None, family_data: list = None,
                            real_estate_data: list = None, car_data: list = None,
                            pension_data: dict = None,
-                           filled_blocks: dict = None) -> bytes:
+                           filled_blocks: dict = None, output=None) -> bytes:
     """
     Генерує порожнє досьє з усіма блоками.
     
@@ -651,11 +672,13 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
         real_estate_data: Дані про нерухомість
         car_data: Дані про транспортні засоби
         filled_blocks: Словник {header_name: content} для заповнених блоків з PDF
+        output: Шлях або двійковий файловий об'єкт для потокового запису (як у generate_docx)
     
     Returns:
-        bytes: DOCX файл
+        bytes: DOCX файл (з output - сам output)
     """
     doc = Document()
+    stream = StreamingDocxWriter(doc, output) if output is not None else None
 
     section = doc.sections[0]
     section.top_margin = Cm(2)
@@ -695,11 +718,13 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
         final_photo_bytes = dms_data['photo_bytes']
     elif photo_bytes:
         final_photo_bytes = photo_bytes
-    elif os.path.exists('default_avatar.png'):
-        with open('default_avatar.png', 'rb') as f:
-            final_photo_bytes = f.read()
+    else:
+        final_photo_bytes = default_image('default_avatar.png')
 
     for block_name in EMPTY_DOSSIER_BLOCKS:
+        # У потоковому режимі попередній блок уже записаний в архів і звільнений
+        if stream:
+            stream.flush()
         if block_name == "АНКЕТНІ ДАНІ":
             if dms_data and dms_data.get('info'):
                 append_dms_to_doc(doc, dms_data['info'], photo_bytes=final_photo_bytes, header_name="ІНФОРМАЦІЯ З ДМС")
@@ -816,7 +841,7 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
 
         elif block_name == "НЕРУХОМЕ МАЙНО":
             if real_estate_data:
-                append_real_estate_to_doc(doc, real_estate_data)
+                render_fragment(doc, "real_estate", real_estate_data, append_real_estate_to_doc, doc, real_estate_data)
             elif block_name in filled_blocks:
                 add_empty_block(doc, block_name)
                 p = doc.add_paragraph()
@@ -830,7 +855,7 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
 
         elif block_name == "ТРАНСПОРТНІ ЗАСОБИ":
             if car_data:
-                append_car_to_doc(doc, car_data)
+                render_fragment(doc, "cars", car_data, append_car_to_doc, doc, car_data)
             elif block_name in filled_blocks:
                 add_empty_block(doc, block_name)
                 p = doc.add_paragraph()
@@ -889,11 +914,10 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
                             paragraph = left_cell.paragraphs[0]
                             run = paragraph.add_run()
                             run.add_picture(BytesIO(member_photo), width=Inches(1.6))
-                        elif os.path.exists('default_avatar.png'):
-                            with open('default_avatar.png', 'rb') as f:
-                                paragraph = left_cell.paragraphs[0]
-                                run = paragraph.add_run()
-                                run.add_picture(BytesIO(f.read()), width=Inches(1.6))
+                        elif default_image('default_avatar.png'):
+                            paragraph = left_cell.paragraphs[0]
+                            run = paragraph.add_run()
+                            run.add_picture(BytesIO(default_image('default_avatar.png')), width=Inches(1.6))
 
                         right_cell = table.rows[0].cells[1]
                         right_cell.width = Inches(4.7)
@@ -973,11 +997,10 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
                             paragraph = left_cell.paragraphs[0]
                             run = paragraph.add_run()
                             run.add_picture(BytesIO(member_photo), width=Inches(1.6))
-                        elif os.path.exists('default_avatar.png'):
-                            with open('default_avatar.png', 'rb') as f:
-                                paragraph = left_cell.paragraphs[0]
-                                run = paragraph.add_run()
-                                run.add_picture(BytesIO(f.read()), width=Inches(1.6))
+                        elif default_image('default_avatar.png'):
+                            paragraph = left_cell.paragraphs[0]
+                            run = paragraph.add_run()
+                            run.add_picture(BytesIO(default_image('default_avatar.png')), width=Inches(1.6))
 
                         right_cell = table.rows[0].cells[1]
                         right_cell.width = Inches(4.7)
@@ -1001,7 +1024,8 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
 
         elif block_name == "ПЕРЕТИНИ ДЕРЖАВНОГО КОРДОНУ УКРАЇНИ":
             if border_crossing_data:
-                append_border_crossing_to_doc(doc, border_crossing_data)
+                render_fragment(doc, "arkan", border_crossing_data, append_border_crossing_to_doc, doc, border_crossing_data)
+                refresh_operative_info(doc)
             else:
                 add_empty_block(doc, block_name)
 
@@ -1107,6 +1131,10 @@ def generate_empty_dossier(photo_bytes: bytes = None, border_crossing_data: list
     footer_run.font.size = Pt(12)
     footer_run.font.bold = True
 
+    if stream:
+        stream.close()
+        return output
+
     buffer = io.BytesIO()
     doc.save(buffer)
     buffer.seek(0)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Кеш фрагментів DOCX: секції досьє, зібрані раніше, не будуються повторно.
+
+Аналітик натискає «Сформувати» багато разів, змінюючи одну секцію, а решта
+(вступ, блоки PDF, ДМС, Аркан, нерухомість, ТЗ, пенсія, родичі) лишається тією
+ж. render_fragment() будує секцію в документі лише якщо її ще немає в кеші:
+ключ - назва секції та SHA-256 її вхідних даних. Готова секція зберігається як
+DocxFragment - XML елементів тіла документа та вміст зображень, на які вони
+посилаються (незалежно від документа, можна pickle). З кешу фрагмент
+вставляється в новий документ: зображення додаються в його пакет з новими
+rId, ідентифікатори й імена wp:docPr перенумеровуються.
+
+Кеш спільний для процесу (LRU з лімітом обсягу DOCX_FRAGMENT_CACHE_MB).
+Секції, вхідні дані яких не серіалізуються pickle, будуються без кешу.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from lxml import etree
+
+FRAGMENT_CACHE_BYTES = int(float(os.environ.get("DOCX_FRAGMENT_CACHE_MB", 64)) * 1024 * 1024)
+
+_BLIP = qn("a:blip")
+_EMBED = qn("r:embed")
+_DOC_PR = qn("wp:docPr")
+_SECT_PR = qn("w:sectPr")
+
+
+@dataclass(frozen=True)
+class DocxFragment:
+    """Елементи тіла документа (XML) і зображення за їхніми rId у документі-джерелі."""
+    elements: tuple
+    images: dict
+    size: int
+
+
+# ══════════════════════════════════════════════
+# КЕШ ФРАГМЕНТІВ
+# ══════════════════════════════════════════════
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def fragment_key(name: str, inputs):
+    """Ключ секції: (назва, SHA-256 вхідних даних) або None, якщо дані не серіалізуються."""
+    try:
+        data = pickle.dumps(inputs, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return name, hashlib.sha256(data).hexdigest()
+
+
+def _cache_get(key):
+    global _hits, _misses
+    with _cache_lock:
+        fragment = _cache.get(key)
+        if fragment is None:
+            _misses += 1
+            return None
+        _hits += 1
+        _cache.move_to_end(key)
+        return fragment
+
+
+def _cache_put(key, fragment: DocxFragment) -> None:
+    global _cache_bytes
+    with _cache_lock:
+        if key in _cache or fragment.size > FRAGMENT_CACHE_BYTES:
+            return
+        _cache[key] = fragment
+        _cache_bytes += fragment.size
+        while _cache_bytes > FRAGMENT_CACHE_BYTES:
+            _, dropped = _cache.popitem(last=False)
+            _cache_bytes -= dropped.size
+
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return {"fragments": len(_cache), "bytes": _cache_bytes, "limit": FRAGMENT_CACHE_BYTES,
+                "hits": _hits, "misses": _misses}
+
+
+def clear_cache() -> None:
+    global _cache_bytes, _hits, _misses
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = _hits = _misses = 0
+
+
+# ══════════════════════════════════════════════
+# ЗБЕРЕЖЕННЯ І ВСТАВКА ФРАГМЕНТІВ
+# ══════════════════════════════════════════════
+def body_elements(doc) -> list:
+    """Елементи тіла документа без завершального w:sectPr."""
+    children = list(doc.element.body)
+    if children and children[-1].tag == _SECT_PR:
+        children.pop()
+    return children
+
+
+def capture_fragment(doc, start: int) -> DocxFragment:
+    """Фрагмент з елементів тіла, доданих після позиції start."""
+    elements = body_elements(doc)[start:]
+    images = {}
+    for element in elements:
+        for blip in element.iter(_BLIP):
+            rid = blip.get(_EMBED)
+            if rid and rid not in images:
+                images[rid] = doc.part.related_parts[rid].blob
+    xml = tuple(etree.tostring(element, encoding="UTF-8") for element in elements)
+    size = sum(len(item) for item in xml) + sum(len(blob) for blob in images.values())
+    return DocxFragment(elements=xml, images=images, size=size)
+
+
+def insert_fragment(doc, fragment: DocxFragment) -> None:
+    """Додає елементи фрагмента в кінець тіла документа."""
+    body = doc.element.body
+    rid_map = {
+        rid: doc.part.get_or_add_image(BytesIO(blob))[0]
+        for rid, blob in fragment.images.items()
+    }
+    for xml in fragment.elements:
+        element = parse_xml(xml)
+        for blip in element.iter(_BLIP):
+            rid = blip.get(_EMBED)
+            if rid in rid_map:
+                blip.set(_EMBED, rid_map[rid])
+        sect_pr = body.sectPr
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            body.append(element)
+        # Після вставки next_id враховує ідентифікатори самого елемента
+        for doc_pr in element.iter(_DOC_PR):
+            shape_id = doc.part.next_id
+            doc_pr.set("id", str(shape_id))
+            doc_pr.set("name", f"Picture {shape_id}")
+
+
+def render_fragment(doc, name: str, inputs, render, *args) -> None:
+    """
+    Додає секцію name в doc: з кешу або викликом render(*args) з подальшим збереженням.
+
+    render має лише додавати елементи в кінець тіла doc і залежати тільки
+    від inputs (разом з name вони визначають ключ кешу).
+    """
+    key = fragment_key(name, inputs)
+    fragment = _cache_get(key) if key else None
+    if fragment is not None:
+        insert_fragment(doc, fragment)
+        return
+    start = len(body_elements(doc))
+    render(*args)
+    if key:
+        _cache_put(key, capture_fragment(doc, start))
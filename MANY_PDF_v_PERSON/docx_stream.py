@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Потоковий запис DOCX: секції досьє пишуться в ZIP-контейнер по черзі.
+
+doc.save() серіалізує все дерево python-docx одразу, а generate_docx ще й
+копіював результат з BytesIO - на досьє з тисячами перетинів кордону і
+десятками фото пік пам'яті сягав сотень МБ. StreamingDocxWriter працює з
+документом python-docx як з чернеткою: після кожної секції flush() переносить
+її елементи тіла у word/document.xml (через SpooledTemporaryFile - у
+пам'яті до DOCX_STREAM_SPOOL_MB, далі на диску), зображення одразу пише в
+архів, а з чернетки їх видаляє. Тож у пам'яті - лише поточна секція.
+
+close() дописує document.xml (з w:sectPr чернетки), решту частин пакета
+(стилі, нумерація, колонтитули, налаштування), зв'язки та
+[Content_Types].xml. Ціль - шлях до файлу або двійковий файловий об'єкт,
+зокрема без seek (відповідь HTTP): zipfile тоді пише дескриптори даних.
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+import zipfile
+
+from docx.image.image import Image
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml.ns import qn
+from lxml import etree
+
+from docx_fragments import body_elements
+
+STREAM_SPOOL_BYTES = int(float(os.environ.get("DOCX_STREAM_SPOOL_MB", 8)) * 1024 * 1024)
+# Секції з більшою кількістю вузлів XML перед вилученням з чернетки викликають gc.collect()
+STREAM_GC_NODES = 20000
+
+_BLIP = qn("a:blip")
+_EMBED = qn("r:embed")
+_DOC_PR = qn("wp:docPr")
+_CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_COPY_CHUNK = 1024 * 1024
+
+
+class StreamingDocxWriter:
+    """Записує документ python-docx у DOCX по секціях (flush) замість doc.save()."""
+
+    def __init__(self, doc, target, spool_bytes: int = STREAM_SPOOL_BYTES):
+        self.doc = doc
+        self._zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+        self._body = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        # sha1 зображення -> (rId у document.xml, ім'я в архіві)
+        self._images = {}
+        self._image_types = {}
+        self._shape_id = 0
+        self._closed = False
+
+    # ── секції ───────────────────────────────────────────────────────────────
+
+    def flush(self) -> None:
+        """Переносить усі елементи тіла чернетки в document.xml і звільняє їх."""
+        count = len(body_elements(self.doc))
+        if not count:
+            return
+        rids = self._relink_images()
+        # Тіло серіалізується цілим, щоб елементи не дублювали оголошення просторів імен
+        body = self.doc.element.body
+        xml = etree.tostring(body, encoding="UTF-8")
+        start = xml.index(b">") + 1
+        end = xml.rfind(b"<w:sectPr") if body.sectPr is not None else xml.rfind(b"</w:body>")
+        self._body.write(xml[start:end])
+        del xml
+
+        # Вилучене піддерево lxml звільняє одразу, лише якщо на його вузли немає живих
+        # проксі; інакше оновлює кожен вузол (секунди на великих таблицях). Проксі
+        # python-docx (рядки, клітинки) живуть у циклах посилань до збору GC.
+        if body.xpath("count(.//*)") > STREAM_GC_NODES:
+            gc.collect()
+        del body[:count]
+        for rid in rids:
+            self.doc.part.drop_rel(rid)
+
+    def _relink_images(self) -> list:
+        """Пише зображення секції в архів, перенумеровує wp:docPr; повертає старі rId."""
+        part = self.doc.part
+        rid_map = {}
+        for element in body_elements(self.doc):
+            for blip in element.iter(_BLIP):
+                rid = blip.get(_EMBED)
+                if rid in part.related_parts:
+                    if rid not in rid_map:
+                        rid_map[rid] = self._add_image(part.related_parts[rid].blob)
+                    blip.set(_EMBED, rid_map[rid])
+            for doc_pr in element.iter(_DOC_PR):
+                self._shape_id += 1
+                doc_pr.set("id", str(self._shape_id))
+                doc_pr.set("name", f"Picture {self._shape_id}")
+        return list(rid_map)
+
+    def _add_image(self, blob: bytes) -> str:
+        image = Image.from_blob(blob)
+        if image.sha1 not in self._images:
+            number = len(self._images) + 1
+            rid = f"rIdStream{number}"
+            name = f"word/media/stream{number}.{image.ext}"
+            self._zip.writestr(name, blob)
+            self._images[image.sha1] = (rid, name)
+            self._image_types[image.ext] = image.content_type
+        return self._images[image.sha1][0]
+
+    # ── завершення пакета ────────────────────────────────────────────────────
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        document_part = self.doc.part
+        # Тіло чернетки тепер містить лише w:sectPr
+        head, tail = serialize_part_xml(document_part.element).split(b"<w:body>", 1)
+        with self._zip.open(document_part.partname.membername, "w", force_zip64=True) as out:
+            out.write(head + b"<w:body>")
+            self._body.seek(0)
+            shutil.copyfileobj(self._body, out, _COPY_CHUNK)
+            out.write(tail)
+        self._body.close()
+
+        parts = list(document_part.package.iter_parts())
+        for part in parts:
+            part.before_marshal()
+        for part in parts:
+            if part is document_part:
+                self._zip.writestr(part.partname.rels_uri.membername, self._document_rels(part.rels.xml))
+                continue
+            self._zip.writestr(part.partname.membername, part.blob)
+            if len(part.rels):
+                self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._zip.writestr("_rels/.rels", document_part.package.rels.xml)
+        self._zip.writestr("[Content_Types].xml", self._content_types(parts))
+        self._zip.close()
+
+    def _document_rels(self, rels_xml: bytes) -> bytes:
+        root = etree.fromstring(rels_xml)
+        for rid, name in self._images.values():
+            etree.SubElement(root, f"{{{_RELS_NS}}}Relationship", Id=rid, Type=RT.IMAGE,
+                             Target=name[len("word/"):])
+        return etree.tostring(root, encoding="UTF-8", standalone=True)
+
+    def _content_types(self, parts) -> bytes:
+        root = etree.Element(f"{{{_CT_NS}}}Types", nsmap={None: _CT_NS})
+        defaults = {"rels": CT.OPC_RELATIONSHIPS, "xml": CT.XML, **self._image_types}
+        overrides = []
+        for part in parts:
+            ext = part.partname.ext.lower()
+            if part.content_type.startswith("image/"):
+                defaults.setdefault(ext, part.content_type)
+            else:
+                overrides.append((part.partname, part.content_type))
+        for ext, content_type in sorted(defaults.items()):
+            etree.SubElement(root, f"{{{_CT_NS}}}Default", Extension=ext, ContentType=content_type)
+        for partname, content_type in sorted(overrides):
+            etree.SubElement(root, f"{{{_CT_NS}}}Override", PartName=partname, ContentType=content_type)
+        return etree.tostring(root, encoding="UTF-8", standalone=True)
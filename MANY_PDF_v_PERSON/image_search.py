@@ -200,7 +200,15 @@ import os
 from typing import Optional, Tuple, List
 from PIL import Image
 from io import BytesIO
-from ddgs import DDGS
+import sys
+
+# Спільні ресурси процесу лежать у корені репозиторію
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from shared_resources import default_image, shared_resource
+from stage_timing import timed_stage
 
 # Словарь для быстрого перевода популярных марок и цветов на английский
 # Это критически важно, так как DuckDuckGo лучше ищет на английском
@@ -284,6 +292,9 @@ def search_car_image_by_attributes(brand: str = "", model: str = "", color: str
     }
 
     try:
+        # ddgs імпортується лише під час пошуку - не уповільнює відкриття сторінки
+        from ddgs import DDGS
+
         # Используем контекстный менеджер для DDGS
         with DDGS() as ddgs:
             for query in queries:
@@ -354,6 +365,17 @@ def download_and_resize_image(image_bytes: bytes, size: Tuple[int, int] = (400,
         print(f"Ошибка при изменении размера изображения: {e}")
         return None
 
+def _default_car_placeholder() -> Optional[bytes]:
+    """default_avto.jpg (або default_avatar.png), зменшене до 200x150."""
+    for file_name in ('default_avto.jpg', 'default_avatar.png'):
+        default_img_bytes = default_image(file_name)
+        if default_img_bytes:
+            resized_image = download_and_resize_image(default_img_bytes, (200, 150))
+            if resized_image:
+                return resized_image
+    return None
+
+@timed_stage("get_car_image")
 def get_car_image(brand: str = "", model: str = "", color: str = "", year: str = "") -> Optional[bytes]:
     """
     Основная функция. Сначала пытаемся найти в сети, потом отдаем заглушку.
@@ -364,22 +386,9 @@ def get_car_image(brand: str = "", model: str = "", color: str = "", year: str =
         resized_image = download_and_resize_image(image_bytes, (200, 150))
         return resized_image
 
-    # Логика заглушки (оставлена без изменений из вашего кода)
+    # Заглушка масштабується один раз на процес і спільна для всіх сесій
     try:
-        default_car_image_path = 'default_avto.jpg'
-        if os.path.exists(default_car_image_path):
-            with open(default_car_image_path, 'rb') as f:
-                default_img_bytes = f.read()
-                resized_image = download_and_resize_image(default_img_bytes, (200, 150))
-                if resized_image:
-                    return resized_image
-        
-        if os.path.exists('default_avatar.png'):
-            with open('default_avatar.png', 'rb') as f:
-                default_img_bytes = f.read()
-                resized_image = download_and_resize_image(default_img_bytes, (200, 150))
-                if resized_image:
-                    return resized_image
+        return shared_resource("car_placeholder_200x150", _default_car_placeholder)
     except Exception as e:
         print(f"Ошибка при использовании заглушки: {e}")
     
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Попередній перегляд PDF у секції вибору блоків: мініатюри сторінок з сервера.
+
+Замість передачі всього PDF у браузер на кожен rerun сторінки рендеряться
+PyMuPDF (fitz) у WebP (або PNG, якщо Pillow без WebP) по одній і лише тоді,
+коли їх треба показати. Готові мініатюри кешуються в процесі за хешем вмісту
+файлу та номером сторінки (спільно для всіх сесій, LRU з лімітом обсягу),
+тож повторний rerun не рендерить і не перекодовує нічого, а Streamlit
+віддає браузеру ті самі URL медіафайлів, які вже є в кеші браузера.
+
+Налаштування: PDF_PREVIEW_ZOOM (масштаб, 1.0 = 72 dpi), PDF_PREVIEW_FORMAT
+(webp/png), PDF_PREVIEW_CACHE_MB (ліміт кешу мініатюр процесу).
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import fitz
+from PIL import Image, features
+
+PREVIEW_ZOOM = float(os.environ.get("PDF_PREVIEW_ZOOM", 1.25))
+PREVIEW_FORMAT = os.environ.get("PDF_PREVIEW_FORMAT", "webp").lower()
+PREVIEW_CACHE_BYTES = int(float(os.environ.get("PDF_PREVIEW_CACHE_MB", 128)) * 1024 * 1024)
+PREVIEW_WEBP_QUALITY = 80
+# Сторінок до і після сторінки вибраного блоку; кнопка «ще» додає PREVIEW_PAGE_STEP
+PREVIEW_WINDOW = 1
+PREVIEW_PAGE_STEP = 3
+
+_thumbs = OrderedDict()
+_thumbs_bytes = 0
+_thumbs_lock = threading.Lock()
+# file_id завантаження -> (sha256, кількість сторінок), щоб не хешувати файл на кожен rerun
+_files = OrderedDict()
+_FILES_MAX_ENTRIES = 256
+
+
+def preview_format() -> str:
+    if PREVIEW_FORMAT == "webp" and features.check("webp"):
+        return "webp"
+    return "png"
+
+
+def _file_bytes(file_obj) -> bytes:
+    if isinstance(file_obj, (bytes, bytearray)):
+        return bytes(file_obj)
+    if hasattr(file_obj, "getvalue"):
+        return file_obj.getvalue()
+    file_obj.seek(0)
+    data = file_obj.read()
+    file_obj.seek(0)
+    return data
+
+
+def describe_pdf(file_obj) -> tuple:
+    """(sha256 вмісту, кількість сторінок); для UploadedFile - один раз на завантаження."""
+    file_id = getattr(file_obj, "file_id", None)
+    with _thumbs_lock:
+        if file_id and file_id in _files:
+            _files.move_to_end(file_id)
+            return _files[file_id]
+    data = _file_bytes(file_obj)
+    digest = hashlib.sha256(data).hexdigest()
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        info = (digest, doc.page_count)
+    if file_id:
+        with _thumbs_lock:
+            _files[file_id] = info
+            while len(_files) > _FILES_MAX_ENTRIES:
+                _files.popitem(last=False)
+    return info
+
+
+def _encode(pix) -> bytes:
+    if preview_format() == "png":
+        return pix.tobytes("png")
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=PREVIEW_WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def _cache_get(key):
+    with _thumbs_lock:
+        image = _thumbs.get(key)
+        if image is not None:
+            _thumbs.move_to_end(key)
+        return image
+
+
+def _cache_put(key, image: bytes) -> None:
+    global _thumbs_bytes
+    with _thumbs_lock:
+        if key in _thumbs:
+            return
+        _thumbs[key] = image
+        _thumbs_bytes += len(image)
+        while _thumbs_bytes > PREVIEW_CACHE_BYTES and len(_thumbs) > 1:
+            _, dropped = _thumbs.popitem(last=False)
+            _thumbs_bytes -= len(dropped)
+
+
+def render_pages(file_obj, pages, digest: str = None, zoom: float = PREVIEW_ZOOM) -> list:
+    """
+    Мініатюри сторінок pages (номери з 0) у тому ж порядку.
+
+    Документ відкривається лише якщо хоча б однієї сторінки немає в кеші.
+    """
+    digest = digest or describe_pdf(file_obj)[0]
+    fmt = preview_format()
+    keys = [(digest, page, zoom, fmt) for page in pages]
+    images = [_cache_get(key) for key in keys]
+    missing = [idx for idx, image in enumerate(images) if image is None]
+    if missing:
+        matrix = fitz.Matrix(zoom, zoom)
+        with fitz.open(stream=_file_bytes(file_obj), filetype="pdf") as doc:
+            for idx in missing:
+                page = keys[idx][1]
+                if not 0 <= page < doc.page_count:
+                    continue
+                image = _encode(doc.load_page(page).get_pixmap(matrix=matrix, alpha=False))
+                _cache_put(keys[idx], image)
+                images[idx] = image
+    return images
+
+
+def page_window(page: int, total: int, extra: int = 0, window: int = PREVIEW_WINDOW) -> range:
+    """Сторінки навколо page: window до і window + extra після."""
+    first = max(0, min(page, total - 1) - window)
+    return range(first, min(total, page + window + 1 + extra))
+
+
+def cache_stats() -> dict:
+    with _thumbs_lock:
+        return {"pages": len(_thumbs), "bytes": _thumbs_bytes, "limit": PREVIEW_CACHE_BYTES, "files": len(_files)}
+
+
+def clear_cache() -> None:
+    global _thumbs_bytes
+    with _thumbs_lock:
+        _thumbs.clear()
+        _files.clear()
+        _thumbs_bytes = 0
@@ -3,6 +3,7 @@ from typing import Dict, List, Any
 import pdfplumber
 from PIL import Image
 import io
+from stage_timing import timed_stage
 
 
 
@@ -209,16 +210,18 @@ def deduplicate_data(all_entities: List[Dict[str, Any]]) -> Dict[str, Any]:
     return merged
 
 
+@timed_stage("get_pdf_paragraphs")
 def get_pdf_paragraphs(pdf_file) -> List[Dict[str, str]]:
     """
     Витягує текст з PDF та розбиває його на блоки, базуючись на сірих полосах (rects).
     Текст без полос автоматично об'єднується з попереднім блоком.
+    Кожен блок містить "page" - номер сторінки (з 0), на якій він починається.
     """
     blocks = []
     
     try:
         with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
+            for page_idx, page in enumerate(pdf.pages):
                 page_width = float(page.width)
                 header_rects = []
                 for rect in page.rects:
@@ -236,7 +239,7 @@ def get_pdf_paragraphs(pdf_file) -> List[Dict[str, str]]:
                         if blocks:
                             blocks[-1]["content"] += "\n" + text.strip()
                         else:
-                            blocks.append({"header": "Початок документа", "content": text.strip()})
+                            blocks.append({"header": "Початок документа", "content": text.strip(), "page": page_idx})
                     continue
                 
                 # Обробляємо текст ДО першої смуги на цій сторінці
@@ -248,7 +251,7 @@ def get_pdf_paragraphs(pdf_file) -> List[Dict[str, str]]:
                         if blocks:
                             blocks[-1]["content"] += "\n" + top_text.strip()
                         else:
-                            blocks.append({"header": "Початок документа", "content": top_text.strip()})
+                            blocks.append({"header": "Початок документа", "content": top_text.strip(), "page": page_idx})
 
                 # Обробляємо текст за смугами
                 for i in range(len(header_rects)):
@@ -265,7 +268,8 @@ def get_pdf_paragraphs(pdf_file) -> List[Dict[str, str]]:
                     if header_text.strip():
                         blocks.append({
                             "header": " ".join(header_text.split()),
-                            "content": content_text.strip()
+                            "content": content_text.strip(),
+                            "page": page_idx
                         })
                     elif content_text.strip() and blocks:
                         # Якщо заголовка немає (дивно, але про всяк випадок), додаємо до попереднього
@@ -287,7 +291,8 @@ def get_pdf_paragraphs(pdf_file) -> List[Dict[str, str]]:
             
             processed_blocks.append({
                 "header": clean_header,
-                "content": clean_content
+                "content": clean_content,
+                "page": b.get("page", 0)
             })
     return processed_blocks
 
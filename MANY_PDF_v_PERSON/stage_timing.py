@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Вимірювання етапів конвеєра досьє: час (wall і CPU), розмір входу та виходу.
+
+Функції етапів позначаються декоратором timed_stage("назва"). Записи
+потрапляють у StageRecorder, активний у поточному контексті (сесія Streamlit
+встановлює свій через set_recorder). Без активного записувача декоратор лише
+викликає функцію - у пулі процесів, CLI та тестах накладних витрат немає.
+
+CPU - час потоку, що виконує етап (time.thread_time): роботу інших сесій він
+не враховує, але й роботу пулів потоків/процесів, запущених етапом, теж.
+Розміри - обсяг даних у байтах (файли, bytes, текст; для списків і словників
+- сума вкладених значень).
+"""
+
+import contextvars
+import functools
+import io
+import json
+import threading
+import time
+from collections import deque
+
+RECORDER_MAX_RECORDS = 1000
+
+_current = contextvars.ContextVar("stage_recorder", default=None)
+
+
+def payload_size(value, depth: int = 0) -> int:
+    """Обсяг даних значення у байтах (наближено для вкладених структур)."""
+    if value is None or depth > 4:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore"))
+    if isinstance(value, io.BytesIO):
+        return value.getbuffer().nbytes
+    size = getattr(value, "size", None)
+    if isinstance(size, int) and hasattr(value, "read"):
+        # UploadedFile Streamlit
+        return size
+    if isinstance(value, dict):
+        return sum(payload_size(k, depth + 1) + payload_size(v, depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(payload_size(item, depth + 1) for item in value)
+    return 0
+
+
+class StageRecorder:
+    """Журнал вимірювань етапів однієї сесії (останні max_records записів)."""
+
+    def __init__(self, max_records: int = RECORDER_MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self.records)
+
+    def summary(self) -> list:
+        """Зведення по етапах: кількість, сумарний/середній/максимальний час, обсяги."""
+        stages = {}
+        for record in self.snapshot():
+            item = stages.setdefault(record["stage"], {
+                "етап": record["stage"], "викликів": 0, "помилок": 0,
+                "wall, мс": 0.0, "cpu, мс": 0.0, "макс. wall, мс": 0.0,
+                "вхід, КБ": 0.0, "вихід, КБ": 0.0,
+            })
+            item["викликів"] += 1
+            item["помилок"] += 0 if record["ok"] else 1
+            item["wall, мс"] += record["wall_ms"]
+            item["cpu, мс"] += record["cpu_ms"]
+            item["макс. wall, мс"] = max(item["макс. wall, мс"], record["wall_ms"])
+            item["вхід, КБ"] += record["input_bytes"] / 1024
+            item["вихід, КБ"] += record["output_bytes"] / 1024
+        rows = sorted(stages.values(), key=lambda item: item["wall, мс"], reverse=True)
+        for item in rows:
+            item["середній wall, мс"] = item["wall, мс"] / item["викликів"]
+            for key, value in item.items():
+                if isinstance(value, float):
+                    item[key] = round(value, 1)
+        return rows
+
+    def to_jsonl(self) -> str:
+        """Записи у форматі JSON Lines (по одному об'єкту на рядок)."""
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self.snapshot())
+
+
+def set_recorder(recorder):
+    """Робить recorder активним у поточному контексті (потоці сесії); повертає токен."""
+    return _current.set(recorder)
+
+
+def get_recorder():
+    return _current.get()
+
+
+def _label(args) -> str:
+    for arg in args:
+        name = getattr(arg, "name", None)
+        if isinstance(name, str):
+            return name
+    return ""
+
+
+def timed_stage(stage: str):
+    """Декоратор етапу: записує час і обсяги виклику в активний StageRecorder."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _current.get()
+            if recorder is None:
+                return func(*args, **kwargs)
+            started_wall = time.perf_counter()
+            started_cpu = time.thread_time()
+            ok = True
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except BaseException:
+                ok = False
+                raise
+            finally:
+                wall = time.perf_counter() - started_wall
+                cpu = time.thread_time() - started_cpu
+                recorder.add({
+                    "ts": round(time.time(), 3),
+                    "stage": stage,
+                    "label": _label(args),
+                    "wall_ms": round(wall * 1000, 2),
+                    "cpu_ms": round(cpu * 1000, 2),
+                    "input_bytes": payload_size(args) + payload_size(kwargs),
+                    "output_bytes": payload_size(result),
+                    "ok": ok,
+                })
+        return wrapper
+    return decorator
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк парсерів порталу на синтетичних файлах трьох розмірів (1x/10x/100x).
+
+Для кожного випадку (CASES) і рівня розміру вхідний файл генерується
+benchmarks/fixtures.py, а вимір виконується в окремому процесі - так пікова
+пам'ять (RSS) одного випадку не змішується з іншими. Записується:
+- час: найкращий і медіанний з --repeat запусків;
+- пам'ять: піковий RSS процесу, приріст RSS від початку розбору (разом з
+  імпортами парсера) та пік Python-алокацій (tracemalloc, окремий запуск);
+- кількість розібраних одиниць (перевірка, що парсер справді щось знайшов).
+
+Звіт - JSON з метаданими (коміт, Python, платформа), придатний для
+порівняння між комітами: --compare старий.json з порогом --tolerance.
+
+Запуск з кореня репозиторію:
+    python benchmarks/bench_parsers.py --out bench_report.json
+    python benchmarks/bench_parsers.py --cases arkan_xlsx vehicle_text --tiers 1 10
+    python benchmarks/bench_parsers.py --out new.json --compare old.json --tolerance 0.2
+
+З --compare код виходу 1, якщо хоча б один випадок повільніший за поріг.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+for path in (BENCH_DIR, ROOT_DIR, os.path.join(ROOT_DIR, "MANY_PDF_v_PERSON"), os.path.join(ROOT_DIR, "IPNP_v_HTML")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import fixtures
+
+TIERS = (1, 10, 100)
+# Недоступна адреса OSRM: карти будуються без мережі (прямі відрізки)
+OFFLINE_OSRM_URL = "http://127.0.0.1:9"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Випадки: підготовка входу (не вимірюється) і розбір (вимірюється)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _ipnp_pdf(units):
+    data = fixtures.ipnp_pdf(units)
+
+    def run():
+        from pdf_processor import get_pdf_paragraphs
+        return len(get_pdf_paragraphs(fixtures.named_file("ipnp.pdf", data)))
+    return data, run
+
+
+def _dms_pdf(units):
+    files = [fixtures.dms_pdf(seed=i) for i in range(units)]
+
+    def run():
+        from dms_processor import extract_dms_data
+        parsed = 0
+        for idx, data in enumerate(files):
+            info, photo, error = extract_dms_data(fixtures.named_file(f"dms_{idx}.pdf", data))
+            if error:
+                raise RuntimeError(error)
+            parsed += 1 if info and photo else 0
+        return parsed
+    return files, run
+
+
+def _arkan_xlsx(units):
+    data = fixtures.arkan_xlsx(units)
+
+    def run():
+        from arkan_processor import process_excel_to_data
+        rows, error = process_excel_to_data(fixtures.named_file("arkan.xlsx", data))
+        if error:
+            raise RuntimeError(error)
+        return len(rows)
+    return data, run
+
+
+def _real_estate_pdf(units):
+    data = fixtures.real_estate_pdf(units)
+
+    def run():
+        import real_estate_parser
+        # Без кешу за хешем вмісту - інакше вимірюється лише перший запуск
+        real_estate_parser.clear_cache()
+        objects, error = real_estate_parser.parse_real_estate_bytes(data)
+        if error:
+            raise RuntimeError(error)
+        return len(objects)
+    return data, run
+
+
+def _vehicle_text(units):
+    data = fixtures.vehicle_text(units)
+
+    def run():
+        from vehicle_parser import _parse_vehicle_file
+        vehicles, error, _ = _parse_vehicle_file("nais.txt", data)
+        if error:
+            raise RuntimeError(error)
+        return len(vehicles)
+    return data, run
+
+
+def _vehicle_xlsx(units):
+    data = fixtures.vehicle_xlsx(units)
+
+    def run():
+        from vehicle_parser import _parse_vehicle_file
+        vehicles, error, _ = _parse_vehicle_file("nais.xlsx", data)
+        if error:
+            raise RuntimeError(error)
+        return len(vehicles)
+    return data, run
+
+
+def _ipnp_app():
+    # app.py є і в MANY_PDF_v_PERSON - модуль IPNP завантажується за шляхом
+    module = sys.modules.get("ipnp_app")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("ipnp_app", os.path.join(ROOT_DIR, "IPNP_v_HTML", "app.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["ipnp_app"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def _telemetry_xlsx(units):
+    data = fixtures.telemetry_xlsx(units)
+
+    def run():
+        ipnp_app = _ipnp_app()
+        _, df = ipnp_app.read_workbook("telemetry.xlsx", data)
+        html = ipnp_app.generate_map_html(df, osrm_url=OFFLINE_OSRM_URL)
+        if not html:
+            raise RuntimeError("карту не згенеровано")
+        return len(df)
+    return data, run
+
+
+def _dossier_inputs(units):
+    """Блоки, фото та (ліниво розібрані) дані Аркан і нерухомості для generate_docx."""
+    blocks = fixtures.dossier_blocks(units)
+    photo = fixtures.photo_jpeg()
+    arkan = fixtures.arkan_xlsx(units * 5)
+    estate = fixtures.real_estate_pdf(units)
+    prepared = {}
+
+    def prepare():
+        import real_estate_parser
+        from arkan_processor import process_excel_to_data
+        # Вхідні дані розбираються поза вимірюваним генератором лише один раз
+        if not prepared:
+            prepared["border_crossing_data"] = process_excel_to_data(fixtures.named_file("arkan.xlsx", arkan))[0]
+            prepared["real_estate_data"] = real_estate_parser.parse_real_estate_bytes(estate)[0]
+            prepared["photo_bytes"] = photo
+        return prepared
+
+    return blocks, prepare
+
+
+def _generate_docx(units):
+    blocks, prepare = _dossier_inputs(units)
+
+    def run():
+        from docx_fragments import clear_cache
+        from document_generator import generate_docx
+        inputs = prepare()
+        # Кожен запуск - повна генерація без кешу фрагментів
+        clear_cache()
+        # Фото авто шукається в мережі - ТЗ у бенчмарк не входять
+        return len(generate_docx({"Контент": blocks}, **inputs))
+
+    return blocks, run
+
+
+def _generate_docx_rerun(units):
+    """Повторна генерація, коли між запусками змінюється лише один блок (кеш фрагментів)."""
+    blocks, prepare = _dossier_inputs(units)
+    edits = [0]
+
+    def run():
+        from document_generator import generate_docx
+        inputs = prepare()
+        edits[0] += 1
+        changed = [dict(block) for block in blocks]
+        changed[0]["content"] += f" (правка {edits[0]})"
+        return len(generate_docx({"Контент": changed}, **inputs))
+
+    return blocks, run
+
+
+# назва: (генератор, базова кількість одиниць, одиниця)
+CASES = {
+    "ipnp_pdf": (_ipnp_pdf, 8, "розділів"),
+    "dms_pdf": (_dms_pdf, 1, "файлів"),
+    "arkan_xlsx": (_arkan_xlsx, 50, "рядків"),
+    "real_estate_pdf": (_real_estate_pdf, 5, "об'єктів"),
+    "vehicle_text": (_vehicle_text, 20, "ТЗ"),
+    "vehicle_xlsx": (_vehicle_xlsx, 10, "ТЗ"),
+    "telemetry_xlsx": (_telemetry_xlsx, 200, "точок"),
+    "generate_docx": (_generate_docx, 8, "блоків"),
+    "generate_docx_rerun": (_generate_docx_rerun, 8, "блоків"),
+}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Вимір одного випадку (у дочірньому процесі)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _rss_mb() -> float:
+    # ru_maxrss: кілобайти в Linux, байти в macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure_case(name: str, tier: int, repeat: int) -> dict:
+    """Генерує вхід, виконує розбір repeat разів і один раз під tracemalloc."""
+    factory, base, unit = CASES[name]
+    units = base * tier
+    result = {"case": name, "tier": tier, "units": units, "unit": unit}
+
+    started = time.perf_counter()
+    payload, run = factory(units)
+    result["input_bytes"] = fixtures_size(payload)
+    result["fixture_s"] = round(time.perf_counter() - started, 4)
+
+    # Перший запуск - прогрів (імпорти, ліниві кеші модулів), окремо від вимірів
+    started = time.perf_counter()
+    rss_before = _rss_mb()
+    result["parsed"] = run()
+    result["first_s"] = round(time.perf_counter() - started, 4)
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    result["best_s"] = round(min(times), 4)
+    result["median_s"] = round(statistics.median(times), 4)
+    result["rss_peak_mb"] = round(_rss_mb(), 1)
+    result["rss_growth_mb"] = round(result["rss_peak_mb"] - rss_before, 1)
+
+    tracemalloc.start()
+    run()
+    result["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+    tracemalloc.stop()
+    return result
+
+
+def fixtures_size(payload) -> int:
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    if isinstance(payload, list):
+        return sum(fixtures_size(item) for item in payload)
+    if isinstance(payload, dict):
+        return sum(len(str(value).encode("utf-8")) for value in payload.values())
+    return 0
+
+
+def run_isolated(name: str, tier: int, repeat: int, timeout: float) -> dict:
+    """Запускає measure_case в окремому інтерпретаторі й повертає його JSON."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-case", name, "--tier", str(tier), "--repeat", str(repeat)]
+    try:
+        proc = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": name, "tier": tier, "error": f"timeout {timeout:.0f} с"}
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode == 0 and lines:
+        return json.loads(lines[-1])
+    errors = [line for line in proc.stderr.strip().splitlines() if line.strip()]
+    return {"case": name, "tier": tier, "error": errors[-1] if errors else f"код виходу {proc.returncode}"}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Звіт і порівняння
+# ══════════════════════════════════════════════════════════════════════════════
+
+def git_commit() -> str:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return proc.stdout.strip() + ("-dirty" if dirty else "")
+    except Exception:
+        return ""
+
+
+def format_result(result: dict) -> str:
+    label = f"{result['case']:<20} x{result['tier']:<4}"
+    if "error" in result:
+        return f"{label} ПОМИЛКА {result['error']}"
+    return (f"{label} {result['units']:>6} {result['unit']:<9} {result['input_bytes'] / 1024:9.1f} КБ  "
+            f"best {result['best_s'] * 1000:9.1f} мс  median {result['median_s'] * 1000:9.1f} мс  "
+            f"RSS {result['rss_peak_mb']:7.1f} МБ ({result['rss_growth_mb']:+.1f})  "
+            f"py {result['py_peak_mb']:7.2f} МБ  знайдено {result['parsed']}")
+
+
+def compare_reports(old: dict, new: dict, tolerance: float) -> list:
+    """Рядки порівняння з попереднім звітом: [(ключ, старий, новий, відношення, регресія)]."""
+    previous = {(r["case"], r["tier"]): r for r in old.get("results", []) if "error" not in r}
+    rows = []
+    for result in new.get("results", []):
+        key = (result["case"], result["tier"])
+        if "error" in result or key not in previous:
+            continue
+        before, after = previous[key]["best_s"], result["best_s"]
+        ratio = after / before if before > 0 else 1.0
+        rows.append((key, before, after, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), help="випадки (типово всі)")
+    parser.add_argument("--tiers", nargs="*", type=int, default=list(TIERS), help="множники розміру входу")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600, help="ліміт на один випадок, с")
+    parser.add_argument("--out", help="зберегти звіт у JSON-файл")
+    parser.add_argument("--compare", help="попередній JSON-звіт для порівняння")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="допустиме сповільнення (0.15 = +15%%)")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--tier", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(measure_case(args.run_case, args.tier, args.repeat), ensure_ascii=False))
+        return 0
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for name in args.cases or list(CASES):
+        for tier in args.tiers:
+            result = run_isolated(name, tier, args.repeat, args.timeout)
+            report["results"].append(result)
+            print(format_result(result), flush=True)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            old = json.load(fh)
+        rows = compare_reports(old, report, args.tolerance)
+        print(f"\nПорівняння з {old.get('meta', {}).get('commit') or args.compare}:")
+        for (name, tier), before, after, ratio, slower in rows:
+            mark = "  СПОВІЛЬНЕННЯ" if slower else ""
+            print(f"{name:<20} x{tier:<4} {before * 1000:9.1f} -> {after * 1000:9.1f} мс  ({ratio:5.2f}x){mark}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк текстового парсера ТЗ на згенерованому вивантаженні НАІС.
+
+Порівнює скомпільований парсер (vehicle_parser.parse_vehicle_text) з
+попереднім підходом: кожен шаблон компілюється з re.IGNORECASE і шукається
+по всьому тексту, а повертається лише перший ТЗ.
+
+Запуск з кореня репозиторію:
+    python benchmarks/bench_vehicle_text.py --vehicles 10000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vehicle_parser import VEHICLE_TEXT_PATTERNS, parse_vehicle_text
+
+BRANDS = ["RENAULT MEGANE 1.4", "BMW X5", "TOYOTA CAMRY 2.5", "VOLKSWAGEN PASSAT B8", "SKODA OCTAVIA A7"]
+COLORS = ["БІЛИЙ", "ЧОРНИЙ", "СІРИЙ", "СИНІЙ", "ЧЕРВОНИЙ"]
+
+RECORD_TEMPLATE = """Державний номер: ВН{num:04d}ЕМ
+Свідоцтво про реєстрацію ТЗ: САТ{num:06d} від 28.08.2013
+Попередній держ.номер: Т4ВС5586
+Марка/модель ТЗ: {brand}
+Категорія ТЗ: B
+Тип ТЗ: ЛЕГКОВИЙ
+Рік випуску ТЗ: {year}
+Колір ТЗ: {color}
+vin ТЗ: VF1BZAB0{num:09d}
+Номер двигуна ТЗ: D{num:06d}
+Адреса реєстрації ТЗ: (5104) ВРЕР №4 М. Б. ДНІСТРОВСЬК ОДЕСЬКА ОБЛ.,УКРАЇНА
+Власник: КЛИМЕНКО ВАЛЕНТИНА МИКОЛАЇВНА 01.07.1956
+ІПН/ЄДРПОУ: {ipn}
+Адреса власника: ОДЕСЬКА ОБЛ., М. БІЛГОРОД-ДНІСТРОВСЬКИЙ, ВУЛ. ПРИМОРСЬКА, {num}
+Дата першої реєстрації ТЗ: 28.08.2013
+"""
+
+
+def generate_text(vehicles):
+    return "\n".join(
+        RECORD_TEMPLATE.format(
+            num=i,
+            brand=BRANDS[i % len(BRANDS)],
+            year=1995 + i % 30,
+            color=COLORS[i % len(COLORS)],
+            ipn=2000000000 + i,
+        )
+        for i in range(vehicles)
+    )
+
+
+def legacy_parse(text):
+    """Попередній підхід: шаблони без попередньої компіляції, лише перший ТЗ."""
+    result = {}
+    for field, field_patterns in VEHICLE_TEXT_PATTERNS.items():
+        for pattern in field_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                result[field] = match.group(1).strip()
+                break
+    return result
+
+
+def measure(func, *args, repeat=3):
+    best = None
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = generate_text(args.vehicles)
+    print(f"Текст: {args.vehicles} ТЗ, {len(text) / 1024 / 1024:.1f} МБ")
+
+    legacy_time, legacy_result = measure(legacy_parse, text, repeat=args.repeat)
+    print(f"legacy_parse:       {legacy_time:8.3f} с, ТЗ: {1 if legacy_result else 0}")
+
+    new_time, vehicles = measure(parse_vehicle_text, text, repeat=args.repeat)
+    print(f"parse_vehicle_text: {new_time:8.3f} с, ТЗ: {len(vehicles)} "
+          f"({new_time / max(len(vehicles), 1) * 1e6:.1f} мкс/ТЗ)")
+
+    assert len(vehicles) == args.vehicles, "кількість ТЗ не збігається з згенерованою"
+    assert vehicles[0] == legacy_result, "перший ТЗ відрізняється від попереднього парсера"
+
+
+if __name__ == "__main__":
+    main()
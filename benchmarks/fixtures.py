@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Синтетичні вхідні файли для бенчмарків парсерів (без реальних персональних даних).
+
+Кожен генератор повертає байти файлу у форматі, який очікує відповідний
+парсер, розмір задається кількістю «одиниць» (сторінок, записів, рядків):
+- ipnp_pdf - PDF ІПНП із сірими смугами-заголовками (pdf_processor);
+- dms_pdf - PDF ДМС «ІНФОРМАЦІЯ ПРО ОСОБУ» з фото (dms_processor);
+- arkan_xlsx - вивантаження ARKAN, аркуш Data (arkan_processor);
+- real_estate_pdf - виписка ДРРП «Актуальна інформація про ...» (real_estate_parser);
+- vehicle_text / vehicle_xlsx - вивантаження НАІС ТЗ (vehicle_parser);
+- telemetry_xlsx - книга з точками для карти маршрутів (IPNP_v_HTML);
+- dossier_blocks - блоки досьє для generate_docx.
+
+PDF будуються власним мінімальним генератором (SimplePdf): текст шрифтом
+Type1 без вбудовування з кодуванням /Differences (uniXXXX), тож pdfplumber
+і PyMuPDF витягують кирилицю; смуги - залиті прямокутники, фото - JPEG.
+"""
+
+import io
+import random
+import zlib
+
+import pandas as pd
+from PIL import Image, ImageDraw
+
+SURNAMES = ["ШЕВЧЕНКО", "КОВАЛЕНКО", "БОНДАРЕНКО", "ТКАЧЕНКО", "КРАВЧЕНКО", "ОЛІЙНИК", "ЛИСЕНКО", "МЕЛЬНИК"]
+NAMES = ["ТАРАС", "ОЛЕНА", "ІВАН", "МАРІЯ", "ПЕТРО", "ЮЛІЯ", "АНДРІЙ", "ОКСАНА"]
+PATRONYMICS = ["ГРИГОРОВИЧ", "ІВАНІВНА", "ПЕТРОВИЧ", "ОЛЕКСАНДРІВНА", "МИКОЛАЙОВИЧ", "ВАСИЛІВНА"]
+CITIES = ["М. КИЇВ", "М. ЛЬВІВ", "М. ОДЕСА", "М. ХАРКІВ", "М. ДНІПРО", "М. ВІННИЦЯ"]
+STREETS = ["ВУЛ. ХРЕЩАТИК", "ВУЛ. ШЕВЧЕНКА", "ПРОСП. ПЕРЕМОГИ", "ВУЛ. САДОВА", "ВУЛ. ЛЕСІ УКРАЇНКИ"]
+BRANDS = [("TOYOTA", "CAMRY"), ("BMW", "X5"), ("RENAULT", "MEGANE"), ("SKODA", "OCTAVIA"), ("VOLKSWAGEN", "PASSAT")]
+COLORS = ["БІЛИЙ", "ЧОРНИЙ", "СІРИЙ", "СИНІЙ", "ЧЕРВОНИЙ"]
+SECTIONS = ["Адреса", "Телефони", "Місця роботи", "Нерухоме майно", "АВТО (НАІС ТЗ)",
+            "Родинні зв'язки", "Адміністративна відповідальність", "Довіреності"]
+
+
+def person(rng: random.Random) -> tuple:
+    return rng.choice(SURNAMES), rng.choice(NAMES), rng.choice(PATRONYMICS)
+
+
+def address(rng: random.Random) -> str:
+    return f"УКРАЇНА, {rng.choice(CITIES)}, {rng.choice(STREETS)}, БУД. {rng.randint(1, 200)}, КВ. {rng.randint(1, 300)}"
+
+
+def photo_jpeg(width: int = 240, height: int = 320, seed: int = 0) -> bytes:
+    """Умовне «фото» - градієнт із силуетом, JPEG."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (rng.randint(150, 220), 200, 230))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((width * 0.3, height * 0.15, width * 0.7, height * 0.5), fill=(90, 70, 60))
+    draw.rectangle((width * 0.2, height * 0.55, width * 0.8, height), fill=(40, 50, 90))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Мінімальний генератор PDF
+# ══════════════════════════════════════════════════════════════════════════════
+
+class SimplePdf:
+    """PDF A4 з текстом, залитими прямокутниками та JPEG; координати - від верхнього краю."""
+
+    WIDTH = 595
+    HEIGHT = 842
+    CHAR_WIDTH = 500  # ширина кожного гліфа, 1/1000 кегля
+
+    def __init__(self):
+        self.pages = []
+        self._codes = {}
+
+    def add_page(self) -> None:
+        self.pages.append({"ops": [], "images": []})
+
+    def _encode(self, text: str) -> str:
+        out = []
+        for char in text:
+            code = ord(char)
+            if not 32 <= code <= 126:
+                if char not in self._codes:
+                    if len(self._codes) >= 128:
+                        raise ValueError("Забагато різних не-ASCII символів для одного шрифту")
+                    self._codes[char] = 128 + len(self._codes)
+                code = self._codes[char]
+            out.append(f"{code:02X}")
+        return "".join(out)
+
+    def text(self, x: float, top: float, text: str, size: float = 10) -> None:
+        baseline = self.HEIGHT - top - size * 0.8
+        self.pages[-1]["ops"].append(f"BT /F1 {size} Tf {x:.2f} {baseline:.2f} Td <{self._encode(text)}> Tj ET")
+
+    def text_width(self, text: str, size: float = 10) -> float:
+        return len(text) * size * self.CHAR_WIDTH / 1000
+
+    def rect(self, x: float, top: float, width: float, height: float, gray: float = 0.85) -> None:
+        y = self.HEIGHT - top - height
+        self.pages[-1]["ops"].append(f"q {gray} g {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f Q")
+
+    def image(self, x: float, top: float, width: float, height: float, jpeg: bytes) -> None:
+        with Image.open(io.BytesIO(jpeg)) as img:
+            px_w, px_h = img.size
+        page = self.pages[-1]
+        name = f"Im{len(page['images']) + 1}"
+        page["images"].append((name, jpeg, px_w, px_h))
+        y = self.HEIGHT - top - height
+        page["ops"].append(f"q {width:.2f} 0 0 {height:.2f} {x:.2f} {y:.2f} cm /{name} Do Q")
+
+    def to_bytes(self) -> bytes:
+        objects = {}
+
+        def add(obj_id, body):
+            objects[obj_id] = body
+
+        differences = " ".join(
+            f"/uni{ord(char):04X}" for char, _ in sorted(self._codes.items(), key=lambda item: item[1])
+        )
+        widths = " ".join([str(self.CHAR_WIDTH)] * 224)
+        add(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        add(3, (
+            "<< /Type /Font /Subtype /Type1 /BaseFont /BenchSans /FirstChar 32 /LastChar 255 "
+            f"/Widths [{widths}] /FontDescriptor 4 0 R "
+            f"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [128 {differences}] >> >>"
+        ).encode("ascii"))
+        add(4, (
+            "<< /Type /FontDescriptor /FontName /BenchSans /Flags 32 /FontBBox [0 -200 1000 800] "
+            "/ItalicAngle 0 /Ascent 800 /Descent -200 /CapHeight 700 /StemV 80 /MissingWidth 500 >>"
+        ).encode("ascii"))
+
+        next_id = 5
+        kids = []
+        for page in self.pages:
+            page_id, content_id = next_id, next_id + 1
+            next_id += 2
+            image_refs = []
+            for name, jpeg, px_w, px_h in page["images"]:
+                add(next_id, (
+                    f"<< /Type /XObject /Subtype /Image /Width {px_w} /Height {px_h} /ColorSpace /DeviceRGB "
+                    f"/BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>\nstream\n"
+                ).encode("ascii") + jpeg + b"\nendstream")
+                image_refs.append(f"/{name} {next_id} 0 R")
+                next_id += 1
+            content = zlib.compress("\n".join(page["ops"]).encode("ascii"))
+            add(content_id, f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+                + content + b"\nendstream")
+            xobjects = f" /XObject << {' '.join(image_refs)} >>" if image_refs else ""
+            add(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.WIDTH} {self.HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R >>{xobjects} >> /Contents {content_id} 0 R >>"
+            ).encode("ascii"))
+            kids.append(f"{page_id} 0 R")
+        add(2, f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("ascii"))
+
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = {}
+        for obj_id in sorted(objects):
+            offsets[obj_id] = out.tell()
+            out.write(f"{obj_id} 0 obj\n".encode("ascii") + objects[obj_id] + b"\nendobj\n")
+        xref = out.tell()
+        size = max(objects) + 1
+        out.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode("ascii"))
+        for obj_id in range(1, size):
+            out.write(f"{offsets[obj_id]:010d} 00000 n \n".encode("ascii"))
+        out.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+        return out.getvalue()
+
+
+class _PdfWriter:
+    """Потоковий вивід рядків тексту з переносом сторінок."""
+
+    MARGIN = 50
+
+    def __init__(self, pdf: SimplePdf, size: float = 10, leading: float = 14):
+        self.pdf = pdf
+        self.size = size
+        self.leading = leading
+        self.top = None
+
+    def ensure(self, height: float) -> None:
+        if self.top is None or self.top + height > self.pdf.HEIGHT - self.MARGIN:
+            self.pdf.add_page()
+            self.top = self.MARGIN
+
+    def line(self, text: str) -> None:
+        limit = int((self.pdf.WIDTH - 2 * self.MARGIN) / (self.size * self.pdf.CHAR_WIDTH / 1000))
+        words, current = text.split(" "), ""
+        for word in words:
+            candidate = f"{current} {word}".strip()
+            if len(candidate) > limit and current:
+                self._emit(current)
+                current = word
+            else:
+                current = candidate
+        self._emit(current)
+
+    def _emit(self, text: str) -> None:
+        self.ensure(self.leading)
+        self.pdf.text(self.MARGIN, self.top, text, self.size)
+        self.top += self.leading
+
+    def header_bar(self, title: str) -> None:
+        """Сіра смуга на всю ширину з заголовком усередині (як у PDF ІПНП)."""
+        self.ensure(40)
+        self.top += 6
+        width = self.pdf.WIDTH - 2 * self.MARGIN
+        self.pdf.rect(self.MARGIN, self.top, width, 20)
+        self.pdf.text(self.MARGIN + 6, self.top + 5, title, 10)
+        self.top += 26
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Генератори вхідних файлів
+# ══════════════════════════════════════════════════════════════════════════════
+
+def ipnp_pdf(sections: int, seed: int = 0) -> bytes:
+    """PDF ІПНП: вступ без смуги і sections розділів під сірими смугами."""
+    rng = random.Random(seed)
+    pdf = SimplePdf()
+    out = _PdfWriter(pdf)
+    surname, name, patronymic = person(rng)
+    out.line(f"{surname} {name} {patronymic}, 01.02.19{rng.randint(50, 99)} р.н., РНОКПП {rng.randint(10**9, 10**10 - 1)}")
+    out.line(f"Місце народження: {address(rng)}")
+    for idx in range(sections):
+        out.header_bar(SECTIONS[idx % len(SECTIONS)])
+        for _ in range(rng.randint(3, 8)):
+            out.line(f"• {address(rng)}; дата актуалізації {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.20{rng.randint(10, 24)}; "
+                     f"джерело: реєстр {rng.randint(1, 40)}, примітка {rng.choice(SURNAMES).lower()}")
+    return pdf.to_bytes()
+
+
+def dms_pdf(seed: int = 0, documents: int = 2) -> bytes:
+    """PDF ДМС: кожне поле - окремий рядок, фото на першій сторінці, без РНОКПП (без мережевого fop)."""
+    rng = random.Random(seed)
+    pdf = SimplePdf()
+    out = _PdfWriter(pdf, size=10, leading=13)
+    out.ensure(0)
+    pdf.image(pdf.WIDTH - 50 - 90, 50, 90, 120, photo_jpeg(seed=seed))
+    surname, name, patronymic = person(rng)
+    lines = [
+        "ІНФОРМАЦІЯ ПРО ОСОБУ", "Прізвище", surname, "Ім'я", name, "По батькові", patronymic,
+        f"Дата народження {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.19{rng.randint(50, 99)}",
+        "Стать", "ЧОЛОВІЧА" if rng.random() < 0.5 else "ЖІНОЧА",
+        "Телефон", f"+38067{rng.randint(10**6, 10**7 - 1)}",
+        "УНЗР", f"19{rng.randint(10**6, 10**7 - 1)}-{rng.randint(10000, 99999)}",
+        "Місце народження", f"УКРАЇНА/{rng.choice(CITIES)}",
+        "Адреса місця", "перебування", f"УКРАЇНА/{rng.choice(CITIES)}/{rng.choice(STREETS)}, БУД. {rng.randint(1, 99)}",
+        "Дата реєстрації", f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2015",
+    ]
+    doc_types = ["Паспорт громадянина України", "Паспорт(и) громадянина України для виїзду за кордон"]
+    for idx in range(documents):
+        lines += [
+            doc_types[idx % len(doc_types)], "Номер", f"{rng.randint(10**8, 10**9 - 1)}",
+            "Дата видачі:", f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2018",
+            "Дійсний до:", f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2028",
+        ]
+    for line in lines:
+        out.line(line)
+    return pdf.to_bytes()
+
+
+def real_estate_pdf(objects: int, seed: int = 0) -> bytes:
+    """Виписка ДРРП (поточний реєстр): objects об'єктів із правами та обтяженнями."""
+    rng = random.Random(seed)
+    pdf = SimplePdf()
+    out = _PdfWriter(pdf, size=9, leading=12)
+    out.line("ІНФОРМАЦІЙНА ДОВІДКА з Державного реєстру речових прав на нерухоме майно")
+    out.line(f"Номер інформаційної довідки: {rng.randint(10**8, 10**9 - 1)}")
+    for idx in range(objects):
+        out.line("Актуальна інформація про об'єкт речових прав")
+        out.line(f"Реєстраційний номер об'єкта нерухомого майна: {rng.randint(10**11, 10**12 - 1)}")
+        out.line(f"Тип об'єкта: {rng.choice(['квартира', 'житловий будинок', 'земельна ділянка'])}, об'єкт житлової нерухомості")
+        if idx % 3 == 2:
+            out.line(f"Кадастровий номер: {rng.randint(10**9, 10**10 - 1)}:{rng.randint(10, 99)}:{rng.randint(100, 999)}:{rng.randint(1000, 9999)}")
+        out.line(f"Опис об'єкта: Загальна площа (кв.м): {rng.randint(30, 180)}.{rng.randint(0, 9)}, житлова площа (кв.м): {rng.randint(15, 90)}")
+        out.line(f"Адреса: {address(rng)}")
+        out.line("Актуальна інформація про речове право")
+        out.line(f"Номер відомостей про речове право: {rng.randint(10**7, 10**8 - 1)}")
+        out.line(f"Дата, час державної реєстрації: {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.20{rng.randint(10, 24)} 10:{rng.randint(10, 59)}:00")
+        out.line("Форма власності: приватна")
+        out.line(f"Розмір частки: {rng.choice(['1/1', '1/2', '1/3'])}")
+        if idx % 4 == 3:
+            out.line("Актуальна інформація про державну реєстрацію обтяжень")
+            out.line("Вид обтяження: іпотека")
+            out.line(f"Підстава внесення запису: договір іпотеки, серія та номер: {rng.randint(100, 9999)}, виданий")
+            out.line("приватним нотаріусом")
+    return pdf.to_bytes()
+
+
+def arkan_xlsx(rows: int, seed: int = 0) -> bytes:
+    """Вивантаження ARKAN: аркуш Data, записи з 3-го рядка, AA3 заповнено."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = "Data"
+    sheet["A1"] = "Перетини державного кордону"
+    surname, name, patronymic = person(rng)
+    for i in range(3, rows + 3):
+        values = {
+            "A": rng.choice(["Виїзд", "В'їзд"]) if i % 25 else "Скасовано",
+            "D": "УКРАЇНА", "G": rng.choice(["Ягодин", "Краковець", "Шегині", "Бориспіль"]),
+            "H": "Ч", "I": rng.choice(["Так", "Ні"]), "J": "Україна - Польща ",
+            "L": f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2023 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+            "M": f"{surname} {name} {patronymic}", "N": "SHEVCHENKO TARAS",
+            "P": "09.03.1980", "S": f"FA{rng.randint(100000, 999999)}", "T": "",
+            "AA": "Пасажир", "AB": "Автомобільний", "AE": "Легковий ", "AF": "Седан ",
+            "AH": f"{rng.choice(BRANDS)[0]} ", "AQ": f"AA{rng.randint(1000, 9999)}BB", "AR": f"VF1{rng.randint(10**13, 10**14 - 1)}",
+        }
+        for column, value in values.items():
+            sheet[f"{column}{i}"] = value
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def vehicle_text(vehicles: int, seed: int = 0) -> bytes:
+    """Текстове вивантаження НАІС ТЗ (формат benchmarks/bench_vehicle_text.py)."""
+    from bench_vehicle_text import generate_text
+
+    return generate_text(vehicles).encode("utf-8")
+
+
+def vehicle_xlsx(vehicles: int, seed: int = 0) -> bytes:
+    """Excel НАІС ТЗ: мітки і значення в сусідніх клітинках, власник один раз на аркуш."""
+    rng = random.Random(seed)
+    surname, name, patronymic = person(rng)
+    rows = [
+        ["Вивантаження НАІС ТЗ", "", ""],
+        [f"Власник: {surname} {name} {patronymic}", "", ""],
+        ["Дата народження 01.07.1956", "ІПН", str(rng.randint(10**9, 10**10 - 1))],
+        [f"Місце реєстрації: {address(rng)}", "", ""],
+    ]
+    for i in range(vehicles):
+        brand, model = BRANDS[i % len(BRANDS)]
+        rows += [
+            ["Номерний знак", f"ВН{i % 10000:04d}ЕМ", ""],
+            ["Марка", brand, ""],
+            ["Модель", model, ""],
+            ["VIN", f"VF1BZAB0{i:09d}", ""],
+            ["Колір", COLORS[i % len(COLORS)], ""],
+            ["Рік випуску", str(1995 + i % 30), ""],
+            ["", "", ""],
+        ]
+    buffer = io.BytesIO()
+    pd.DataFrame(rows, columns=["Поле", "Значення", "Примітка"]).to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def telemetry_xlsx(points: int, seed: int = 0, days: int = None) -> bytes:
+    """Книга ІПНП для карти: 7 рядків шапки, з 8-го - точки (B8 - ім'я файлу карти)."""
+    rng = random.Random(seed)
+    days = days or max(1, min(30, points // 200))
+    header = [["Звіт про місцезнаходження абонента", None, None, None, None, None]]
+    header += [[None] * 6 for _ in range(5)]
+    header.append(["№", "Абонент", "Довгота", "Широта", "Дата, час", "Пристрій"])
+    base = pd.Timestamp("2024-03-01 06:00:00")
+    step = pd.Timedelta(days=days) / max(points, 1)
+    lon, lat = 30.52, 50.45
+    rows = []
+    for i in range(points):
+        lon += rng.uniform(-0.002, 0.002)
+        lat += rng.uniform(-0.0015, 0.0015)
+        when = base + step * i
+        rows.append([i + 1, "ТЕСТОВИЙ АБОНЕНТ", f"{lon:.6f}".replace(".", ","), f"{lat:.6f}",
+                     when.strftime("%d.%m.%Y %H:%M:%S"), f"IMEI35{rng.randint(10**9, 10**10 - 1)}" if i % 97 == 0 else "IMEI351234567890"])
+    buffer = io.BytesIO()
+    pd.DataFrame(header + rows).to_excel(buffer, index=False, header=False, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def dossier_blocks(blocks: int, seed: int = 0) -> list:
+    """Вибрані блоки досьє (як з get_pdf_paragraphs) для generate_docx."""
+    rng = random.Random(seed)
+    surname, name, patronymic = person(rng)
+    content = [{"header": "Початок документа", "content": f"{surname} {name} {patronymic}, 01.02.1980 р.н."}]
+    for idx in range(blocks):
+        lines = [f"{address(rng)}; дата актуалізації {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2020"
+                 for _ in range(rng.randint(2, 6))]
+        content.append({"header": SECTIONS[idx % len(SECTIONS)], "content": " ".join(lines)})
+    return content
+
+
+def named_file(name: str, data: bytes) -> io.BytesIO:
+    """BytesIO з атрибутами name/size, як UploadedFile Streamlit."""
+    buffer = io.BytesIO(data)
+    buffer.name = name
+    buffer.size = len(data)
+    return buffer
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Профіль холодного старту сторінок порталу (python -X importtime).
+
+Кожна сторінка виконується в окремому процесі інтерпретатора (Streamlit у
+режимі bare, без сервера), з виводу -X importtime збирається:
+- загальний час імпортів і час процесу;
+- пакети верхнього рівня з найбільшим власним часом імпорту;
+- які з «важких» бекендів (WATCHED_MODULES) завантажено вже на старті.
+
+Запуск з кореня репозиторію:
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py pages/3_Person_PDF_Matcher.py --top 15
+    python benchmarks/import_profile.py --json import_profile.json --max-ms 4000
+
+З --max-ms код виходу 1, якщо імпорти хоча б однієї сторінки довші за поріг.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бекенди, які мають завантажуватися лише під час використання, а не на старті
+WATCHED_MODULES = (
+    "ddgs", "bs4", "lxml", "reportlab", "pytesseract",
+    "fitz", "pdfplumber", "streamlit_sortables",
+)
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# Сторінка виконується як у Streamlit: cwd - корінь, __name__ != "__main__"
+RUNNER = "import runpy, sys; sys.argv = [{page!r}]; runpy.run_path({page!r}, run_name='__page__')"
+
+
+def default_pages() -> list:
+    pages = [os.path.join(ROOT_DIR, "Home.py")]
+    pages += sorted(glob.glob(os.path.join(ROOT_DIR, "pages", "*.py")))
+    return pages
+
+
+def parse_importtime(stderr: str) -> list:
+    """Рядки -X importtime: [(модуль, власний час мкс, кумулятивний мкс, рівень вкладення)]."""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def summarize(entries: list, top: int) -> dict:
+    """Загальний час імпортів, пакети за власним часом і завантажені важкі модулі."""
+    total_us = sum(cumulative for _, _, cumulative, level in entries if level == 0)
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "imports_ms": round(total_us / 1000, 1),
+        "modules": len(entries),
+        "top_packages": [{"package": name, "self_ms": round(us / 1000, 1)} for name, us in packages],
+        "heavy_loaded": [name for name in WATCHED_MODULES if name in loaded],
+    }
+
+
+def profile_page(page: str, top: int = 10, timeout: float = 120) -> dict:
+    """Запускає сторінку в окремому процесі з -X importtime і повертає звіт."""
+    rel = os.path.relpath(page, ROOT_DIR)
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", RUNNER.format(page=rel)],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {"page": rel, "error": f"timeout {timeout:.0f} с"}
+    report = {"page": rel, "wall_ms": round((time.perf_counter() - started) * 1000, 1)}
+    report.update(summarize(parse_importtime(proc.stderr), top))
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        report["error"] = errors[-1] if errors else f"код виходу {proc.returncode}"
+    return report
+
+
+def format_report(report: dict) -> str:
+    if "imports_ms" not in report:
+        return f"{report['page']}: ПОМИЛКА {report['error']}"
+    lines = [
+        f"{report['page']}: імпорти {report['imports_ms']:.0f} мс "
+        f"({report['modules']} модулів), процес {report['wall_ms']:.0f} мс"
+    ]
+    if report.get("error"):
+        lines.append(f"  помилка: {report['error']}")
+    for item in report["top_packages"]:
+        lines.append(f"  {item['self_ms']:8.1f} мс  {item['package']}")
+    if report["heavy_loaded"]:
+        lines.append("  важкі бекенди на старті: " + ", ".join(report["heavy_loaded"]))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", nargs="*", help="файли сторінок (типово Home.py і pages/*.py)")
+    parser.add_argument("--top", type=int, default=10, help="скільки пакетів показати для сторінки")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--json", help="зберегти звіт у JSON-файл")
+    parser.add_argument("--max-ms", type=float, help="поріг часу імпортів сторінки, мс")
+    args = parser.parse_args()
+
+    pages = [os.path.abspath(page) for page in args.pages] or default_pages()
+    reports = []
+    for page in pages:
+        report = profile_page(page, top=args.top, timeout=args.timeout)
+        reports.append(report)
+        print(format_report(report), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(reports, fh, ensure_ascii=False, indent=2)
+
+    if args.max_ms is not None:
+        slow = [r["page"] for r in reports if r.get("imports_ms", float("inf")) > args.max_ms]
+        if slow:
+            print(f"Перевищено поріг {args.max_ms:.0f} мс: " + ", ".join(slow))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
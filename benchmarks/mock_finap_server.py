@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Локальний мок FinAP API для перевірки пакетного режиму без реального сервісу.
+
+Відповідає у форматі FinAP (список з одним об'єктом, result.edrfullinfo) із
+штучною затримкою. Коди, що починаються з "0", вважаються не знайденими.
+
+Запуск сервера (для додатків вкажіть FINAP_URL = "http://127.0.0.1:8765/api"
+у .streamlit/secrets.toml):
+    python benchmarks/mock_finap_server.py --port 8765 --delay 0.3
+
+Самоперевірка пакетного режиму та кешу (сервер у фоновому потоці):
+    python benchmarks/mock_finap_server.py --selftest --rows 40
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_record(code, name):
+    return {
+        "type": 0 if len(code) == 10 else 1,
+        "name": name or f"ТОВ \"МОК {code}\"",
+        "address": f"УКРАЇНА, М. КИЇВ, ВУЛ. ТЕСТОВА, {int(code) % 100}",
+        "manager": "ІВАНЕНКО ІВАН ІВАНОВИЧ",
+        "kved": "62.01 Комп'ютерне програмування",
+        "stan": "ЗАРЕЄСТРОВАНО",
+        "contacts": f"mock{code}@example.com; +380440000{code[-3:]}",
+    }
+
+
+class MockFinapHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.lock:
+            type(self).requests_served += 1
+        time.sleep(self.delay)
+
+        code = str(payload.get("ipn", ""))
+        if not code or code.startswith("0"):
+            body = [{"result": {"edrfullinfo": []}, "errormessage": "not found"}]
+        else:
+            body = [{"result": {"edrfullinfo": [make_record(code, payload.get("name"))]}}]
+
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, delay=0.0):
+    MockFinapHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockFinapHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def generate_extract(rows):
+    """Виписка ІПНП: rows рядків, кожен страхувальник зустрічається двічі."""
+    lines = ["Назва юридичної особи страхувальника Код ЄДРПОУ РНОКПП Дата доходу"]
+    for i in range(rows):
+        employer = i % max(rows // 2, 1)
+        code = f"{30000000 + employer}" if employer % 5 else f"{3000000000 + employer}"
+        lines.append(f"ТОВАРИСТВО \"РОБОТОДАВЕЦЬ {employer}\" {code} 01.{1 + i % 12:02d}.{2010 + i % 15}")
+    lines.append("НЕВІДОМЕ ПІДПРИЄМСТВО 01234567 01.01.2020")
+    return "\n".join(lines)
+
+
+def selftest(rows, delay, workers):
+    # Окремий тимчасовий кеш, щоб перший прохід гарантовано йшов до сервера
+    # (змінна читається при імпорті finap_cache, тому імпорти - нижче)
+    cache_dir = tempfile.mkdtemp(prefix="finap_cache_")
+    os.environ["FINAP_CACHE_PATH"] = os.path.join(cache_dir, "finap_cache.sqlite3")
+    sys.path[:0] = [ROOT_DIR, os.path.join(ROOT_DIR, "MANY_PDF_v_PERSON")]
+    from finap_client import FinapConfig, format_metrics, get_client, parse_insurance_rows
+    from pension_processor import process_pension_batch
+
+    server = start_server(delay=delay)
+    config = FinapConfig(
+        url=f"http://127.0.0.1:{server.server_port}/api",
+        id_subject="mock",
+        max_workers=workers or FinapConfig.max_workers,
+    )
+    text = generate_extract(rows)
+    expected = len(parse_insurance_rows(text))
+
+    started = time.perf_counter()
+    results = process_pension_batch(text, config=config)
+    elapsed = time.perf_counter() - started
+    served = MockFinapHandler.requests_served
+
+    # Повторна перевірка тієї ж виписки має повністю обслуговуватись кешем
+    started = time.perf_counter()
+    cached_results = process_pension_batch(text, config=config)
+    cached_elapsed = time.perf_counter() - started
+    server.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    ok = sum(1 for r in results if r["formatted_line"])
+    failed = [r for r in results if r["error"]]
+    print(f"Рядків у виписці: {rows + 1}, страхувальників: {len(results)}, запитів до FinAP: {served}")
+    print(f"Успішно: {ok}, з помилкою: {len(failed)}, час: {elapsed:.2f} с (затримка сервера {delay} с)")
+    print(f"Повтор з кешу: {cached_elapsed * 1000:.0f} мс, нових запитів: {MockFinapHandler.requests_served - served}")
+    print(format_metrics(get_client(config).metrics.snapshot()))
+
+    assert len(results) == expected == served, "дублікати мали бути відкинуті"
+    assert len(failed) == 1 and "не знайдено" in failed[0]["error"], "невідомий код має повернути помилку"
+    assert MockFinapHandler.requests_served == served, "повтор мав обслуговуватись кешем"
+    assert [r["formatted_line"] for r in cached_results] == [r["formatted_line"] for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Мок FinAP API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.3, help="затримка відповіді, с")
+    parser.add_argument("--selftest", action="store_true", help="перевірити пакетний режим і вийти")
+    parser.add_argument("--rows", type=int, default=40, help="рядків у згенерованій виписці (--selftest)")
+    parser.add_argument("--workers", type=int, default=None, help="паралельних запитів (--selftest)")
+    args = parser.parse_args()
+
+    if args.selftest:
+        selftest(args.rows, args.delay, args.workers)
+        return
+
+    server = start_server(args.port, args.delay)
+    print(f"Мок FinAP слухає http://127.0.0.1:{server.server_port}/api (Ctrl+C - зупинка)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
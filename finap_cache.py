@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Локальний кеш відповідей FinAP та спільна HTTP-сесія з keep-alive.
+
+Відповіді зберігаються у SQLite (за замовчуванням .cache/finap_cache.sqlite3
+у корені репозиторію, шлях - змінна FINAP_CACHE_PATH) з ключем
+(edrpou, name, listdata) і живуть FINAP_CACHE_TTL секунд; відповіді «не знайдено»
+- лише FINAP_CACHE_NEGATIVE_TTL, помилки не кешуються. Повторні перевірки
+тих самих роботодавців не доходять до FinAP, а нові запити йдуть через одну
+сесію з пулом з'єднань без повторного TLS-рукостискання.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_PATH = os.environ.get("FINAP_CACHE_PATH", os.path.join(ROOT_DIR, ".cache", "finap_cache.sqlite3"))
+# Строк життя відповіді, с (за замовчуванням - 7 днів)
+CACHE_TTL = int(os.environ.get("FINAP_CACHE_TTL", 7 * 24 * 3600))
+# Строк життя відповіді «запис не знайдено», с (за замовчуванням - 1 година)
+NEGATIVE_TTL = int(os.environ.get("FINAP_CACHE_NEGATIVE_TTL", 3600))
+# Розмір пулу з'єднань сесії (не менше за кількість паралельних запитів)
+SESSION_POOL_SIZE = 8
+
+
+def cache_key(edrpou, name, listdata) -> str:
+    return json.dumps([edrpou or "", name or "", listdata], ensure_ascii=False)
+
+
+class FinapResponseCache:
+    """Постійний кеш відповідей FinAP з TTL і статистикою звернень."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL, negative_ttl: int = NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, ttl REAL)"
+            )
+            # Файли кешу попередньої версії - без строку життя окремого запису
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(responses)")]
+            if "ttl" not in columns:
+                conn.execute("ALTER TABLE responses ADD COLUMN ttl REAL")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str):
+        """Повертає збережену відповідь або None (відсутня чи прострочена)."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created, ttl FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[1] <= (row[2] if row[2] is not None else self.ttl):
+                self.hits += 1
+                return json.loads(row[0])
+            if row:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value, ttl: float = None) -> None:
+        """Зберігає відповідь; ttl - власний строк життя запису (None - загальний self.ttl)."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, ttl) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time(), ttl),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM responses WHERE created + COALESCE(ttl, ?) < ?", (self.ttl, time.time())
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "ttl": self.ttl,
+            "path": self.path,
+        }
+
+
+_cache = None
+_session = None
+_init_lock = threading.Lock()
+
+
+def get_cache() -> FinapResponseCache:
+    """Кеш відповідей, один на процес."""
+    global _cache
+    with _init_lock:
+        if _cache is None:
+            _cache = FinapResponseCache()
+        return _cache
+
+
+def get_session() -> requests.Session:
+    """HTTP-сесія з keep-alive і пулом з'єднань, одна на процес."""
+    global _session
+    with _init_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=SESSION_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.verify = False
+            _session = session
+        return _session
+
+
+def format_cache_stats(stats: dict) -> str:
+    """Короткий рядок статистики кешу для інтерфейсу."""
+    return (
+        f"Кеш FinAP: записів {stats['entries']}, влучань {stats['hits']}, промахів {stats['misses']} "
+        f"({stats['hit_rate']:.0%}), {stats['size_bytes'] / 1024:.0f} КБ, TTL {stats['ttl'] // 3600} год"
+    )
@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""
+Спільний клієнт FinAP CheckLists без залежності від Streamlit.
+
+Використовується сторінкою перевірки страхувальника (PENSION_FUND/app.py,
+pages/7_PENSION_FUND.py) і блоком ПФУ генератора досьє
+(MANY_PDF_v_PERSON/pension_processor.py), тож кеш відповідей і пул з'єднань
+(finap_cache) спільні для всього порталу.
+
+Клієнт має синхронний (query, query_many) та асинхронний (aquery,
+aquery_many) інтерфейси, налаштовувані таймаути й повтори з експоненційною
+затримкою, а також лічильники затримки та частки помилок (metrics).
+"""
+
+import asyncio
+import datetime
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import requests
+import urllib3
+
+from finap_cache import cache_key, get_cache, get_session
+
+urllib3.disable_warnings()
+
+
+# ══════════════════════════════════════════════
+# КОНФІГ
+# ══════════════════════════════════════════════
+@dataclass(frozen=True)
+class FinapConfig:
+    url: str = "https://finap.com.ua:9443/api"
+    id_subject: str = "ERDF_api"
+    tokken: str = ""
+    listdata: int = 4_194_304  # edrfullinfo
+    timeout: float = 30.0      # таймаут одного запиту, с
+    retries: int = 2           # повтори після першої невдалої спроби
+    backoff: float = 0.5       # базова затримка між повторами, с (подвоюється)
+    max_workers: int = 4       # одночасних запитів у пакетному режимі
+
+    @classmethod
+    def from_mapping(cls, mapping, **overrides) -> "FinapConfig":
+        """Конфіг з secrets.toml (st.secrets) або будь-якого словника."""
+        values = {
+            "url": mapping.get("FINAP_URL", cls.url),
+            "id_subject": mapping.get("ID_SUBJECT_FM", cls.id_subject),
+            "tokken": mapping.get("TOKKEN", cls.tokken),
+            "timeout": float(mapping.get("FINAP_TIMEOUT", cls.timeout)),
+            "retries": int(mapping.get("FINAP_RETRIES", cls.retries)),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+
+# ══════════════════════════════════════════════
+# ПАРСЕР
+# ══════════════════════════════════════════════
+HEADER_KEYWORDS = [
+    "Назва юридичної особи", "страхувальника",
+    "Код ЄДРПОУ", "РНОКПП", "Дата доходу",
+]
+
+# Рядок виписки: назва, код ЄДРПОУ/РНОКПП, далі дати/суми до наступної назви
+INSURER_ROW_RE = re.compile(r"(?P<name>.*?)\b(?P<code>\d{10}|\d{8})\b(?P<tail>[\s\d.,:;/()\-–]*)", re.S)
+DATE_RE = re.compile(r"\b(\d{2})\.(\d{2})\.(\d{4})\b")
+
+
+@dataclass
+class InsuranceRecord:
+    company_name: Optional[str]
+    edrpou: Optional[str]
+    last_payment_date: Optional[str]
+
+
+def strip_header(text: str) -> str:
+    """Видаляє заголовок з тексту, залишаючи тільки дані."""
+    last_pos = 0
+    for kw in HEADER_KEYWORDS:
+        idx = text.rfind(kw)
+        if idx != -1:
+            end = idx + len(kw)
+            if end > last_pos:
+                last_pos = end
+    return text[last_pos:].strip()
+
+
+def parse_insurance_text(text: str) -> InsuranceRecord:
+    """Парсить рядок з реєстру ІПНП та витягує дані про страхувальника."""
+    data = strip_header(text)
+
+    # Витягуємо дату
+    date_match = re.search(r"\b(\d{2}\.\d{2}\.\d{4})\b", data)
+    date = date_match.group(1) if date_match else None
+
+    # Витягуємо код (ЄДРПОУ або РНОКПП)
+    code_match = re.search(r"\b(\d{10}|\d{8})\b", data)
+    edrpou = code_match.group(1) if code_match else None
+
+    # Витягуємо назву компанії
+    company_name = None
+    if code_match:
+        raw = data[:code_match.start()].strip().strip("-–").strip()
+        company_name = raw if raw else None
+
+    return InsuranceRecord(company_name=company_name, edrpou=edrpou, last_payment_date=date)
+
+
+def _date_key(date: Optional[str]):
+    """Ключ сортування для дати ДД.ММ.РРРР (None - найраніша)."""
+    if not date:
+        return (0, 0, 0)
+    day, month, year = date.split(".")
+    return (int(year), int(month), int(day))
+
+
+def parse_insurance_rows(text: str) -> List[InsuranceRecord]:
+    """
+    Парсить виписку ІПНП з багатьма рядками та повертає всіх страхувальників.
+
+    Рядки з однаковим ЄДРПОУ/РНОКПП об'єднуються, залишається найпізніша
+    дата внеску. Порядок - за першою появою страхувальника у виписці.
+    """
+    records = {}
+    for match in INSURER_ROW_RE.finditer(strip_header(text)):
+        code = match.group("code")
+        name = re.sub(r"\s+", " ", match.group("name")).strip().strip("-–").strip() or None
+        date_match = DATE_RE.search(match.group("tail"))
+        date = date_match.group(0) if date_match else None
+
+        existing = records.get(code)
+        if existing is None:
+            records[code] = InsuranceRecord(company_name=name, edrpou=code, last_payment_date=date)
+            continue
+        if _date_key(date) > _date_key(existing.last_payment_date):
+            existing.last_payment_date = date
+        if not existing.company_name:
+            existing.company_name = name
+
+    return list(records.values())
+
+
+# ══════════════════════════════════════════════
+# РОЗБІР ВІДПОВІДІ
+# ══════════════════════════════════════════════
+def parse_contacts(contacts_raw) -> dict:
+    """Парсить контакти з відповіді API."""
+    email, phone = None, None
+
+    if not contacts_raw:
+        return {"email": email, "phone": phone}
+
+    if isinstance(contacts_raw, str):
+        for part in [p.strip() for p in contacts_raw.split(";") if p.strip()]:
+            if "@" in part:
+                email = part
+            elif re.search(r"[\d\-\(\)\+]", part):
+                phone = part
+    elif isinstance(contacts_raw, list):
+        for c in contacts_raw:
+            ctype = (c.get("type") or "").lower()
+            val = (c.get("value") or "").strip()
+            if "email" in ctype or "@" in val:
+                email = val
+            elif "телефон" in ctype or "phone" in ctype:
+                phone = val
+
+    return {"email": email, "phone": phone}
+
+
+def extract_info(api_response: dict) -> dict:
+    """Витягує інформацію з відповіді FinAP API."""
+    result = api_response.get("result", api_response)
+
+    if isinstance(result, str):
+        raise RuntimeError(f"API повернув рядок: {result}")
+
+    edrfull = result.get("edrfullinfo", [])
+    if not edrfull:
+        err = api_response.get("errormessage") or api_response.get("message", "")
+        raise RuntimeError(f"Запис не знайдено в реєстрі. {err}")
+
+    rec = edrfull[0]
+    contacts = parse_contacts(rec.get("contacts"))
+    is_fop = rec.get("type") == 0
+    manager = rec.get("manager") or (rec.get("name") if is_fop else None)
+    status = rec.get("stan") or rec.get("state") or "—"
+
+    return {
+        "name": rec.get("name") or rec.get("shortname") or "—",
+        "address": rec.get("address") or "—",
+        "manager": manager or "—",
+        "kved": rec.get("kved") or "—",
+        "status": status,
+        "email": contacts["email"],
+        "phone": contacts["phone"],
+    }
+
+
+# Класи відповіді для кешу (classify_response)
+RESPONSE_FOUND = "found"
+RESPONSE_NOT_FOUND = "not_found"
+RESPONSE_ERROR = "error"
+
+
+def classify_response(api_response) -> str:
+    """
+    Клас відповіді FinAP для кешу.
+
+    RESPONSE_FOUND - extract_info приймає відповідь; RESPONSE_NOT_FOUND -
+    реєстр повернув порожній edrfullinfo; решта (помилки авторизації, ліміту,
+    result-рядок, несподіваний формат) - RESPONSE_ERROR.
+    """
+    try:
+        extract_info(api_response)
+        return RESPONSE_FOUND
+    except Exception:
+        pass
+    result = api_response.get("result") if isinstance(api_response, dict) else None
+    if isinstance(result, dict) and result.get("edrfullinfo") == []:
+        return RESPONSE_NOT_FOUND
+    return RESPONSE_ERROR
+
+
+# ══════════════════════════════════════════════
+# МЕТРИКИ
+# ══════════════════════════════════════════════
+class FinapMetrics:
+    """Лічильники запитів до FinAP: затримка, помилки, повтори, влучання в кеш."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+
+    def record(self, latency: float, ok: bool, retries: int = 0) -> None:
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests_count, errors = self.requests, self.errors
+            retries, cache_hits = self.retries, self.cache_hits
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "requests": requests_count,
+            "errors": errors,
+            "error_rate": errors / requests_count if requests_count else 0.0,
+            "retries": retries,
+            "cache_hits": cache_hits,
+            "latency_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+        }
+
+
+def format_metrics(snapshot: dict) -> str:
+    """Короткий рядок метрик для інтерфейсу."""
+    return (
+        f"FinAP: запитів {snapshot['requests']}, помилок {snapshot['errors']} ({snapshot['error_rate']:.0%}), "
+        f"повторів {snapshot['retries']}, з кешу {snapshot['cache_hits']}, "
+        f"затримка p50 {snapshot['latency_p50'] * 1000:.0f} мс / p95 {snapshot['latency_p95'] * 1000:.0f} мс"
+    )
+
+
+# ══════════════════════════════════════════════
+# КЛІЄНТ
+# ══════════════════════════════════════════════
+class FinapError(RuntimeError):
+    """Помилка запиту до FinAP після всіх повторів."""
+
+
+# Помилки, після яких є сенс повторити запит
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class FinapClient:
+    def __init__(self, config: FinapConfig, cache=None, session: requests.Session = None):
+        self.config = config
+        self.cache = cache if cache is not None else get_cache()
+        self.session = session or get_session()
+        self.metrics = FinapMetrics()
+
+    def _payload(self, record: InsuranceRecord) -> dict:
+        payload = {
+            "IDinternal": 1,
+            "DateRequest": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "IDsubjectFM": self.config.id_subject,
+            "tokken": self.config.tokken,
+            "IDuserPC": 1,
+            "listdata": self.config.listdata,
+        }
+        if record.company_name:
+            payload["name"] = record.company_name
+        if record.edrpou:
+            payload["ipn"] = record.edrpou
+        return payload
+
+    def _post(self, payload: dict) -> dict:
+        """Один запит з повторами; повертає розібрану відповідь."""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.post(self.config.url, json=payload, timeout=self.config.timeout, verify=False)
+                if resp.status_code in RETRYABLE_STATUS and attempt < self.config.retries:
+                    raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+                resp.raise_for_status()
+                parsed = resp.json()
+                break
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = getattr(e.response, "status_code", None) if isinstance(e, requests.HTTPError) else None
+                retryable = status is None or status in RETRYABLE_STATUS
+                if not retryable or attempt >= self.config.retries:
+                    self.metrics.record(time.perf_counter() - started, ok=False, retries=attempt)
+                    raise FinapError(f"FinAP недоступний: {e}") from e
+                time.sleep(self.config.backoff * (2 ** attempt))
+                attempt += 1
+            except ValueError as e:
+                self.metrics.record(time.perf_counter() - started, ok=False, retries=attempt)
+                raise FinapError(f"FinAP повернув не JSON: {e}") from e
+
+        self.metrics.record(time.perf_counter() - started, ok=True, retries=attempt)
+        if isinstance(parsed, list):
+            if not parsed:
+                raise RuntimeError("API повернув порожній список")
+            parsed = parsed[0]
+        return parsed
+
+    def query(self, record: InsuranceRecord, use_cache: bool = True) -> dict:
+        """
+        Запит до FinAP для одного страхувальника.
+
+        Відповідь береться з локального кешу, якщо вона там є і не прострочена;
+        use_cache=False примусово робить свіжий запит (і оновлює кеш). Кешуються
+        лише знайдені записи та (на cache.negative_ttl) відповіді «не знайдено».
+        """
+        key = cache_key(record.edrpou, record.company_name, self.config.listdata)
+        if use_cache:
+            cached = self.cache.get(key)
+            # Помилки, збережені до перевірки відповідей, не повертаються
+            if cached is not None and classify_response(cached) != RESPONSE_ERROR:
+                self.metrics.record_cache_hit()
+                return cached
+
+        parsed = self._post(self._payload(record))
+        kind = classify_response(parsed)
+        if kind == RESPONSE_FOUND:
+            self.cache.put(key, parsed)
+        elif kind == RESPONSE_NOT_FOUND:
+            self.cache.put(key, parsed, ttl=self.cache.negative_ttl)
+        else:
+            # Свіжа помилка не лишає в кеші і попередню відповідь
+            self.cache.delete(key)
+        return parsed
+
+    def check(self, record: InsuranceRecord, use_cache: bool = True) -> dict:
+        """Запит + розбір відповіді (extract_info)."""
+        return extract_info(self.query(record, use_cache))
+
+    def query_many(self, records: List[InsuranceRecord], use_cache: bool = True) -> list:
+        """
+        Паралельна перевірка (не більше config.max_workers одночасних запитів).
+
+        Returns:
+            list: по одному елементу на запис у тому ж порядку - dict з
+                extract_info або Exception, якщо перевірка не вдалася
+        """
+        def safe_check(record):
+            try:
+                return self.check(record, use_cache)
+            except Exception as e:
+                return e
+
+        if not records:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.config.max_workers, len(records)))) as pool:
+            return list(pool.map(safe_check, records))
+
+    async def aquery(self, record: InsuranceRecord, use_cache: bool = True) -> dict:
+        """Асинхронний варіант query (запит виконується у потоці, сесія спільна)."""
+        return await asyncio.to_thread(self.query, record, use_cache)
+
+    async def acheck(self, record: InsuranceRecord, use_cache: bool = True) -> dict:
+        return extract_info(await self.aquery(record, use_cache))
+
+    async def aquery_many(self, records: List[InsuranceRecord], use_cache: bool = True) -> list:
+        """Асинхронний варіант query_many з тим самим обмеженням паралельності."""
+        semaphore = asyncio.Semaphore(max(1, self.config.max_workers))
+
+        async def guarded(record):
+            async with semaphore:
+                try:
+                    return await self.acheck(record, use_cache)
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(guarded(record) for record in records))
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(config: FinapConfig = None) -> FinapClient:
+    """Клієнт для конфігу, один на процес (метрики накопичуються між перезапусками сторінки)."""
+    config = config or FinapConfig()
+    with _clients_lock:
+        if config not in _clients:
+            _clients[config] = FinapClient(config)
+        return _clients[config]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Завантаження коду окремих додатків у сторінки порталу без exec() на кожен rerun.
+
+Файл додатка компілюється один раз (код кешується за mtime файлу) і
+виконується у постійному модулі з sys.modules, тож скомпільовані регулярні
+вирази, кеші та інші об'єкти рівня модуля переживають rerun Streamlit.
+Виклики st.set_page_config прибираються з дерева AST (конфігурацію задає
+сторінка-обгортка).
+
+Якщо у модулі є функція main(), на кожен rerun викликається лише вона (код
+модуля виконується один раз, як звичайний імпорт). Інакше - файл-скрипт:
+кешований код повторно виконується у тому самому просторі імен.
+"""
+
+import ast
+import os
+import sys
+import threading
+import types
+
+_code_cache = {}
+_lock = threading.Lock()
+
+
+class _StripPageConfig(ast.NodeTransformer):
+    """Прибирає вирази-виклики *.set_page_config(...)."""
+
+    def visit_Expr(self, node):
+        call = node.value
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr == "set_page_config":
+            return ast.Pass()
+        return node
+
+
+def compile_page(path: str):
+    """Код файлу без st.set_page_config; компілюється лише при зміні mtime."""
+    mtime = os.path.getmtime(path)
+    cached = _code_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1], mtime
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    tree = ast.fix_missing_locations(_StripPageConfig().visit(tree))
+    code = compile(tree, path, "exec")
+    _code_cache[path] = (mtime, code)
+    return code, mtime
+
+
+def load_page_module(path: str, module_name: str):
+    """
+    Постійний модуль додатка: (модуль, чи виконувався код щойно).
+
+    Код виконується повторно лише після зміни файлу - у той самий простір
+    імен, тож стан модуля зберігається й тоді.
+    """
+    with _lock:
+        code, mtime = compile_page(path)
+        module = sys.modules.get(module_name)
+        if module is not None and getattr(module, "__page_mtime__", None) == mtime:
+            return module, False
+        if module is None:
+            module = types.ModuleType(module_name)
+            module.__file__ = path
+            sys.modules[module_name] = module
+        exec(code, module.__dict__)
+        module.__page_mtime__ = mtime
+        return module, True
+
+
+def run_page(path: str, module_name: str, entry: str = "main"):
+    """Запускає додаток у сторінці: entry() модуля або кешований код скрипту."""
+    module, executed = load_page_module(path, module_name)
+    func = getattr(module, entry, None)
+    if callable(func):
+        func()
+    elif not executed:
+        exec(_code_cache[path][1], module.__dict__)
+    return module
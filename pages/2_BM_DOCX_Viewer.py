@@ -1,10 +1,15 @@
 import streamlit as st
 import os
+import sys
+import io
+import zipfile
 import base64
+import pandas as pd
 
 st.set_page_config(page_title="BM DOCX Viewer", page_icon="📄", layout="wide")
 
 from utils import remove_max_width
+from static_assets import bundle_status, inline_vendor_assets
 remove_max_width()
 
 def get_base64_image(image_path):
@@ -13,22 +18,86 @@ def get_base64_image(image_path):
     with open(image_path, "rb") as img_file:
         return base64.b64encode(img_file.read()).decode('utf-8')
 
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__)) # pages/
+root_dir = os.path.dirname(current_dir)
+bm_dir = os.path.join(root_dir, "BM_v_DOCX")
+
+if bm_dir not in sys.path:
+    sys.path.append(bm_dir)
+
+def render_server_mode():
+    """Обробка архівів на сервері (bm_engine): один або багато архівів за раз."""
+    from bm_engine import build_reports_batch
+
+    archives = st.file_uploader(
+        "Архіви з БМ (*.zip, *.rar)",
+        type=["zip", "rar"],
+        accept_multiple_files=True,
+        key="bm_server_archives",
+    )
+    render_maps = st.checkbox("Будувати карти (тайли OpenStreetMap)", value=True)
+
+    if archives and st.button("Витягти та згенерувати звіти", type="primary"):
+        progress = st.progress(0.0, text="Обробка архівів...")
+        reports = build_reports_batch(
+            archives,
+            render_maps=render_maps,
+            on_progress=lambda done, total, _: progress.progress(done / total, text=f"Архівів: {done}/{total}"),
+        )
+        st.session_state["bm_server_reports"] = reports
+
+    reports = st.session_state.get("bm_server_reports")
+    if not reports:
+        return
+
+    ok = [r for r in reports if r["docx"]]
+    for report in reports:
+        if report["error"]:
+            st.error(f"{report['name']}: {report['error']}")
+    st.dataframe(
+        pd.DataFrame([
+            {"Архів": r["name"], "DOCX": r["file_name"], "Записів": r["stats"].get("records"),
+             "Фото": r["stats"].get("photos"), "Карт": r["stats"].get("maps"),
+             "Час, с": round(r["stats"].get("duration", 0.0), 2), "Помилка": r["error"]}
+            for r in reports
+        ]),
+        use_container_width=True,
+    )
+    if len(ok) == 1:
+        st.download_button("💾 Завантажити DOCX", data=ok[0]["docx"], file_name=ok[0]["file_name"],
+                           mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+    elif ok:
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for r in ok:
+                zf.writestr(r["file_name"], r["docx"])
+        st.download_button("💾 Завантажити всі звіти (ZIP)", data=archive.getvalue(),
+                           file_name="bm_reports.zip", mime="application/zip")
+
 def main():
     st.title("📄 Обробка архивів з БМ")
 
-    # Define paths
-    current_dir = os.path.dirname(os.path.abspath(__file__)) # pages/
-    root_dir = os.path.dirname(current_dir)
-    bm_dir = os.path.join(root_dir, "BM_v_DOCX")
+    mode = st.radio(
+        "Режим обробки",
+        ["У браузері", "На сервері (пакетно)"],
+        horizontal=True,
+        help="Серверний режим не навантажує вкладку і приймає кілька архівів одразу.",
+    )
+    if mode != "У браузері":
+        render_server_mode()
+        return
+
     html_path = os.path.join(bm_dir, "index.html")
 
     if not os.path.exists(html_path):
         st.error(f"HTML файл не знайдено: {html_path}")
         return
 
-    # Read HTML
+    # Read HTML; CDN-бібліотеки замінюються локальним набором static/vendor
     with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
+        html_content = inline_vendor_assets(f.read())
+    st.caption(bundle_status())
 
     # Handle Images (specifically the logo mentioned in code analysis)
     # <img src="./images/photo_2025-09-22_22-10-14-Photoroom.png"
@@ -22,6 +22,10 @@ st.set_page_config(page_title="Генератор досьє з PDF", page_icon=
 from utils import remove_max_width
 remove_max_width()
 
+# Пул процесів і типові зображення спільні для всіх сесій (якщо портал відкрили не з Home)
+from shared_resources import start_warmup
+start_warmup()
+
 # --- IMPORT & RUN ---
 try:
     # Change working directory to app dir so it can find 'default_avatar.png' etc.
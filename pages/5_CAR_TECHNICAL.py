@@ -1,7 +1,13 @@
 import streamlit as st
-import pandas as pd
-import re
 import os
+import sys
+
+try:
+    from vehicle_parser import parse_vehicle_text, parse_vehicle_files, vehicles_table
+except ImportError:
+    # Запуск напряму (streamlit run pages/5_CAR_TECHNICAL.py) - додаємо корінь репозиторію
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from vehicle_parser import parse_vehicle_text, parse_vehicle_files, vehicles_table
 
 st.set_page_config(page_title="Парсер реєстрації ТЗ", page_icon="🚗")
 
@@ -11,156 +17,6 @@ st.markdown("""
 Цей додаток витягує інформацію про транспортний засіб з файлу або тексту.
 """)
 
-def parse_vehicle_data(text):
-    """Парсить текст та витягує дані про ТЗ"""
-    result = {}
-    
-    # Шаблони для пошуку
-    patterns = {
-        'номерний_знак': [
-            r'Державний номер[:\s]*([A-ZА-ЯІЇЄ0-9]+)',
-            r'Номерний знак[:\s]*([A-ZА-ЯІЇЄ0-9]+)',
-            r'НОМЕРНИЙ ЗНАК[:\s]*([A-ZА-ЯІЇЄ0-9]+)',
-        ],
-        'власник': [
-            r'Власник[:\s]*([A-ZА-ЯІЇЄ\s]+?)(?=\s*\d{2}\.\d{2}\.\d{4}|\s*$)',
-        ],
-        'дата_народження': [
-            r'Дата народження[:\s]*(\d{2}\.\d{2}\.\d{4})',
-            r'Власник[:\s]*[A-ZА-ЯІЇЄ\s]+(\d{2}\.\d{2}\.\d{4})',
-        ],
-        'іпн': [
-            r'ІПН[:\s]*(\d+)',
-            r'ІПН/ЄДРПОУ[:\s]*(\d+)',
-        ],
-        'місце_реєстрації': [
-            r'Адреса власника[:\s]*([^\n]+)',
-            r'Адреса реєстрації ТЗ[:\s]*([^\n]+)',
-        ],
-        'марка': [
-            r'Марка/модель ТЗ[:\s]*([A-Z]+)',
-        ],
-        'модель': [
-            r'Марка/модель ТЗ[:\s]*[A-Z]+\s+([A-Z0-9]+(?:\s+[A-Z0-9.]+)?)',
-        ],
-        'vin': [
-            r'vin ТЗ[:\s]*([A-Z0-9]+)',
-            r'VIN[:\s]*([A-Z0-9]+)',
-        ],
-        'колір': [
-            r'Колір ТЗ[:\s]*([A-ZА-ЯІЇЄ]+)',
-            r'Колір[:\s]*([A-ZА-ЯІЇЄ]+)',
-        ],
-        'рік_випуску': [
-            r'Рік випуску ТЗ[:\s]*(\d{4})',
-            r'Рік випуску[:\s]*(\d{4})',
-        ],
-    }
-    
-    for field, field_patterns in patterns.items():
-        for pattern in field_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result[field] = match.group(1).strip()
-                break
-    
-    # Спеціальна обробка для марка/модель з тексту
-    if 'марка' not in result:
-        match = re.search(r'Марка/модель ТЗ[:\s]*([^\n]+)', text, re.IGNORECASE)
-        if match:
-            full = match.group(1).strip()
-            parts = full.split()
-            if len(parts) >= 1:
-                result['марка'] = parts[0]
-            if len(parts) >= 2:
-                result['модель'] = ' '.join(parts[1:])
-    
-    return result
-
-def parse_excel_file(df):
-    """Парсить Excel файл специфічного формату"""
-    result = {}
-    
-    # Перетворюємо DataFrame у словник для пошуку
-    text = df.to_string()
-    
-    # Проходимо по всіх клітинках
-    for idx, row in df.iterrows():
-        for col_idx, cell in enumerate(row):
-            if pd.notna(cell):
-                cell_str = str(cell).strip()
-                
-                # Номерний знак
-                if 'НОМЕРНИЙ ЗНАК' in cell_str.upper():
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['номерний_знак'] = str(row.iloc[col_idx + 1]).strip()
-                
-                # Власник
-                if 'Власник' in cell_str and ':' in cell_str:
-                    match = re.search(r'Власник[:\s]*([A-ZА-ЯІЇЄ\s]+)', cell_str)
-                    if match:
-                        result['власник'] = match.group(1).strip()
-                
-                # Дата народження
-                if 'Дата народження' in cell_str:
-                    match = re.search(r'(\d{2}\.\d{2}\.\d{4})', cell_str)
-                    if match:
-                        result['дата_народження'] = match.group(1)
-                
-                # ІПН
-                if 'ІПН' in cell_str:
-                    match = re.search(r'ІПН[:\s]*(\d+)', cell_str)
-                    if match:
-                        result['іпн'] = match.group(1)
-                    elif col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        val = str(row.iloc[col_idx + 1]).strip()
-                        if val.isdigit():
-                            result['іпн'] = val
-                
-                # Місце реєстрації (для файлу)
-                if 'Місце реєстрації' in cell_str:
-                    match = re.search(r'Місце реєстрації[:\s]*(.+)', cell_str)
-                    if match:
-                        result['місце_реєстрації'] = match.group(1).strip()
-                
-                # Марка
-                if cell_str.strip() == 'Марка':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['марка'] = str(row.iloc[col_idx + 1]).strip()
-                
-                # Модель
-                if cell_str.strip() == 'Модель':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['модель'] = str(row.iloc[col_idx + 1]).strip()
-                
-                # VIN
-                if cell_str.strip() == 'VIN':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['vin'] = str(row.iloc[col_idx + 1]).strip()
-                
-                # Колір
-                if cell_str.strip() == 'Колір':
-                    if col_idx + 1 < len(row) and pd.notna(row.iloc[col_idx + 1]):
-                        result['колір'] = str(row.iloc[col_idx + 1]).strip()
-                
-                # Рік випуску
-                if 'Рік випуску' in cell_str:
-                    match = re.search(r'(\d{4})', cell_str)
-                    if match:
-                        result['рік_випуску'] = match.group(1)
-    
-    # Якщо не знайшли через структуру, шукаємо через текст
-    if not result:
-        result = parse_vehicle_data(text)
-    
-    # Дозаповнюємо пропущені поля з тексту
-    text_result = parse_vehicle_data(text)
-    for key, value in text_result.items():
-        if key not in result or not result[key]:
-            result[key] = value
-    
-    return result
-
 def format_output(data):
     """Форматує дані в одне речення"""
     parts = []
@@ -202,7 +58,7 @@ def format_output(data):
 
 # Вибір режиму вводу
 input_method = st.radio("Оберіть спосіб вводу даних:", 
-                        ["Текст", "Файл (Excel/XLS/XLSX)"])
+                        ["Текст", "Файли (Excel/XLS/XLSX/TXT)"])
 
 extracted_data = None
 
@@ -210,39 +66,31 @@ if input_method == "Текст":
     raw_text = st.text_area("Вставте текст з даними про ТЗ:", height=300)
     
     if st.button("Обробити текст") and raw_text:
-        extracted_data = parse_vehicle_data(raw_text)
+        extracted_data = parse_vehicle_text(raw_text)
 
-else:  # Файл
-    uploaded_file = st.file_uploader("Завантажте файл Excel", 
-                                      type=['xls', 'xlsx', 'csv'])
-    
-    if uploaded_file is not None:
-        try:
-            file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-            
-            if file_extension == '.csv':
-                df = pd.read_csv(uploaded_file, encoding='utf-8', sep=None, engine='python')
-            else:
-                try:
-                    df = pd.read_excel(uploaded_file, engine='openpyxl')
-                except:
-                    df = pd.read_excel(uploaded_file, engine='xlrd')
-            
-            st.subheader("📋 Попередній перегляд файлу:")
-            st.dataframe(df.head(25))
-            
-            if st.button("Обробити файл"):
-                extracted_data = parse_excel_file(df)
-                
-        except Exception as e:
-            st.error(f"Помилка при читанні файлу: {str(e)}")
+else:  # Файли
+    uploaded_files = st.file_uploader("Завантажте файли Excel або текстові", 
+                                      type=['xls', 'xlsx', 'csv', 'txt'],
+                                      accept_multiple_files=True)
+    
+    if uploaded_files and st.button("Обробити файли"):
+        with st.spinner("Обробка файлів..."):
+            reports = parse_vehicle_files(uploaded_files)
+        
+        extracted_data = [vehicle for report in reports for vehicle in report['vehicles']]
+        failed = [f"{report['name']}: {report['error']}" for report in reports if report['error']]
+        
+        summary = f"Оброблено файлів: {len(reports)}, знайдено ТЗ: {len(extracted_data)}"
+        if failed:
+            st.warning(summary + f", з помилками: {len(failed)} — " + "; ".join(failed))
+        else:
+            st.info(summary)
+        
+        st.subheader("📋 Зведена таблиця:")
+        st.dataframe(vehicles_table(reports), hide_index=True)
 
 # Виведення результату
 if extracted_data:
     st.subheader("📌 Витягнуті дані:")
     
-
-    formatted = format_output(extracted_data)
-    st.success(formatted)
-    
-
+    st.success("\n\n".join(format_output(vehicle) for vehicle in extracted_data))
@@ -22,37 +22,12 @@ from utils import remove_max_width
 remove_max_width()
 
 # --- IMPORT & RUN ---
-# The Real Estate module has all code at top level, so we need to exec it
-# instead of importing normally (which would run st.set_page_config twice)
+# Код додатка компілюється один раз (кеш за mtime) і живе у постійному модулі,
+# тож на rerun викликається лише main() без повторного читання та exec файлу
 try:
-    main_file_path = os.path.join(app_dir, "main.py")
+    from page_loader import run_page
 
-    # Read the main.py file content
-    with open(main_file_path, 'r', encoding='utf-8') as f:
-        main_code = f.read()
-
-    # Remove the st.set_page_config line to avoid duplicate config error
-    import re
-    import pdfplumber
-    import warnings
-    import logging
-    from io import BytesIO
-
-    main_code = re.sub(r"st\.set_page_config\([^)]+\)", "# st.set_page_config removed by wrapper", main_code)
-
-    # Execute the modified code in the current namespace with all required imports
-    exec_globals = {
-        '__name__': '__main__',
-        'st': st,
-        'os': os,
-        'sys': sys,
-        're': re,
-        'pdfplumber': pdfplumber,
-        'warnings': warnings,
-        'logging': logging,
-        'BytesIO': BytesIO
-    }
-    exec(main_code, exec_globals)
+    run_page(os.path.join(app_dir, "main.py"), "real_estate_app")
 
 except Exception as e:
     st.error(f"Помилка при запуску додатку Real Estate: {e}")
@@ -1,125 +1,36 @@
-import re
-import json
-import datetime
-import requests
-import urllib3
+import os
+import sys
 import streamlit as st
-from dataclasses import dataclass, asdict
-from typing import Optional
+from typing import List
 
-urllib3.disable_warnings()
+try:
+    from finap_cache import format_cache_stats, get_cache
+    from finap_client import FinapConfig, InsuranceRecord, format_metrics, get_client, parse_insurance_rows, parse_insurance_text
+except ImportError:
+    # Запуск напряму з підпапки - додаємо корінь репозиторію
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from finap_cache import format_cache_stats, get_cache
+    from finap_client import FinapConfig, InsuranceRecord, format_metrics, get_client, parse_insurance_rows, parse_insurance_text
 
 # ── Конфіг із secrets.toml ────────────────────
-FINAP_URL   = st.secrets.get("FINAP_URL",     "https://finap.com.ua:9443/api")
-ID_SUBJECT  = st.secrets.get("ID_SUBJECT_FM", "ERDF_api")
-TOKKEN      = st.secrets.get("TOKKEN",        "")
-LISTDATA    = 4_194_304  # edrfullinfo
-
-# ══════════════════════════════════════════════
-# ПАРСЕР
-# ══════════════════════════════════════════════
-HEADER_KEYWORDS = [
-    "Назва юридичної особи", "страхувальника",
-    "Код ЄДРПОУ", "РНОКПП", "Дата доходу",
-]
-
-@dataclass
-class InsuranceRecord:
-    company_name: Optional[str]
-    edrpou: Optional[str]
-    last_payment_date: Optional[str]
-
-def strip_header(text: str) -> str:
-    last_pos = 0
-    for kw in HEADER_KEYWORDS:
-        idx = text.rfind(kw)
-        if idx != -1:
-            end = idx + len(kw)
-            if end > last_pos:
-                last_pos = end
-    return text[last_pos:].strip()
-
-def parse_insurance_text(text: str) -> InsuranceRecord:
-    data = strip_header(text)
-    date_match = re.search(r"\b(\d{2}\.\d{2}\.\d{4})\b", data)
-    date = date_match.group(1) if date_match else None
-    code_match = re.search(r"\b(\d{10}|\d{8})\b", data)
-    edrpou = code_match.group(1) if code_match else None
-    company_name = None
-    if code_match:
-        raw = data[:code_match.start()].strip().strip("-–").strip()
-        company_name = raw if raw else None
-    return InsuranceRecord(company_name=company_name, edrpou=edrpou, last_payment_date=date)
-
-# ══════════════════════════════════════════════
-# API
-# ══════════════════════════════════════════════
-def query_finap(record: InsuranceRecord) -> dict:
-    payload = {
-        "IDinternal"  : 1,
-        "DateRequest" : datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "IDsubjectFM" : ID_SUBJECT,
-        "tokken"      : TOKKEN,
-        "IDuserPC"    : 1,
-        "listdata"    : LISTDATA,
-    }
-    if record.company_name:
-        payload["name"] = record.company_name
-    if record.edrpou:
-        payload["ipn"] = record.edrpou
-
-    resp = requests.post(FINAP_URL, json=payload, timeout=30, verify=False)
-    resp.raise_for_status()
-
-    parsed = resp.json()
-    if isinstance(parsed, list):
-        if not parsed:
-            raise RuntimeError("API повернув порожній список")
-        return parsed[0]
-    return parsed
-
-def parse_contacts(contacts_raw) -> dict:
-    email, phone = None, None
-    if not contacts_raw:
-        return {"email": email, "phone": phone}
-    if isinstance(contacts_raw, str):
-        for part in [p.strip() for p in contacts_raw.split(";") if p.strip()]:
-            if "@" in part:
-                email = part
-            elif re.search(r"[\d\-\(\)\+]", part):
-                phone = part
-    elif isinstance(contacts_raw, list):
-        for c in contacts_raw:
-            ctype = (c.get("type") or "").lower()
-            val   = (c.get("value") or "").strip()
-            if "email" in ctype or "@" in val:
-                email = val
-            elif "телефон" in ctype or "phone" in ctype:
-                phone = val
-    return {"email": email, "phone": phone}
-
-def extract_info(api_response: dict) -> dict:
-    result  = api_response.get("result", api_response)
-    if isinstance(result, str):
-        raise RuntimeError(f"API повернув рядок: {result}")
-    edrfull = result.get("edrfullinfo", [])
-    if not edrfull:
-        err = api_response.get("errormessage") or api_response.get("message", "")
-        raise RuntimeError(f"Запис не знайдено в реєстрі. {err}")
-    rec      = edrfull[0]
-    contacts = parse_contacts(rec.get("contacts"))
-    is_fop   = rec.get("type") == 0
-    manager  = rec.get("manager") or (rec.get("name") if is_fop else None)
-    status   = rec.get("stan") or rec.get("state") or "—"
-    return {
-        "name"    : rec.get("name") or rec.get("shortname") or "—",
-        "address" : rec.get("address") or "—",
-        "manager" : manager or "—",
-        "kved"    : rec.get("kved") or "—",
-        "status"  : status,
-        "email"   : contacts["email"],
-        "phone"   : contacts["phone"],
-    }
+client = get_client(FinapConfig.from_mapping(st.secrets))
+
+def check_batch(records: List[InsuranceRecord], use_cache: bool = True) -> List[dict]:
+    """Паралельна перевірка страхувальників (не більше client.config.max_workers запитів)."""
+    rows = []
+    for rec, outcome in zip(records, client.query_many(records, use_cache)):
+        row = {"Назва (ПФУ)": rec.company_name or "—", "Код": rec.edrpou,
+               "Остання дата внеску": rec.last_payment_date or "—"}
+        if isinstance(outcome, Exception):
+            row["Помилка"] = str(outcome)
+        else:
+            row.update({
+                "Назва (ЄДР)": outcome["name"], "Адреса": outcome["address"],
+                "Керівник": outcome["manager"], "КВЕД": outcome["kved"], "Статус": outcome["status"],
+                "Email": outcome["email"] or "—", "Телефон": outcome["phone"] or "—", "Помилка": "",
+            })
+        rows.append(row)
+    return rows
 
 # ══════════════════════════════════════════════
 # STREAMLIT UI
@@ -333,6 +244,10 @@ raw_input = st.text_area(
     label_visibility="collapsed",
 )
 
+# ── Кеш FinAP ─────────────────────────────────
+bypass_cache = st.checkbox("Оминути кеш FinAP (свіжий запит)", value=False)
+use_cache = not bypass_cache
+
 # ── Попередній перегляд розпарсеного ──────────
 if raw_input.strip():
     rec = parse_insurance_text(raw_input.strip())
@@ -351,8 +266,7 @@ if raw_input.strip():
         else:
             with st.spinner("Запит до FinAP CheckLists..."):
                 try:
-                    api_resp = query_finap(rec)
-                    info     = extract_info(api_resp)
+                    info = client.check(rec, use_cache)
 
                     # Статус badge
                     status_val = info["status"]
@@ -430,3 +344,23 @@ if raw_input.strip():
 else:
     st.markdown("<br>", unsafe_allow_html=True)
     st.button("🔎  Перевірити в FinAP", disabled=True)
+
+# ── Пакетна перевірка ─────────────────────────
+st.markdown("---")
+with st.expander("📚 Пакетна перевірка всієї виписки ПФУ"):
+    batch_file = st.file_uploader("Виписка ІПНП (.txt) — або використовується текст вище", type=["txt"])
+    if st.button("🔎  Перевірити всіх у FinAP"):
+        batch_text = batch_file.getvalue().decode("utf-8", errors="ignore") if batch_file else raw_input
+        batch_records = parse_insurance_rows(batch_text)
+        if not batch_records:
+            st.markdown('<div class="err-box">⚠️ Не вдалося знайти жодного ЄДРПОУ або РНОКПП у виписці.</div>', unsafe_allow_html=True)
+        else:
+            with st.spinner(f"Запит до FinAP CheckLists ({len(batch_records)} страхувальників)..."):
+                rows = check_batch(batch_records, use_cache)
+            failed = sum(1 for row in rows if row["Помилка"])
+            st.markdown(f'<div class="main-sub">Страхувальників: {len(rows)} · з помилками: {failed}</div>', unsafe_allow_html=True)
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+
+# ── Статистика кешу та запитів ────────────────
+st.caption(format_cache_stats(get_cache().stats()))
+st.caption(format_metrics(client.metrics.snapshot()))
@@ -0,0 +1,587 @@
+# -*- coding: utf-8 -*-
+"""
+Спільний модуль розбору PDF виписок з Державного реєстру речових прав.
+
+Використовується як окремим додатком (Real_estate/main.py, pages/6_REAL_ESTATE.py),
+так і генератором досьє (MANY_PDF_v_PERSON/real_estate_processor.py).
+Формат виписки визначається детекторами макетів (LAYOUTS), тож новий тип
+виписки додається через register_layout() без змін у самих додатках.
+"""
+
+import copy
+import hashlib
+import logging
+import re
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Callable, List
+
+import pdfplumber
+
+from shared_resources import POOL_WORKERS, compiled_pattern, pool_map
+
+logging.getLogger("pdfminer").setLevel(logging.ERROR)
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+NO_TEXT_ERROR = "Не вдалося прочитати текст з файлу."
+NO_DATA_ERROR = "Немає зареєстрованої нерухомості"
+
+# Максимальна кількість файлів у кеші результатів (ключ - SHA-256 вмісту)
+CACHE_MAX_ENTRIES = 256
+
+
+# ══════════════════════════════════════════════
+# ДОПОМІЖНІ ФУНКЦІЇ
+# ══════════════════════════════════════════════
+def clean_text(text):
+    if not text:
+        return ""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def normalize_apostrophes(text):
+    if not text:
+        return text
+    replacements = [
+        ('\u2019', "'"),
+        ('\u2018', "'"),
+        ('\u201B', "'"),
+        ('\u02BC', "'"),
+    ]
+    for old, new in replacements:
+        text = text.replace(old, new)
+    return text
+
+
+def extract_field(text, field_name, stop_at=None):
+    base_pattern = re.escape(field_name) + r'\s*:\s*'
+    if stop_at:
+        stop_pattern = r'(.*?)(?=' + re.escape(stop_at) + r'|\Z)'
+    else:
+        stop_pattern = r"(.*?)(?=\s+[А-ЯІЇЄ][А-ЯІЇЄа-яіїє'\s]+:|ВІДОМОСТІ|Актуальна|Дата|\Z)"
+
+    full_pattern = base_pattern + stop_pattern
+    match = compiled_pattern(full_pattern, re.IGNORECASE | re.DOTALL).search(text)
+    if match:
+        return clean_text(match.group(1))
+    return None
+
+
+# ══════════════════════════════════════════════
+# МАКЕТИ ВИПИСОК
+# ══════════════════════════════════════════════
+@dataclass
+class RealEstateLayout:
+    name: str
+    detect: Callable[[str], bool]
+    parse: Callable[[str], list]
+
+
+LAYOUTS: List[RealEstateLayout] = []
+
+
+def register_layout(name, detect, parse):
+    """
+    Реєструє макет виписки.
+
+    Args:
+        name: Назва макета
+        detect: Функція (text) -> bool, що визначає наявність макета в тексті
+        parse: Функція (text) -> list, що повертає список записів
+    """
+    LAYOUTS[:] = [layout for layout in LAYOUTS if layout.name != name]
+    LAYOUTS.append(RealEstateLayout(name=name, detect=detect, parse=parse))
+
+
+def detect_layouts(text):
+    """Повертає список макетів, знайдених у тексті виписки."""
+    return [layout for layout in LAYOUTS if layout.detect(text)]
+
+
+# --- Макет "ВІДОМОСТІ ПРО ОБ'ЄКТ НЕРУХОМОГО МАЙНА" (старий реєстр) ---
+
+LEGACY_HEADER = "ВІДОМОСТІ ПРО ОБ'ЄКТ НЕРУХОМОГО МАЙНА"
+
+
+def _detect_legacy(text):
+    return LEGACY_HEADER in text
+
+
+def _parse_legacy(text):
+    full_text = clean_text(text)
+    results = []
+
+    for block in full_text.split("З ДЕРЖАВНОГО РЕЄСТРУ РЕЧОВИХ ПРАВ"):
+        if not block or len(block) < 50:
+            continue
+
+        legacy_match = re.search(re.escape(LEGACY_HEADER), block)
+        if not legacy_match:
+            continue
+
+        legacy_start = legacy_match.end()
+        next_header_match = re.search(r"ВІДОМОСТІ ПРО ПРАВА|ВІДОМОСТІ З ЄДИНОГО", block[legacy_start:])
+        legacy_end = len(block) if not next_header_match else legacy_start + next_header_match.start()
+        legacy_text = block[legacy_start:legacy_end]
+
+        p_type = extract_field(legacy_text, "Тип майна", stop_at="Адреса нерухомого майна:")
+        p_address = extract_field(legacy_text, "Адреса нерухомого майна", stop_at="Загальна площа (кв.м):")
+        p_area = extract_field(legacy_text, "Загальна площа (кв.м)", stop_at="Номер запису:")
+
+        if p_type or p_address or p_area:
+            results.append({
+                "Тип майна": p_type,
+                "Адреса нерухомого майна": p_address,
+                "Загальна площа (кв.м)": p_area
+            })
+
+    return results
+
+
+# --- Макет "Актуальна інформація про ..." (поточний реєстр) ---
+
+def _detect_rights(text):
+    lower = text.lower()
+    return ("актуальна інформація про об'єкт речових прав" in lower
+            or "актуальна інформація про державну реєстрацію обтяжень" in lower)
+
+
+def _parse_rights(text):
+    results = []
+    lines = text.split('\n')
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+
+        # --- Секція обтяжень ---
+        if "актуальна інформація про державну реєстрацію обтяжень" in line.lower():
+            enc_data = {}
+            i += 1
+
+            while i < len(lines):
+                line = lines[i].strip()
+
+                # Перевіряємо, чи не почався новий розділ (будь-який інший)
+                if "актуальна інформація про" in line.lower() and "державну реєстрацію обтяжень" not in line.lower():
+                    break
+
+                if line.lower().startswith("підстава внесення запису:"):
+                    basis_parts = []
+                    if ':' in line:
+                        basis_parts.append(clean_text(line.split(':', 1)[1]))
+                    i += 1
+                    while i < len(lines):
+                        next_line = lines[i].strip()
+                        # Зупиняємося тільки на початку нового типу інформації
+                        if "вид обтяження:" in next_line.lower() or ("актуальна інформація про" in next_line.lower() and "державну реєстрацію обтяжень" not in next_line.lower()):
+                            break
+                        basis_parts.append(next_line)
+                        i += 1
+                    enc_data["Підстава внесення запису"] = ' '.join(basis_parts).strip()
+                    continue
+
+                elif line.lower().startswith("вид обтяження:"):
+                    enc_data["Вид обтяження"] = clean_text(line.split(':', 1)[1]) if ':' in line else ""
+                    i += 1
+                    continue
+
+                i += 1
+
+            if enc_data:
+                results.append(enc_data)
+
+        # --- Секція об'єкта ---
+        elif "актуальна інформація про об'єкт речових прав" in line.lower():
+            # Створюємо новий об'єкт нерухомості
+            current_obj = {}
+            registration_dates = []  # Зберігаємо всі дати реєстрації
+            shares = []  # Зберігаємо всі частки
+
+            i += 1
+            while i < len(lines):
+                line = lines[i].strip()
+
+                # Якщо знаходимо новий об'єкт - виходимо
+                if "актуальна інформація про об'єкт речових прав" in line.lower():
+                    break
+
+                # Інформація про речове право - поля збираються далі
+                if "актуальна інформація про речове право" in line.lower():
+                    i += 1
+                    continue
+
+                # Тип об'єкта
+                if line.lower().replace(':', '') == "тип об'єкта" or line.lower().startswith("тип об'єкта:") or line.lower().startswith("тип обєкта:"):
+                    if "Тип об'єкта" not in current_obj:
+                        saved_i = i
+                        value = ""
+                        if line.lower().replace(':', '') == "тип об'єкта" or line.lower().replace(':', '') == "тип обєкта":
+                            if i + 1 < len(lines):
+                                next_line = lines[i + 1].strip()
+                                if ':' not in next_line or next_line.lower().startswith('так'):
+                                    value = next_line
+                                    i += 1
+                        elif ':' in line:
+                            value = clean_text(line.split(':', 1)[1])
+                        if value:
+                            # Прибираємо зайву інформацію з типу
+                            value = value.replace('житлової нерухомості', '').strip()
+                            if value.endswith(','):
+                                value = value[:-1].strip()
+                            # Залишаємо тільки основний тип
+                            if ',' in value:
+                                value = value.split(',')[0].strip()
+                            current_obj["Тип об'єкта"] = value
+                        else:
+                            i = saved_i
+                    i += 1
+                    continue
+
+                # Кадастровий номер
+                elif line.lower().replace(':', '') == "кадастровий номер" or line.lower().startswith("кадастровий номер:"):
+                    if "Кадастровий номер" not in current_obj:
+                        saved_i = i
+                        value = ""
+                        if line.lower().replace(':', '') == "кадастровий номер":
+                            if i + 1 < len(lines):
+                                value = lines[i + 1].strip()
+                                i += 1
+                        elif ':' in line:
+                            value = clean_text(line.split(':', 1)[1])
+                        if value:
+                            current_obj["Кадастровий номер"] = value
+                        else:
+                            i = saved_i
+                    i += 1
+                    continue
+
+                # Опис об'єкта
+                elif line.lower().replace(':', '') == "опис об'єкта" or line.lower().startswith("опис об'єкта:") or line.lower().startswith("опис обєкта:"):
+                    if "Опис об'єкта" not in current_obj:
+                        saved_i = i
+                        desc_parts = []
+                        if ':' in line:
+                            desc_parts.append(clean_text(line.split(':', 1)[1]))
+                        i += 1
+                        # Читаємо до наступного поля
+                        while i < len(lines):
+                            next_line = lines[i].strip()
+                            next_lower = next_line.lower()
+                            # Відомі поля, що завершують опис
+                            if any(next_lower.startswith(f) for f in ['адреса', 'кадастровий номер', 'розмір частки', 'дата, час', 'номер відомостей']):
+                                break
+                            if "актуальна інформація про об'єкт речових прав" in next_lower:
+                                break
+                            if "актуальна інформація про речове право" in next_lower:
+                                break
+                            if next_lower.startswith('земельні ділянки') or next_lower.startswith('кадастровий номер'):
+                                # Це вже наступний блок - закінчуємо опис
+                                break
+                            desc_parts.append(next_line)
+                            i += 1
+                        full_desc = ' '.join(desc_parts)
+                        full_desc = full_desc.replace('Актуальна інформація про речове право', '').strip()
+                        current_obj["Опис об'єкта"] = clean_text(full_desc)
+                        i = saved_i
+                    i += 1
+                    continue
+
+                # Адреса
+                elif line.lower().replace(':', '') == "адреса" or line.lower().startswith("адреса:"):
+                    if "Адреса" not in current_obj:
+                        saved_i = i
+                        addr_parts = []
+                        if ':' in line:
+                            addr_parts.append(clean_text(line.split(':', 1)[1]))
+                        i += 1
+                        # Читаємо до наступного поля
+                        while i < len(lines):
+                            next_line = lines[i].strip()
+                            next_lower = next_line.lower()
+                            if any(next_lower.startswith(f) for f in ['опис', 'кадастровий номер', 'розмір частки', 'дата, час', 'номер відомостей']):
+                                break
+                            if "актуальна інформація про об'єкт речових прав" in next_lower:
+                                break
+                            if "актуальна інформація про речове право" in next_lower:
+                                break
+                            if next_lower.startswith('земельні ділянки') or next_lower.startswith('кадастровий номер'):
+                                # Це вже наступний блок - закінчуємо адресу
+                                break
+                            addr_parts.append(next_line)
+                            i += 1
+                        current_obj["Адреса"] = ' '.join(addr_parts)
+                        i = saved_i
+                    i += 1
+                    continue
+
+                # Розмір частки
+                elif line.lower().startswith("розмір частки:"):
+                    value = line.split(':', 1)[1] if ':' in line else ""
+                    share = clean_text(value)
+                    if share and share not in shares and share != "1/1":
+                        shares.append(share)
+                    i += 1
+                    continue
+
+                # Дата реєстрації
+                elif line.lower().startswith("дата, час державної реєстрації:"):
+                    value = line.split(':', 1)[1] if ':' in line else ""
+                    clean_date = clean_text(value)
+                    if clean_date and clean_date not in registration_dates:
+                        registration_dates.append(clean_date)
+                    i += 1
+                    continue
+
+                i += 1
+
+            # Додаємо інформацію до об'єкта
+            if shares:
+                current_obj["Розмір частки"] = ", ".join(shares)
+
+            # Якщо є кілька дат реєстрації, додаємо найпізнішу (останню)
+            if registration_dates:
+                current_obj["Дата, час державної реєстрації"] = registration_dates[-1]
+
+            if current_obj and ("Тип об'єкта" in current_obj or "Кадастровий номер" in current_obj or "Адреса" in current_obj or "Опис об'єкта" in current_obj):
+                results.append(current_obj)
+
+            # Повертаємося на рядок назад, щоб наступна ітерація почала з нового об'єкта
+            if i < len(lines) and "актуальна інформація про об'єкт речових прав" in lines[i].strip().lower():
+                i -= 1
+
+        i += 1
+
+    return results
+
+
+register_layout("legacy_property", _detect_legacy, _parse_legacy)
+register_layout("rights", _detect_rights, _parse_rights)
+
+
+# ══════════════════════════════════════════════
+# РОЗБІР ТЕКСТУ ТА ФАЙЛІВ
+# ══════════════════════════════════════════════
+def extract_pdf_text(source):
+    """
+    Витягує текст з усіх сторінок PDF.
+
+    Returns:
+        tuple: (text, page_count)
+    """
+    full_text = ""
+    with pdfplumber.open(source) as pdf:
+        page_count = len(pdf.pages)
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                full_text += text + "\n"
+    return full_text, page_count
+
+
+def parse_real_estate_text(text):
+    """
+    Розбирає текст виписки усіма знайденими макетами.
+
+    Returns:
+        tuple: (results, error_message)
+    """
+    if not text or len(text.strip()) < 50:
+        return None, NO_TEXT_ERROR
+
+    text = normalize_apostrophes(text)
+    results = []
+    for layout in detect_layouts(text):
+        results.extend(layout.parse(text))
+
+    if not results:
+        return None, NO_DATA_ERROR
+    return results, None
+
+
+def _parse_pdf_bytes(data):
+    """
+    Розбирає PDF з байтів без кешу (виконується і в процесах пулу).
+
+    Returns:
+        tuple: (results, error_message, page_count, duration_seconds)
+    """
+    started = time.perf_counter()
+    page_count = 0
+    try:
+        text, page_count = extract_pdf_text(BytesIO(data))
+        results, error = parse_real_estate_text(text)
+    except Exception as e:
+        results, error = None, f"Помилка обробки файлу: {str(e)}"
+    return results, error, page_count, time.perf_counter() - started
+
+
+# ══════════════════════════════════════════════
+# КЕШ РЕЗУЛЬТАТІВ
+# ══════════════════════════════════════════════
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key not in _cache:
+            return None
+        _cache.move_to_end(key)
+        return copy.deepcopy(_cache[key])
+
+
+def _cache_put(key, value):
+    with _cache_lock:
+        _cache[key] = copy.deepcopy(value)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def read_source_bytes(source):
+    """Повертає вміст завантаженого файлу (UploadedFile, file-like або bytes)."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return data
+
+
+def parse_real_estate_bytes(data):
+    """
+    Розбирає PDF виписку з байтів із кешуванням за хешем вмісту.
+
+    Returns:
+        tuple: (results, error_message)
+    """
+    key = content_hash(data)
+    cached = _cache_get(key)
+    if cached is None:
+        cached = _parse_pdf_bytes(data)
+        _cache_put(key, cached)
+    results, error, _, _ = cached
+    return results, error
+
+
+def parse_real_estate_pdf(uploaded_file):
+    """
+    Розбирає один PDF файл виписки.
+
+    Args:
+        uploaded_file: UploadedFile object з Streamlit або file-like об'єкт
+
+    Returns:
+        tuple: (results, error_message)
+    """
+    try:
+        data = read_source_bytes(uploaded_file)
+    except Exception as e:
+        return None, f"Помилка обробки файлу: {str(e)}"
+    return parse_real_estate_bytes(data)
+
+
+def parse_real_estate_batch(files, max_workers=None, on_progress=None, skip_hashes=None):
+    """
+    Паралельно розбирає кілька PDF файлів у пулі процесів.
+
+    Файли з кешу не потрапляють до пулу, файли з хешем із skip_hashes
+    та повтори в межах пакета не розбираються зовсім. Порядок звітів відповідає порядку завантаження.
+
+    Args:
+        files: Список UploadedFile або file-like об'єктів
+        max_workers: Максимум одночасних задач у спільному пулі (за замовчуванням - усі воркери)
+        on_progress: Необов'язкова функція (done, total) для оновлення прогресу
+        skip_hashes: Хеші вмісту, які вже оброблено (наприклад, у поточній сесії)
+
+    Returns:
+        list: звіти по файлах - словники з ключами
+            'name', 'hash', 'results', 'error', 'pages', 'duration', 'cached', 'skipped'
+    """
+    files = list(files)
+    skip_hashes = skip_hashes or set()
+    total = len(files)
+    reports = []
+    pending = {}
+    seen = set()
+    done = 0
+
+    for idx, f in enumerate(files):
+        report = {
+            'name': getattr(f, 'name', f"file_{idx + 1}"),
+            'hash': None,
+            'results': None,
+            'error': None,
+            'pages': 0,
+            'duration': 0.0,
+            'cached': False,
+            'skipped': False,
+        }
+        reports.append(report)
+        try:
+            data = read_source_bytes(f)
+        except Exception as e:
+            report['error'] = f"Помилка обробки файлу: {str(e)}"
+            done += 1
+            continue
+
+        key = content_hash(data)
+        report['hash'] = key
+        if key in skip_hashes or key in seen:
+            report['skipped'] = True
+            done += 1
+            continue
+        seen.add(key)
+
+        cached = _cache_get(key)
+        if cached is not None:
+            report['results'], report['error'], report['pages'], _ = cached
+            report['cached'] = True
+            done += 1
+        else:
+            pending[idx] = data
+
+    if on_progress and done:
+        on_progress(done, total)
+
+    def _finish(idx, outcome):
+        nonlocal done
+        _cache_put(reports[idx]['hash'], outcome)
+        reports[idx]['results'], reports[idx]['error'], reports[idx]['pages'], reports[idx]['duration'] = outcome
+        done += 1
+        if on_progress:
+            on_progress(done, total)
+
+    workers = min(len(pending), max_workers or POOL_WORKERS)
+    if workers > 1:
+        try:
+            # Спільний теплий пул процесу порталу (shared_resources)
+            tasks = {idx: (data,) for idx, data in pending.items()}
+            for idx, outcome in pool_map(_parse_pdf_bytes, tasks, max_workers=workers):
+                _finish(idx, outcome)
+                del pending[idx]
+        except Exception:
+            # Пул недоступний (обмеження середовища) - добираємо послідовно
+            pass
+
+    for idx, data in list(pending.items()):
+        _finish(idx, _parse_pdf_bytes(data))
+
+    return reports
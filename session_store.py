@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Сховище даних сесії з обмеженням пам'яті та скиданням великих об'єктів на диск.
+
+st.session_state тримає все в пам'яті процесу до кінця сесії, а з десятками
+одночасних аналітиків великі артефакти (абзаци всіх PDF, фото, вивантаження
+Аркан, списки нерухомості й ТЗ) вичерпують RAM сервера. SessionStore зберігає
+такі значення за ключем:
+- невеликі - у пам'яті, як і раніше;
+- більші за SESSION_SPILL_BYTES - одразу у файл у власному каталозі сесії;
+- якщо сума значень у пам'яті перевищує бюджет сесії, на диск витісняються
+  найдавніше використані (LRU), у пам'яті лишається лише посилання.
+
+Значення на диску - pickle (bytes пишуться як є) і читаються при кожному
+get(): повернутий об'єкт - копія, зміни в ньому треба зберігати через put().
+
+Каталог сесії видаляється close(), а якщо сесію просто закрито - коли об'єкт
+сховища збирає GC разом зі станом сесії (weakref.finalize), і в будь-якому
+разі при завершенні процесу. Каталоги процесів, що аварійно завершилися,
+прибирає sweep_stale() при створенні першого сховища в процесі.
+
+Налаштування: PORTAL_SESSION_DIR (типово <tmp>/portal_sessions),
+PORTAL_SESSION_MEMORY_MB (бюджет пам'яті сесії, типово 64),
+PORTAL_SESSION_SPILL_KB (поріг негайного скидання, типово 1024).
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+
+SESSION_DIR = os.environ.get("PORTAL_SESSION_DIR", os.path.join(tempfile.gettempdir(), "portal_sessions"))
+SESSION_MEMORY_BUDGET = int(float(os.environ.get("PORTAL_SESSION_MEMORY_MB", 64)) * 1024 * 1024)
+SESSION_SPILL_BYTES = int(float(os.environ.get("PORTAL_SESSION_SPILL_KB", 1024)) * 1024)
+# Каталоги без живого процесу-власника або старші за цей вік видаляються
+SESSION_MAX_AGE_HOURS = float(os.environ.get("PORTAL_SESSION_MAX_AGE_HOURS", 24))
+
+_RAW = "raw"
+_PICKLE = "pickle"
+
+
+def _remove_dir(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def sweep_stale(base_dir: str = None, max_age_hours: float = SESSION_MAX_AGE_HOURS) -> int:
+    """Видаляє каталоги сесій завершених процесів і застарілі; повертає кількість."""
+    base_dir = base_dir or SESSION_DIR
+    if not os.path.isdir(base_dir):
+        return 0
+    removed = 0
+    now = time.time()
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if not os.path.isdir(path):
+            continue
+        pid = name.split("_", 1)[0]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            expired = now - os.path.getmtime(path) > max_age_hours * 3600
+        except OSError:
+            continue
+        if expired or not _pid_alive(int(pid)):
+            _remove_dir(path)
+            removed += 1
+    return removed
+
+
+_init_lock = threading.Lock()
+_swept = False
+
+
+def _sweep_once(base_dir: str) -> None:
+    global _swept
+    with _init_lock:
+        if _swept:
+            return
+        _swept = True
+    try:
+        sweep_stale(base_dir)
+    except OSError:
+        pass
+
+
+class SessionStore:
+    """Значення сесії за ключем: у пам'яті в межах бюджету, решта - у файлах сесії."""
+
+    def __init__(self, memory_budget: int = SESSION_MEMORY_BUDGET, spill_bytes: int = SESSION_SPILL_BYTES,
+                 base_dir: str = None):
+        base_dir = base_dir or SESSION_DIR
+        _sweep_once(base_dir)
+        self.memory_budget = memory_budget
+        self.spill_bytes = spill_bytes
+        self.path = os.path.join(base_dir, f"{os.getpid()}_{uuid.uuid4().hex[:12]}")
+        self._lock = threading.RLock()
+        # key -> {"value"|"file", "size", "kind"}; порядок - від найдавніше використаного
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self.spills = 0
+        self.disk_reads = 0
+        self._finalizer = weakref.finalize(self, _remove_dir, self.path)
+
+    # ── запис і читання ──────────────────────────────────────────────────────
+
+    def put(self, key: str, value) -> None:
+        """Зберігає значення; None рівнозначне видаленню ключа."""
+        if value is None:
+            self.delete(key)
+            return
+        if isinstance(value, (bytes, bytearray)):
+            kind, data = _RAW, bytes(value)
+        else:
+            kind, data = _PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.delete(key)
+            if len(data) >= self.spill_bytes:
+                self._write(key, kind, data)
+            else:
+                self._entries[key] = {"value": value, "size": len(data), "kind": kind}
+                self._memory_bytes += len(data)
+                self._enforce_budget(keep=key)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            if "value" in entry:
+                return entry["value"]
+            self.disk_reads += 1
+            with open(entry["file"], "rb") as fh:
+                data = fh.read()
+        return data if entry["kind"] == _RAW else pickle.loads(data)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            if "value" in entry:
+                self._memory_bytes -= entry["size"]
+            else:
+                self._disk_bytes -= entry["size"]
+                try:
+                    os.remove(entry["file"])
+                except OSError:
+                    pass
+
+    def pop(self, key: str, default=None):
+        value = self.get(key, default)
+        self.delete(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self, keep=()) -> None:
+        """Видаляє всі значення, крім ключів keep."""
+        with self._lock:
+            for key in self.keys():
+                if key not in keep:
+                    self.delete(key)
+
+    def close(self) -> None:
+        """Звільняє пам'ять і видаляє каталог сесії."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = self._disk_bytes = 0
+        self._finalizer()
+
+    # ── витіснення на диск ───────────────────────────────────────────────────
+
+    def _write(self, key: str, kind: str, data: bytes) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        file_path = os.path.join(self.path, f"{uuid.uuid4().hex}.{kind}")
+        with open(file_path, "wb") as fh:
+            fh.write(data)
+        self._entries[key] = {"file": file_path, "size": len(data), "kind": kind}
+        self._disk_bytes += len(data)
+        self.spills += 1
+
+    def _enforce_budget(self, keep: str = None) -> None:
+        """Скидає на диск найдавніше використані значення, доки пам'ять перевищує бюджет."""
+        for key in list(self._entries):
+            if self._memory_bytes <= self.memory_budget:
+                break
+            entry = self._entries[key]
+            if "value" not in entry or key == keep:
+                continue
+            value = entry["value"]
+            data = bytes(value) if entry["kind"] == _RAW else pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            self._memory_bytes -= entry["size"]
+            del self._entries[key]
+            self._write(key, entry["kind"], data)
+            self._entries.move_to_end(key, last=False)
+
+    # ── стан ─────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            on_disk = sum(1 for entry in self._entries.values() if "file" in entry)
+            return {
+                "items": len(self._entries),
+                "in_memory": len(self._entries) - on_disk,
+                "on_disk": on_disk,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "memory_budget": self.memory_budget,
+                "spills": self.spills,
+                "disk_reads": self.disk_reads,
+                "path": self.path,
+            }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        mb = 1024 * 1024
+        return (
+            f"Дані сесії: у пам'яті {stats['memory_bytes'] / mb:.1f} з {stats['memory_budget'] / mb:.0f} МБ "
+            f"({stats['in_memory']} об.), на диску {stats['disk_bytes'] / mb:.1f} МБ ({stats['on_disk']} об.)"
+        )
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Спільні ресурси процесу Streamlit для всіх сторінок і сесій порталу.
+
+Усі сесії обслуговуються одним процесом, тож важкі об'єкти створюються один
+раз (аналог st.cache_resource, але доступний і поза Streamlit - у пулі, CLI):
+- get_process_pool() - теплий пул процесів для PDF/DOCX/HTML; воркери
+  стартують з попередньо імпортованими pdfplumber, fitz і python-docx
+  (forkserver), пул перестворюється, якщо воркер аварійно завершився;
+- default_image() - типові зображення (default_avatar.png, default_avto.jpg);
+- shared_resource() / compiled_pattern() - реєстр довільних ресурсів і
+  скомпільованих регулярних виразів;
+- start_warmup() - фонове прогрівання всього переліченого при відкритті
+  порталу, resource_stats() / format_resource_stats() - стан і розміри.
+
+Кількість воркерів - змінна PORTAL_POOL_WORKERS (типово кількість CPU).
+"""
+
+import importlib
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_IMAGE_DIR = os.path.join(ROOT_DIR, "MANY_PDF_v_PERSON")
+DEFAULT_IMAGES = ("default_avatar.png", "default_avto.jpg")
+
+POOL_WORKERS = int(os.environ.get("PORTAL_POOL_WORKERS", os.cpu_count() or 1))
+# Бібліотеки, які імпортуються у воркерах (і в процесі порталу) заздалегідь
+PRELOAD_MODULES = ("pdfplumber", "fitz", "docx", "PIL.Image", "openpyxl")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Реєстр ресурсів
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _size_of(value) -> int:
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResourceRegistry:
+    """Ресурси процесу за іменем: створюються один раз, з лічильниками звернень."""
+
+    def __init__(self):
+        # RLock: фабрика ресурсу може звертатися до інших ресурсів реєстру
+        self._lock = threading.RLock()
+        self._entries = {}
+
+    def get(self, name: str, factory):
+        # Лічильник змінюють потоки пулу та сесії одночасно - лише під замком
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                started = time.perf_counter()
+                value = factory()
+                entry = {
+                    "value": value,
+                    "size": _size_of(value),
+                    "build": time.perf_counter() - started,
+                    "hits": 0,
+                }
+                self._entries[name] = entry
+            entry["hits"] += 1
+            return entry["value"]
+
+    def clear(self, name: str = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"size": entry["size"], "build": entry["build"], "hits": entry["hits"]}
+                for name, entry in self._entries.items()
+            }
+
+
+_registry = ResourceRegistry()
+
+
+def shared_resource(name: str, factory):
+    """Ресурс процесу name; factory() викликається лише при першому зверненні."""
+    return _registry.get(name, factory)
+
+
+def compiled_pattern(pattern: str, flags: int = 0):
+    """Скомпільований регулярний вираз, спільний для всіх сесій (без витіснення з кешу re)."""
+    return _registry.get(f"re:{flags}:{pattern}", lambda: re.compile(pattern, flags))
+
+
+def _read_default_image(file_name: str):
+    for directory in (DEFAULT_IMAGE_DIR, os.getcwd()):
+        path = os.path.join(directory, file_name)
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                return fh.read()
+    return None
+
+
+def default_image(file_name: str = "default_avatar.png"):
+    """Байти типового зображення (default_avatar.png, default_avto.jpg) або None."""
+    return _registry.get(f"image:{file_name}", lambda: _read_default_image(file_name))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Теплий пул процесів
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _preload_modules() -> list:
+    loaded = []
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            pass
+    return loaded
+
+
+def _warm_worker():
+    """Ініціалізатор воркера: бібліотеки та стилі python-docx завантажуються до першої задачі."""
+    _preload_modules()
+    try:
+        from docx import Document
+        Document()
+    except Exception:
+        pass
+
+
+def _ping():
+    return os.getpid()
+
+
+def _run_task(paths: list, module_name: str, func_name: str, args: tuple):
+    """
+    Виконує функцію модуля у воркері.
+
+    Функція передається іменем: воркер отримує sys.path процесу порталу на
+    момент виклику, тож модулі сторінок, чиї каталоги додано до шляху вже
+    після старту пулу, імпортуються коректно.
+    """
+    if sys.path != paths:
+        sys.path[:] = paths
+    func = importlib.import_module(module_name)
+    for part in func_name.split("."):
+        func = getattr(func, part)
+    return func(*args)
+
+
+def _pool_context():
+    # forkserver: воркери форкаються з чистого процесу з уже імпортованими бібліотеками,
+    # а не з багатопотокового процесу Streamlit
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(list(PRELOAD_MODULES))
+        return context
+    return multiprocessing.get_context()
+
+
+class WarmProcessPool:
+    """Постійний ProcessPoolExecutor процесу з перестворенням після збою воркера."""
+
+    def __init__(self, max_workers: int = POOL_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self.restarts = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.warmup_time = None
+        self.last_error = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=_pool_context(), initializer=_warm_worker,
+                )
+            return self._executor
+
+    def _discard(self, executor, error) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+            self.last_error = str(error)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, func, *args):
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(func, *args)
+            except BrokenProcessPool as e:
+                self._discard(executor, e)
+                if attempt:
+                    raise
+                continue
+            self.submitted += 1
+            return future
+
+    def map_unordered(self, func, tasks: dict, max_workers: int = None):
+        """
+        Виконує func(*args) для кожного {ключ: args}; видає (ключ, результат) у порядку завершення.
+
+        Одночасно в пулі не більше max_workers задач виклику - пул спільний
+        для всіх сесій. Виняток задачі або збій пулу передається викликачу
+        (незавершені задачі скасовуються) - той добирає решту послідовно.
+        """
+        items = list(tasks.items())
+        items.reverse()
+        limit = max(1, min(max_workers or self.max_workers, self.max_workers))
+        if func.__module__ == "__main__":
+            target, wrap = func, False
+        else:
+            target, wrap = (func.__module__, func.__qualname__), True
+        paths = [os.path.abspath(p) if p else os.getcwd() for p in sys.path]
+        running = {}
+        try:
+            while items or running:
+                while items and len(running) < limit:
+                    key, args = items.pop()
+                    future = self.submit(_run_task, paths, *target, args) if wrap else self.submit(target, *args)
+                    running[future] = key
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        self.failed += 1
+                        if self._executor is not None:
+                            self._discard(self._executor, e)
+                        raise
+                    except Exception as e:
+                        self.failed += 1
+                        self.last_error = str(e)
+                        raise
+                    self.completed += 1
+                    yield key, result
+        finally:
+            for future in running:
+                future.cancel()
+
+    def warm(self) -> float:
+        """Запускає всіх воркерів (з ініціалізацією) і чекає на них; повертає час, с."""
+        started = time.perf_counter()
+        futures = [self.submit(_ping) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+        self.completed += len(futures)
+        self.warmup_time = time.perf_counter() - started
+        return self.warmup_time
+
+    def alive_workers(self) -> int:
+        executor = self._executor
+        processes = getattr(executor, "_processes", None) or {}
+        return sum(1 for process in list(processes.values()) if process.is_alive())
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "alive": self.alive_workers(),
+            "started": self._executor is not None,
+            "warmup_time": self.warmup_time,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+        }
+
+
+_pool = None
+_warmup_thread = None
+_warmup_state = {"status": "не запускалось", "modules": [], "duration": None, "error": None}
+_init_lock = threading.Lock()
+
+
+def get_process_pool() -> WarmProcessPool:
+    """Пул процесів, один на процес порталу."""
+    global _pool
+    with _init_lock:
+        if _pool is None:
+            _pool = WarmProcessPool()
+        return _pool
+
+
+def pool_map(func, tasks: dict, max_workers: int = None):
+    """(ключ, результат) для {ключ: args} через спільний теплий пул, у порядку завершення."""
+    return get_process_pool().map_unordered(func, tasks, max_workers)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Прогрівання та стан
+# ══════════════════════════════════════════════════════════════════════════════
+
+def warm_up(start_pool: bool = True) -> dict:
+    """Імпортує бібліотеки, завантажує типові зображення і запускає воркерів пулу."""
+    started = time.perf_counter()
+    _warmup_state.update(status="виконується", error=None)
+    try:
+        _warmup_state["modules"] = _preload_modules()
+        for file_name in DEFAULT_IMAGES:
+            default_image(file_name)
+        if start_pool and POOL_WORKERS > 1:
+            get_process_pool().warm()
+        _warmup_state["status"] = "готово"
+    except Exception as e:
+        _warmup_state.update(status="помилка", error=str(e))
+    _warmup_state["duration"] = time.perf_counter() - started
+    return dict(_warmup_state)
+
+
+def start_warmup() -> None:
+    """Прогрівання у фоновому потоці - один раз на процес, сторінку не блокує."""
+    global _warmup_thread
+    with _init_lock:
+        if _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=warm_up, name="portal-warmup", daemon=True)
+        _warmup_thread.start()
+
+
+def resource_stats() -> dict:
+    """Стан прогрівання, пулу та реєстру ресурсів."""
+    pool = _pool.stats() if _pool is not None else None
+    return {"warmup": dict(_warmup_state), "pool": pool, "resources": _registry.stats()}
+
+
+def format_resource_stats(stats: dict = None) -> list:
+    """Рядки стану ресурсів для інтерфейсу."""
+    stats = stats or resource_stats()
+    warmup = stats["warmup"]
+    lines = [f"Прогрівання: {warmup['status']}"
+             + (f" за {warmup['duration']:.1f} с" if warmup["duration"] is not None else "")
+             + (f", бібліотеки: {', '.join(warmup['modules'])}" if warmup["modules"] else "")
+             + (f" ({warmup['error']})" if warmup["error"] else "")]
+    pool = stats["pool"]
+    if pool is None:
+        lines.append(f"Пул процесів: не запущено (воркерів {POOL_WORKERS})")
+    else:
+        lines.append(
+            f"Пул процесів: живих {pool['alive']}/{pool['workers']}, задач {pool['completed']}/{pool['submitted']}, "
+            f"помилок {pool['failed']}, перезапусків {pool['restarts']}"
+            + (f", прогрів {pool['warmup_time']:.1f} с" if pool["warmup_time"] is not None else "")
+        )
+    resources = stats["resources"]
+    images = {k: v for k, v in resources.items() if k.startswith("image:")}
+    patterns = [v for k, v in resources.items() if k.startswith("re:")]
+    other = {k: v for k, v in resources.items() if not k.startswith(("image:", "re:"))}
+    if images:
+        lines.append("Зображення: " + ", ".join(
+            f"{k[len('image:'):]} {v['size'] / 1024:.0f} КБ" for k, v in images.items()))
+    if patterns:
+        lines.append(f"Регулярні вирази: {len(patterns)}, звернень {sum(v['hits'] for v in patterns)}")
+    for name, entry in other.items():
+        lines.append(f"{name}: {entry['size'] / 1024:.0f} КБ, звернень {entry['hits']}, "
+                     f"створено за {entry['build'] * 1000:.0f} мс")
+    return lines
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Локальний набір сторонніх JS/CSS і шрифтів для роботи порталу без мережі.
+
+Бібліотеки BM_v_DOCX/index.html (jszip, xlsx, docx, leaflet, leaflet-image,
+unarchiver.js) і Google Fonts порталу зберігаються у static/vendor як
+<ім'я>-<версія>.<тип>.gz; static/vendor/manifest.json містить джерело,
+версію, sha256 і розміри кожного файлу. Зображення та шрифти, на які
+посилаються CSS, вбудовуються у CSS як data: URI, тож файл самодостатній.
+
+Набір завантажується один раз на машині з доступом до мережі:
+    python static_assets.py fetch
+і комітиться у репозиторій. Якщо набору немає, сторінки працюють як раніше
+(з CDN). Тайли карт OpenStreetMap і модулі RAR, які unarchiver.js
+довантажує під час роботи, у набір не входять.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from urllib.parse import urljoin
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDOR_DIR = os.path.join(ROOT_DIR, "static", "vendor")
+MANIFEST_PATH = os.path.join(VENDOR_DIR, "manifest.json")
+
+# ключ: (версія, тип, адреса завантаження, адреси у сторінках, які замінює файл)
+VENDOR_ASSETS = {
+    "jszip": ("3.10.1", "js", "https://cdnjs.cloudflare.com/ajax/libs/jszip/3.10.1/jszip.min.js", ()),
+    "xlsx": ("0.18.5", "js", "https://cdnjs.cloudflare.com/ajax/libs/xlsx/0.18.5/xlsx.full.min.js", ()),
+    "docx": ("8.5.0", "js", "https://cdn.jsdelivr.net/npm/docx@8.5.0/build/index.umd.js", ()),
+    "leaflet-css": ("1.9.4", "css", "https://unpkg.com/leaflet@1.9.4/dist/leaflet.css", ()),
+    "leaflet": ("1.9.4", "js", "https://unpkg.com/leaflet@1.9.4/dist/leaflet.js", ()),
+    "leaflet-image": ("0.4.0", "js", "https://unpkg.com/leaflet-image@0.4.0/leaflet-image.js",
+                      ("https://unpkg.com/leaflet-image/leaflet-image.js",)),
+    "unarchiver": ("gh-pages", "js", "https://xenova.github.io/unarchiver.js/dist/unarchiver.min.js", ()),
+    "fonts-bm": ("google", "css",
+                 "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap", ()),
+    "fonts-home": ("google", "css",
+                   "https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600"
+                   "&family=Inter:wght@400;500;600;700&display=swap", ()),
+}
+
+# Google Fonts віддає woff2 лише сучасним браузерам
+FETCH_HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                               "Chrome/120.0 Safari/537.36"}
+CSS_URL_RE = re.compile(r"url\((['\"]?)([^'\")]+)\1\)")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Завантаження набору
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _mime_type(url: str) -> str:
+    ext = url.split("?")[0].rsplit(".", 1)[-1].lower()
+    return {
+        "png": "image/png", "svg": "image/svg+xml", "gif": "image/gif",
+        "woff2": "font/woff2", "woff": "font/woff", "ttf": "font/ttf",
+    }.get(ext, "application/octet-stream")
+
+
+def _inline_css_urls(css: str, base_url: str, session) -> str:
+    """Замінює url(...) у CSS (зображення, шрифти) на data: URI."""
+    def _replace(match):
+        ref = match.group(2)
+        if ref.startswith("data:") or ref.startswith("#"):
+            return match.group(0)
+        target = urljoin(base_url, ref)
+        resp = session.get(target, headers=FETCH_HEADERS, timeout=30)
+        resp.raise_for_status()
+        data = base64.b64encode(resp.content).decode("ascii")
+        return f"url(data:{_mime_type(target)};base64,{data})"
+
+    return CSS_URL_RE.sub(_replace, css)
+
+
+def fetch_assets(force: bool = False, log=print) -> dict:
+    """Завантажує всі VENDOR_ASSETS у static/vendor і оновлює manifest.json."""
+    import requests
+
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    manifest = {} if force else dict(load_manifest())
+    session = requests.Session()
+
+    for key, (version, kind, url, aliases) in VENDOR_ASSETS.items():
+        file_name = f"{key}-{version}.{kind}.gz"
+        path = os.path.join(VENDOR_DIR, file_name)
+        entry = manifest.get(key)
+        if entry and entry.get("file") == file_name and os.path.exists(path) and not force:
+            log(f"= {key} {version}: вже є")
+            continue
+
+        resp = session.get(url, headers=FETCH_HEADERS, timeout=60)
+        resp.raise_for_status()
+        content = resp.content
+        if kind == "css":
+            content = _inline_css_urls(resp.text, url, session).encode("utf-8")
+
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        with open(path, "wb") as fh:
+            fh.write(compressed)
+        manifest[key] = {
+            "file": file_name,
+            "version": version,
+            "type": kind,
+            "url": url,
+            "aliases": list(aliases),
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "size": len(content),
+            "gzip_size": len(compressed),
+        }
+        log(f"+ {key} {version}: {len(content) / 1024:.0f} КБ -> {len(compressed) / 1024:.0f} КБ gzip")
+
+    # Старі версії, яких немає в маніфесті, прибираються
+    keep = {entry["file"] for entry in manifest.values()} | {"manifest.json"}
+    for file_name in os.listdir(VENDOR_DIR):
+        if file_name not in keep and file_name.endswith(".gz"):
+            os.remove(os.path.join(VENDOR_DIR, file_name))
+
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Використання набору
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+@lru_cache(maxsize=1)
+def _load_manifest(mtime: float) -> dict:
+    if not mtime:
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def load_manifest() -> dict:
+    """Маніфест набору (порожній, якщо набір ще не завантажено); кеш - за mtime файлу."""
+    return _load_manifest(_mtime(MANIFEST_PATH))
+
+
+@lru_cache(maxsize=32)
+def _read_asset(file_name: str, sha256: str) -> str:
+    with open(os.path.join(VENDOR_DIR, file_name), "rb") as fh:
+        content = gzip.decompress(fh.read())
+    if hashlib.sha256(content).hexdigest() != sha256:
+        raise ValueError(f"Пошкоджений файл набору: {file_name}")
+    return content.decode("utf-8")
+
+
+def asset_text(key: str):
+    """Вміст файлу набору або None, якщо його немає (розпакований, кешований)."""
+    entry = load_manifest().get(key)
+    if not entry or not os.path.exists(os.path.join(VENDOR_DIR, entry["file"])):
+        return None
+    try:
+        return _read_asset(entry["file"], entry["sha256"])
+    except (OSError, ValueError):
+        return None
+
+
+def font_css(key: str) -> str:
+    """@font-face з набору або @import з Google Fonts, якщо набору немає."""
+    css = asset_text(key)
+    if css is not None:
+        return css
+    return f"@import url('{VENDOR_ASSETS[key][2]}');"
+
+
+def _inline_tag(html: str, url: str, kind: str, content: str) -> str:
+    pattern = re.escape(url)
+    # </script> усередині бібліотеки закрив би тег раніше часу
+    if kind == "js":
+        tag = "<script>" + content.replace("</script", "<\\/script") + "</script>"
+        return re.sub(r"<script[^>]*\ssrc=\"" + pattern + r"\"[^>]*>\s*</script>", lambda _: tag, html)
+    tag = "<style>" + content + "</style>"
+    return re.sub(r"<link[^>]*\shref=\"" + pattern + r"\"[^>]*/?>", lambda _: tag, html)
+
+
+def inline_vendor_assets(html: str) -> str:
+    """
+    Замінює CDN-підключення у сторінці на вміст локального набору.
+
+    Теги, для яких файлу в наборі немає, лишаються без змін (CDN). Якщо
+    шрифти вбудовано, preconnect до Google Fonts прибирається.
+    """
+    for key, entry in load_manifest().items():
+        content = asset_text(key)
+        if content is None:
+            continue
+        for url in [entry["url"], *entry.get("aliases", [])]:
+            html = _inline_tag(html, url, entry["type"], content)
+    if "fonts.googleapis.com/css2" not in html:
+        html = re.sub(r"\s*<link rel=\"preconnect\" href=\"https://fonts\.g(?:oogleapis|static)\.com\"[^>]*>", "", html)
+    return html
+
+
+def bundle_status() -> str:
+    """Короткий опис набору для інтерфейсу."""
+    manifest = load_manifest()
+    if not manifest:
+        return "Локальний набір бібліотек не завантажено - використовуються CDN (python static_assets.py fetch)"
+    total = sum(entry["gzip_size"] for entry in manifest.values())
+    return f"Локальний набір: {len(manifest)} файлів, {total / 1024:.0f} КБ gzip"
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("fetch", "status"):
+        print("Використання: python static_assets.py fetch [--force] | status")
+        return 1
+    if sys.argv[1] == "fetch":
+        fetch_assets(force="--force" in sys.argv)
+    print(bundle_status())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Кеш відповідей FinapClient: помилки не кешуються, «не знайдено» - з коротким TTL."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finap_cache import FinapResponseCache, cache_key  # noqa: E402
+from finap_client import (  # noqa: E402
+    RESPONSE_ERROR, RESPONSE_FOUND, RESPONSE_NOT_FOUND,
+    FinapClient, FinapConfig, InsuranceRecord, classify_response,
+)
+
+FOUND = [{"result": {"edrfullinfo": [{"name": "ТОВ \"ТЕСТ\"", "stan": "ЗАРЕЄСТРОВАНО"}]}}]
+NOT_FOUND = [{"result": {"edrfullinfo": []}, "errormessage": "not found"}]
+AUTH_ERROR = [{"result": "Невірний tokken"}]
+RECORD = InsuranceRecord(company_name="ТОВ \"ТЕСТ\"", edrpou="12345678", last_payment_date=None)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Віддає відповіді по черзі й рахує запити."""
+
+    def __init__(self, *bodies):
+        self.bodies = list(bodies)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.bodies.pop(0))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FinapResponseCache(str(tmp_path / "finap.sqlite3"))
+
+
+def make_client(cache, *bodies):
+    return FinapClient(FinapConfig(url="http://finap.test/api", retries=0), cache=cache, session=FakeSession(*bodies))
+
+
+def test_classify_response():
+    assert classify_response(FOUND[0]) == RESPONSE_FOUND
+    assert classify_response(NOT_FOUND[0]) == RESPONSE_NOT_FOUND
+    assert classify_response(AUTH_ERROR[0]) == RESPONSE_ERROR
+    assert classify_response({"errormessage": "quota exceeded"}) == RESPONSE_ERROR
+
+
+def test_error_response_is_not_served_from_cache(cache):
+    client = make_client(cache, AUTH_ERROR, FOUND)
+    with pytest.raises(RuntimeError):
+        client.check(RECORD)
+    assert cache.stats()["entries"] == 0
+
+    info = client.check(RECORD)
+    assert client.session.calls == 2
+    assert info["name"] == "ТОВ \"ТЕСТ\""
+
+
+def test_async_query_does_not_replay_error(cache):
+    client = make_client(cache, AUTH_ERROR, FOUND)
+    with pytest.raises(RuntimeError):
+        asyncio.run(client.acheck(RECORD))
+    assert asyncio.run(client.acheck(RECORD))["status"] == "ЗАРЕЄСТРОВАНО"
+    assert client.session.calls == 2
+
+
+def test_found_response_is_cached(cache):
+    client = make_client(cache, FOUND)
+    client.check(RECORD)
+    client.check(RECORD)
+    assert client.session.calls == 1
+    assert client.metrics.snapshot()["cache_hits"] == 1
+
+
+def test_not_found_uses_negative_ttl(cache):
+    cache.negative_ttl = 0
+    client = make_client(cache, NOT_FOUND, FOUND)
+    with pytest.raises(RuntimeError, match="не знайдено"):
+        client.check(RECORD)
+    # Строк «не знайдено» минув - наступна перевірка йде до FinAP
+    assert client.check(RECORD)["name"] == "ТОВ \"ТЕСТ\""
+    assert client.session.calls == 2
+
+
+def test_cached_error_from_older_version_is_ignored(cache):
+    cache.put(cache_key(RECORD.edrpou, RECORD.company_name, FinapConfig.listdata), AUTH_ERROR[0])
+    client = make_client(cache, FOUND)
+    assert client.check(RECORD)["name"] == "ТОВ \"ТЕСТ\""
+    assert client.session.calls == 1
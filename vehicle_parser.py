@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+"""
+Спільний модуль розбору даних про ТЗ з вивантажень НАІС.
+
+Використовується генератором досьє (MANY_PDF_v_PERSON/app.py) та парсером
+реєстрації ТЗ (CAR_TECHNICAL/streamlit_app.py, pages/5_CAR_TECHNICAL.py).
+Текст ділиться на записи окремих ТЗ, шаблони полів скомпільовані один раз.
+Excel аркуш розбирається векторно: клітинки-мітки знаходяться масками NumPy,
+значення береться з сусідньої клітинки праворуч. І текст, і аркуш можуть
+містити кілька ТЗ. Пакет файлів (.txt/.xls/.xlsx/.csv) розбирається в пулі
+процесів через parse_vehicle_files().
+"""
+
+import os
+import re
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from shared_resources import POOL_WORKERS, pool_map
+
+# Шаблони полів у порядку пріоритету (перший знайдений виграє)
+VEHICLE_TEXT_PATTERNS = {
+    'номерний_знак': [
+        r'Державний номер[:\s]*([A-ZА-ЯІЇЄҐ0-9]+)',
+        r'Номерний знак[:\s]*([A-ZА-ЯІЇЄҐ0-9]+)',
+        r'НОМЕРНИЙ ЗНАК[:\s]*([A-ZА-ЯІЇЄҐ0-9]+)',
+    ],
+    'власник': [
+        r'Власник[:\s]*([A-ZА-ЯІЇЄҐ\s]+?)(?=\s*\d{2}\.\d{2}\.\d{4}|\s*$)',
+    ],
+    'дата_народження': [
+        r'Дата народження[:\s]*(\d{2}\.\d{2}\.\d{4})',
+        r'Власник[:\s]*[A-ZА-ЯІЇЄҐ\s]+(\d{2}\.\d{2}\.\d{4})',
+    ],
+    'іпн': [
+        r'ІПН[:\s]*(\d+)',
+        r'ІПН/ЄДРПОУ[:\s]*(\d+)',
+    ],
+    'місце_реєстрації': [
+        r'Адреса власника[:\s]*([^\n]+)',
+        r'Адреса реєстрації ТЗ[:\s]*([^\n]+)',
+    ],
+    'марка': [
+        r'Марка/модель ТЗ[:\s]*([A-Z]+)',
+    ],
+    'модель': [
+        r'Марка/модель ТЗ[:\s]*[A-Z]+\s+([A-Z0-9]+(?:\s+[A-Z0-9.]+)?)',
+    ],
+    'vin': [
+        r'vin ТЗ[:\s]*([A-Z0-9]+)',
+        r'VIN[:\s]*([A-Z0-9]+)',
+    ],
+    'колір': [
+        r'Колір ТЗ[:\s]*([A-ZА-ЯІЇЄҐ]+)',
+        r'Колір[:\s]*([A-ZА-ЯІЇЄҐ]+)',
+    ],
+    'рік_випуску': [
+        r'Рік випуску ТЗ[:\s]*(\d{4})',
+        r'Рік випуску[:\s]*(\d{4})',
+        r'Рік[:\s]*випуску[:\s]*(\d{4})',
+        r'(\d{4})\s*рік випуску',
+        r'рік випуску.*?(\d{4})',
+        r'(\d{4})\s*р.',
+        r'(\d{4})\s*року',
+    ],
+}
+
+# Ключові слова для швидкого відсіву полів, яких точно немає в записі
+FIELD_KEYWORDS = {
+    'номерний_знак': ('номер', 'знак'),
+    'власник': ('власник',),
+    'дата_народження': ('дата народження', 'власник'),
+    'іпн': ('іпн',),
+    'місце_реєстрації': ('адреса',),
+    'марка': ('марка/модель',),
+    'модель': ('марка/модель',),
+    'vin': ('vin',),
+    'колір': ('колір',),
+}
+
+COMPILED_TEXT_PATTERNS = {
+    field: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for field, patterns in VEHICLE_TEXT_PATTERNS.items()
+}
+BRAND_MODEL_RE = re.compile(r'Марка/модель ТЗ[:\s]*([^\n]+)', re.IGNORECASE)
+
+# Початок запису окремого ТЗ у вивантаженні НАІС
+RECORD_START_RE = re.compile(r'^[ \t]*(?:Державний номер|Номерний знак)', re.IGNORECASE | re.MULTILINE)
+
+
+def split_vehicle_records(text):
+    """Ділить текст на записи окремих ТЗ (текст до першого запису додається до нього)."""
+    starts = [m.start() for m in RECORD_START_RE.finditer(text)]
+    if len(starts) < 2:
+        return [text]
+    starts[0] = 0
+    ends = starts[1:] + [len(text)]
+    return [text[start:end] for start, end in zip(starts, ends)]
+
+
+def parse_vehicle_record(text):
+    """Витягує поля одного ТЗ з тексту запису."""
+    result = {}
+    lowered = text.lower()
+
+    for field, patterns in COMPILED_TEXT_PATTERNS.items():
+        keywords = FIELD_KEYWORDS.get(field)
+        if keywords and not any(k in lowered for k in keywords):
+            continue
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                result[field] = match.group(1).strip()
+                break
+
+    # Спеціальна обробка для марка/модель з тексту
+    if 'марка' not in result:
+        match = BRAND_MODEL_RE.search(text)
+        if match:
+            parts = match.group(1).strip().split()
+            if len(parts) >= 1:
+                result['марка'] = parts[0]
+            if len(parts) >= 2:
+                result['модель'] = ' '.join(parts[1:])
+
+    return result
+
+
+def parse_vehicle_text(text):
+    """
+    Парсить текст (вставка з НАІС або .txt) та витягує дані про всі ТЗ.
+
+    Returns:
+        list: список словників з даними ТЗ (порожні записи відкидаються)
+    """
+    if not text:
+        return []
+    vehicles = []
+    for record in split_vehicle_records(text):
+        vehicle = parse_vehicle_record(record)
+        if vehicle:
+            vehicles.append(vehicle)
+    return vehicles
+
+
+# Мітки, значення яких лежить у сусідній клітинці праворуч (точний збіг)
+EXACT_VALUE_LABELS = {
+    'Марка': 'марка',
+    'Модель': 'модель',
+    'VIN': 'vin',
+    'Колір': 'колір',
+    'Рік випуску': 'рік_випуску',
+}
+
+# Поля, що визначають окремий ТЗ: повтор з іншим значенням - наступний ТЗ
+VEHICLE_KEY_FIELDS = ('номерний_знак', 'vin')
+
+# Поля власника, спільні для всіх ТЗ аркуша, якщо вказані один раз
+OWNER_FIELDS = ('власник', 'дата_народження', 'іпн', 'місце_реєстрації')
+
+OWNER_RE = re.compile(r'Власник[:\s]*([A-ZА-ЯІЇЄҐ\s]+)')
+DATE_RE = re.compile(r'(\d{2}\.\d{2}\.\d{4})')
+IPN_RE = re.compile(r'ІПН[:\s]*(\d+)')
+REG_PLACE_RE = re.compile(r'Місце реєстрації[:\s]*(.+)')
+YEAR_RE = re.compile(r'(\d{4})')
+
+
+def _cell_grid(df):
+    """Повертає (клітинки, сусіди праворуч) як масиви рядків без NaN."""
+    values = df.to_numpy(dtype=object)
+    if values.size == 0:
+        empty = np.empty((0, 0), dtype=str)
+        return empty, empty
+    cells = np.char.strip(np.where(pd.isna(values), '', values).astype(str))
+    right = np.full_like(cells, '')
+    right[:, :-1] = cells[:, 1:]
+    return cells, right
+
+
+def _contains(cells, needle):
+    return np.char.find(cells, needle) >= 0
+
+
+def _collect_hits(cells, right):
+    """Збирає знайдені значення як (рядок, колонка, поле, значення)."""
+    hits = []
+
+    def add(mask, field, extract):
+        rows, cols = np.nonzero(mask)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            value = extract(r, c)
+            if value:
+                hits.append((r, c, field, value))
+
+    def from_right(r, c):
+        return str(right[r, c])
+
+    def from_regex(regex):
+        def extract(r, c):
+            match = regex.search(cells[r, c])
+            return match.group(1).strip() if match else None
+        return extract
+
+    add(_contains(np.char.upper(cells), 'НОМЕРНИЙ ЗНАК'), 'номерний_знак', from_right)
+    add(_contains(cells, 'Власник') & _contains(cells, ':'), 'власник', from_regex(OWNER_RE))
+    add(_contains(cells, 'Дата народження'), 'дата_народження', from_regex(DATE_RE))
+
+    def ipn(r, c):
+        match = IPN_RE.search(cells[r, c])
+        if match:
+            return match.group(1)
+        value = str(right[r, c])
+        return value if value.isdigit() else None
+
+    add(_contains(cells, 'ІПН'), 'іпн', ipn)
+    add(_contains(cells, 'Місце реєстрації'), 'місце_реєстрації', from_regex(REG_PLACE_RE))
+
+    for label, field in EXACT_VALUE_LABELS.items():
+        add(cells == label, field, from_right)
+    # Рік у тій самій клітинці ("Рік випуску 2013")
+    add(_contains(cells, 'Рік випуску') & (cells != 'Рік випуску'), 'рік_випуску', from_regex(YEAR_RE))
+
+    hits.sort(key=lambda hit: (hit[0], hit[1]))
+    return hits
+
+
+def _split_vehicles(hits):
+    """Розбиває знайдені значення на записи ТЗ у порядку рядків аркуша."""
+    vehicles = []
+    current, start_row = {}, 0
+    for row, _, field, value in hits:
+        if field in VEHICLE_KEY_FIELDS and current.get(field) and current[field] != value:
+            vehicles.append((start_row, current))
+            current, start_row = {}, row
+        if not current:
+            start_row = row
+        current[field] = value
+    if current:
+        vehicles.append((start_row, current))
+    return vehicles
+
+
+# Ключові слова полів текстового парсера для перевірки рядків аркуша (рік - без шаблону в FIELD_KEYWORDS)
+EXCEL_TEXT_KEYWORDS = {**FIELD_KEYWORDS, 'рік_випуску': ('рік', 'року', 'р.')}
+
+
+def _header_cells(df):
+    return [c.strip() for c in df.columns if isinstance(c, str) and not c.startswith('Unnamed')]
+
+
+def _missing_text_fields(vehicle, owner):
+    """Незаповнені поля текстового парсера (поля власника з попереднього ТЗ не рахуються)."""
+    return [
+        field for field in VEHICLE_TEXT_PATTERNS
+        if not vehicle.get(field) and not (field in OWNER_FIELDS and owner.get(field))
+    ]
+
+
+def _rows_mention(df, lowered, fields, start, end):
+    """Чи є в рядках [start, end) (для першого ТЗ - і в шапці) ключове слово одного з полів."""
+    rows = lowered[start:end]
+    header = ' '.join(_header_cells(df)).lower() if start == 0 else ''
+    for field in fields:
+        for keyword in EXCEL_TEXT_KEYWORDS.get(field, ()):
+            if keyword in header or (rows.size and (np.char.find(rows, keyword) >= 0).any()):
+                return True
+    return False
+
+
+def _rows_text(df, cells, start, end):
+    """Текст з непорожніх клітинок рядків [start, end) для текстового парсера."""
+    lines = []
+    if start == 0:
+        header = _header_cells(df)
+        if header:
+            lines.append(' '.join(header))
+    for row in cells[start:end]:
+        filled = row[row != '']
+        if filled.size:
+            lines.append(' '.join(filled.tolist()))
+    return '\n'.join(lines)
+
+
+def extract_excel_vehicles(df, text_parser=None):
+    """
+    Витягує дані про всі ТЗ з аркуша Excel вивантаження НАІС.
+
+    Args:
+        df: DataFrame аркуша
+        text_parser: Необов'язкова функція text -> dict для дозаповнення полів,
+            яких немає в структурі аркуша (зазвичай parse_vehicle_record).
+            Викликається лише для ТЗ з незаповненими полями, ключові слова
+            яких є в рядках цього ТЗ, і лише на тексті цих рядків
+
+    Returns:
+        list: список словників з даними ТЗ (у порядку на аркуші)
+    """
+    cells, right = _cell_grid(df)
+    vehicles = _split_vehicles(_collect_hits(cells, right)) if cells.size else []
+
+    if text_parser is not None:
+        if not vehicles:
+            vehicles = [(0, {})]
+        # Перший ТЗ отримує і шапку аркуша над ним
+        starts = [0] + [start for start, _ in vehicles[1:]]
+        ends = starts[1:] + [len(cells)]
+        lowered = None
+        owner = {}
+        for (_, vehicle), start, end in zip(vehicles, starts, ends):
+            missing = _missing_text_fields(vehicle, owner)
+            if missing and lowered is None:
+                lowered = np.char.lower(cells)
+            if missing and _rows_mention(df, lowered, missing, start, end):
+                text_result = text_parser(_rows_text(df, cells, start, end))
+                for key, value in text_result.items():
+                    if not vehicle.get(key):
+                        vehicle[key] = value
+            owner.update({key: vehicle[key] for key in OWNER_FIELDS if vehicle.get(key)})
+
+    results = [vehicle for _, vehicle in vehicles if vehicle]
+
+    # Дані власника зазвичай вказані один раз на весь аркуш
+    for prev, vehicle in zip(results, results[1:]):
+        for key in OWNER_FIELDS:
+            if not vehicle.get(key) and prev.get(key):
+                vehicle[key] = prev[key]
+
+    return results
+
+
+# ══════════════════════════════════════════════
+# ПАКЕТНА ОБРОБКА ФАЙЛІВ
+# ══════════════════════════════════════════════
+TEXT_EXTENSIONS = ('.txt',)
+EXCEL_EXTENSIONS = ('.xls', '.xlsx', '.xlsm')
+CSV_EXTENSIONS = ('.csv',)
+
+
+def read_vehicle_frame(name, data):
+    """Читає Excel/CSV з байтів у DataFrame."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in CSV_EXTENSIONS:
+        return pd.read_csv(BytesIO(data), encoding='utf-8', sep=None, engine='python')
+    if ext == '.xls':
+        return pd.read_excel(BytesIO(data), engine='xlrd')
+    try:
+        return pd.read_excel(BytesIO(data), engine='openpyxl')
+    except Exception:
+        return pd.read_excel(BytesIO(data), engine='xlrd')
+
+
+def _parse_vehicle_file(name, data):
+    """
+    Розбирає один файл з даними про ТЗ (виконується і в процесах пулу).
+
+    Returns:
+        tuple: (vehicles, error_message, duration_seconds)
+    """
+    started = time.perf_counter()
+    ext = os.path.splitext(name)[1].lower()
+    vehicles, error = [], None
+
+    try:
+        if ext in TEXT_EXTENSIONS:
+            vehicles = parse_vehicle_text(data.decode('utf-8'))
+        elif ext in EXCEL_EXTENSIONS + CSV_EXTENSIONS:
+            try:
+                vehicles = extract_excel_vehicles(read_vehicle_frame(name, data), text_parser=parse_vehicle_record)
+            except Exception as e:
+                # Деякі "xls" з НАІС насправді є текстом - пробуємо як текст
+                vehicles = parse_vehicle_text(data.decode('utf-8', errors='ignore'))
+                if not vehicles:
+                    error = f"Помилка читання Excel: {e}"
+        else:
+            error = "Невідомий формат файлу"
+    except Exception as e:
+        error = f"Помилка обробки файлу: {e}"
+
+    if not vehicles and not error:
+        error = "Не вдалося витягти дані про ТЗ"
+    return vehicles, error, time.perf_counter() - started
+
+
+def parse_vehicle_files(files, max_workers=None):
+    """
+    Паралельно розбирає файли з даними про ТЗ у пулі процесів.
+
+    Args:
+        files: Список UploadedFile або file-like об'єктів (.txt, .xls, .xlsx, .csv)
+        max_workers: Максимум одночасних задач у спільному пулі (за замовчуванням - усі воркери)
+
+    Returns:
+        list: звіти по файлах у порядку завантаження - словники з ключами
+            'name', 'vehicles', 'error', 'duration'
+    """
+    reports = []
+    pending = {}
+    for idx, f in enumerate(files):
+        name = getattr(f, 'name', f"file_{idx + 1}")
+        reports.append({'name': name, 'vehicles': [], 'error': None, 'duration': 0.0})
+        try:
+            data = f.getvalue() if hasattr(f, 'getvalue') else f.read()
+        except Exception as e:
+            reports[idx]['error'] = f"Помилка обробки файлу: {e}"
+            continue
+        pending[idx] = (name, data)
+
+    def _finish(idx, outcome):
+        reports[idx]['vehicles'], reports[idx]['error'], reports[idx]['duration'] = outcome
+        for vehicle in reports[idx]['vehicles']:
+            vehicle['source'] = 'file'
+            vehicle['filename'] = reports[idx]['name']
+
+    workers = min(len(pending), max_workers or POOL_WORKERS)
+    if workers > 1:
+        try:
+            # Спільний теплий пул процесу порталу (shared_resources)
+            for idx, outcome in pool_map(_parse_vehicle_file, pending, max_workers=workers):
+                _finish(idx, outcome)
+                del pending[idx]
+        except Exception:
+            # Пул недоступний (обмеження середовища) - добираємо послідовно
+            pass
+
+    for idx, args in list(pending.items()):
+        _finish(idx, _parse_vehicle_file(*args))
+
+    return reports
+
+
+def vehicles_table(reports):
+    """Зводить звіти parse_vehicle_files в одну таблицю (рядок на ТЗ або на помилку)."""
+    rows = []
+    for report in reports:
+        for vehicle in report['vehicles']:
+            row = {'файл': report['name']}
+            row.update({k: v for k, v in vehicle.items() if k not in ('source', 'filename')})
+            rows.append(row)
+        if report['error']:
+            rows.append({'файл': report['name'], 'помилка': report['error']})
+    return pd.DataFrame(rows)